@@ -0,0 +1,9 @@
+"""
+Command line entry point: python -m smarthome LOAD_PROFILE METEOROLOGICAL_DATA [options]
+
+See modules/cli.py. The GUI is started with python main.py from this directory.
+"""
+
+from .modules.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+This module generates synthetic input data for the benchmarks: load profile workbooks in the format read by
+ElectricLoad.from_excel and PVGIS-style meteorological CSV files in the format read by MeteorologicalData.from_csv.
+
+Functions:
+    load_profile_df(appliances, seed): Builds the raw appliance table of a load profile workbook.
+    seasonal_profile(appliances, battery_hours, seed): Builds a cleaned seasonal ApplianceTable with battery discharge.
+    neighborhood_profiles(homes, appliances, seed): Builds cleaned seasonal ApplianceTables of many homes.
+    write_load_profile(path, appliances, seed): Writes a load profile workbook.
+    write_meteorological_csv(path, years, seed): Writes a PVGIS-format CSV covering the given number of years.
+
+All generators are deterministic for a given seed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.appliances import ApplianceTable
+
+# Shares of generated appliances with special usage windows
+WRAP_AROUND_SHARE = 0.15   # Start > End, i.e. running across midnight
+ALL_DAY_SHARE = 0.10       # 0 - 24
+UNUSED_SHARE = 0.05        # 0 - 0 in one season, dropped by from_excel
+
+PVGIS_PREAMBLE = [
+    "Latitude (decimal degrees):\t41.028",
+    "Longitude (decimal degrees):\t28.890",
+    "Elevation (m):\t81",
+    "Radiation database:\tPVGIS-SARAH3",
+    "",
+    "",
+    "Slope: 34 deg. (optimum)",
+    "Azimuth: 8 deg. (optimum)",
+    "Nominal power of the PV system (c-Si) (kWp):\t3.0",
+    "System losses (%):\t0.0",
+    "time,P,G(i),H_sun,T2m,WS10m,Int",
+]
+
+PVGIS_FOOTER = [
+    "",
+    "P: PV system power (W)",
+    "G(i): Global irradiance on the inclined plane (plane of the array) (W/m2)",
+    "H_sun: Sun height (degree)",
+    "T2m: 2-m air temperature (degree Celsius)",
+    "WS10m: 10-m total wind speed (m/s)",
+    "Int: 1 means solar radiation values are reconstructed",
+    "",
+    "",
+    "",
+    "PVGIS (c) European Union, 2001-2024",
+]
+
+
+def _usage_windows(rng, appliances):
+    start = rng.integers(0, 24, appliances).astype(float)
+    duration = rng.integers(1, 6, appliances)
+    end = np.minimum(start + duration, 24).astype(float)
+
+    kind = rng.random(appliances)
+    wrap = kind < WRAP_AROUND_SHARE
+    start[wrap] = rng.integers(18, 24, wrap.sum())
+    end[wrap] = rng.integers(1, 7, wrap.sum())
+
+    all_day = (kind >= WRAP_AROUND_SHARE) & (kind < WRAP_AROUND_SHARE + ALL_DAY_SHARE)
+    start[all_day], end[all_day] = 0, 24
+
+    unused = (kind >= WRAP_AROUND_SHARE + ALL_DAY_SHARE) & (kind < WRAP_AROUND_SHARE + ALL_DAY_SHARE + UNUSED_SHARE)
+    start[unused], end[unused] = 0, 0
+    return start, end
+
+
+def load_profile_df(appliances: int, seed: int = 0):
+    """ Builds the raw appliance table of a load profile workbook with winter and summer usage windows. """
+    rng = np.random.default_rng(seed)
+    winter_start, winter_end = _usage_windows(rng, appliances)
+    summer_start, summer_end = _usage_windows(rng, appliances)
+    return pd.DataFrame({
+        'Name': [f"Appliance {i}" for i in range(appliances)],
+        'Rated Power (kW)': np.round(rng.gamma(1.5, 0.5, appliances), 2),
+        'Priority Group': rng.integers(1, 6, appliances),
+        'Winter Hours Start': winter_start,
+        'Winter Hours End': winter_end,
+        'Summer Hours Start': summer_start,
+        'Summer Hours End': summer_end,
+    })
+
+
+def seasonal_profile(appliances: int, battery_hours: int = 6, seed: int = 0):
+    """
+    Builds a cleaned seasonal profile, as returned by ElectricLoad.from_excel, with battery discharge as
+    added by Battery.update_profile (in the first battery_hours peak hours, up to 6).
+    """
+    rng = np.random.default_rng(seed + 1)
+    raw = load_profile_df(appliances, seed)
+    profile_df = raw[['Name', 'Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End']].rename(
+        columns={'Winter Hours Start': 'Start', 'Winter Hours End': 'End'})
+    profile_df = profile_df[~((profile_df['Start'] == 0) & (profile_df['End'] == 0))]
+
+    hours = np.arange(17, 17 + min(battery_hours, 6))
+    discharge = np.zeros(24)
+    discharge[hours] = np.round(rng.random(len(hours)), 3)
+    return ApplianceTable.from_frame(profile_df).with_discharge(discharge)
+
+
+def neighborhood_profiles(homes: int, appliances: int = 20, seed: int = 0):
+    """ Builds cleaned seasonal profiles of many homes with appliances each, drawn in one pass for speed. """
+    rng = np.random.default_rng(seed)
+    start, end = _usage_windows(rng, homes * appliances)
+    power = np.round(rng.gamma(1.5, 0.5, homes * appliances), 2)
+    priority = rng.integers(1, 6, homes * appliances)
+    names = np.array([f"Appliance {i}" for i in range(appliances)], dtype=object)
+
+    profiles = []
+    for home in range(homes):
+        rows = slice(home * appliances, (home + 1) * appliances)
+        used = ~((start[rows] == 0) & (end[rows] == 0))
+        profiles.append(ApplianceTable(names[used], power[rows][used], priority[rows][used], start[rows][used], end[rows][used]))
+    return profiles
+
+
+def write_load_profile(path: str, appliances: int, seed: int = 0):
+    """ Writes a load profile workbook with the given number of appliances. """
+    load_profile_df(appliances, seed).to_excel(path, index=False)
+
+
+def write_meteorological_csv(path: str, years: int = 1, seed: int = 0):
+    """ Writes a PVGIS-format hourly CSV (preamble, data rows and footer) covering the given number of years. """
+    rng = np.random.default_rng(seed)
+    time = pd.date_range('2000-01-01 00:10', periods=8760 * years, freq='h')
+    hour = time.hour.to_numpy()
+    day_of_year = time.dayofyear.to_numpy()
+
+    # Sun height follows the hour of day and the season, with some weather noise on top
+    season = 1 + 0.5 * np.cos(2 * np.pi * (day_of_year - 172) / 365)
+    sun_height = np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None) * 45 * season
+    sun_height = np.round(sun_height * rng.uniform(0.8, 1.0, len(time)), 2)
+    irradiance = np.round(sun_height * 15 * rng.uniform(0.3, 1.0, len(time)), 2)
+    temperature = np.round(15 - 10 * np.cos(2 * np.pi * (day_of_year - 15) / 365) + rng.normal(0, 2, len(time)), 2)
+
+    data = pd.DataFrame({
+        'time': time.strftime('%Y%m%d:%H%M'),
+        'P': np.round(irradiance * 2.8, 2),
+        'G(i)': irradiance,
+        'H_sun': sun_height,
+        'T2m': temperature,
+        'WS10m': np.round(rng.gamma(2, 1, len(time)), 2),
+        'Int': 0.0,
+    })
+
+    with open(path, 'w', newline='') as f:
+        f.write('\n'.join(PVGIS_PREAMBLE) + '\n')
+        data.to_csv(f, header=False, index=False)
+        f.write('\n'.join(PVGIS_FOOTER) + '\n')
@@ -0,0 +1,269 @@
+"""
+This module times every pipeline stage separately on synthetic inputs of increasing size and compares the
+timings against a stored JSON baseline, so performance regressions show up per stage.
+
+Functions:
+    run(appliance_counts, years, repeat): Times every stage and returns {benchmark name: seconds}.
+    calibrate(repeat): Times a fixed reference workload, the unit in which timings are compared across machines.
+    compare(results, baseline, tolerance, scale): Returns the benchmarks that got slower than the baseline allows.
+    main(argv): Command line entry point.
+
+Stages:
+    - from_excel: ElectricLoad.from_excel on a workbook with n appliances (cache disabled).
+    - from_csv: MeteorologicalData.from_csv on a PVGIS file covering y years (cache disabled).
+    - simulate_battery: Battery.simulate_battery on a seasonal profile with n appliances.
+    - shift_loads: Calculations.shift_loads on a profile with n appliances and battery discharge.
+    - generate_adjusted_profile: Calculations.generate_adjusted_profile of the same profile.
+    - calculate_energy_cost: Calculations.calculate_energy_cost of the resulting hourly profile.
+    - analyze_seasons: Pipeline.analyze_seasons of the n-appliance profile over the twelve monthly seasons.
+    - neighborhood: Neighborhood.load_matrix and coordinate for NEIGHBORHOOD_HOMES homes of 20 appliances.
+    - monte_carlo: MonteCarlo.run of MONTE_CARLO_SAMPLES winter days of a 20-appliance home, weather drawn from the shortest meteorological file.
+    - lifecycle: Lifecycle.run of LIFECYCLE_YEARS years of the same home (175,200 hours), with rainflow counting and capacity fade.
+    - cli: Cold start of `python -m modules.cli` in a new process: '--help', and a full analysis of the
+      n-appliance workbook with the shortest meteorological file (cache warm, as for repeated scheduler runs).
+
+Usage, from the smarthome directory:
+    python -m benchmarks.run                      # compare against benchmarks/baseline.json
+    python -m benchmarks.run --full               # the full range: up to 100,000 appliances and 30 years
+    python -m benchmarks.run --full --save        # record a new baseline
+    python -m benchmarks.run --appliances 100000 --years 30
+
+Every timing is the best of --repeat runs. The default sizes (APPLIANCE_COUNTS, YEARS) keep a run short;
+--full adds 100,000 appliances and 30-year files (FULL_APPLIANCE_COUNTS, FULL_YEARS), and the stored baseline
+covers the full range.
+
+Absolute timings depend on the machine. The baseline stores the time of a fixed reference workload (calibrate)
+next to the stage timings, and compare scales the baseline by the ratio of the reference times, so a faster or
+slower machine does not show up as a change of every stage. The scaling is approximate: stages bound by memory
+or process start-up (from_excel, cli) do not scale like the reference, so for tight tolerances record the
+baseline on the machine the comparison runs on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from modules.battery import Battery
+from modules.calculations import Calculations, PEAK_START, PEAK_END
+from modules.lifecycle import Lifecycle
+from modules.load_profile import ElectricLoad
+from modules.log import configure, get_logger
+from modules.met_data import MeteorologicalData
+from modules.monte_carlo import MonteCarlo
+from modules.neighborhood import Neighborhood
+from modules.pipeline import CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY, Pipeline
+from modules.seasons import DEFAULT_SEASONS, SEASON_SETS
+
+from .generators import neighborhood_profiles, seasonal_profile, write_load_profile, write_meteorological_csv
+
+logger = get_logger('benchmarks')
+
+BASELINE_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Directory the command line benchmarks run from
+SMARTHOME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPLIANCE_COUNTS = [10, 1_000, 10_000]
+YEARS = [1, 10]
+# Sizes of --full, covering the range the pipeline is expected to handle
+FULL_APPLIANCE_COUNTS = [10, 1_000, 10_000, 100_000]
+FULL_YEARS = [1, 10, 30]
+REPEAT = 3
+# A benchmark regresses when it is slower than TOLERANCE times its baseline
+TOLERANCE = 1.5
+THRESHOLD = 3.0
+NEIGHBORHOOD_HOMES = 10_000
+MONTE_CARLO_SAMPLES = 10_000
+LIFECYCLE_YEARS = 20
+BATTERY_CAPACITY = 5.0
+
+
+def _best_time(function, repeat, setup=None):
+    """ Returns the best wall time of repeat calls; setup() runs untimed before every call and its result is passed on. """
+    best = float('inf')
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _battery():
+    return Battery(capacity=BATTERY_CAPACITY, charge_rate=CHARGE_RATE, discharge_rate=DISCHARGE_RATE,
+                   soc=BATTERY_CAPACITY * INITIAL_SOC_RATIO, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY)
+
+
+def _cli(arguments, cache_dir):
+    """ Runs the command line interface in a new Python process, as a scheduler would. """
+    subprocess.run([sys.executable, '-m', 'modules.cli', *arguments], cwd=SMARTHOME_DIR, check=True, stdout=subprocess.DEVNULL,
+                   env={**os.environ, 'SMARTHOME_CACHE_DIR': cache_dir})
+
+
+def run(appliance_counts=APPLIANCE_COUNTS, years=YEARS, repeat=REPEAT):
+    """
+    Time every stage on synthetic inputs.
+
+    Parameters:
+    - appliance_counts: Numbers of appliances of the generated load profiles.
+    - years: Lengths of the generated meteorological files in years.
+    - repeat: Number of runs per benchmark; the best one is reported.
+
+    Returns:
+    - Dictionary mapping benchmark names such as 'shift_loads[n=1000]' to seconds.
+    """
+    peak_hours = list(range(PEAK_START, PEAK_END + 1))
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, 'cache')
+        results['cli[--help]'] = _best_time(lambda: _cli(['--help'], cache_dir), repeat)
+
+        winter_df = None
+        for year_count in years:
+            meteorological_file_path = os.path.join(directory, f'meteorological_{year_count}y.csv')
+            write_meteorological_csv(meteorological_file_path, year_count)
+            results[f'from_csv[years={year_count}]'] = _best_time(
+                lambda: MeteorologicalData.from_csv(meteorological_file_path, use_cache=False), repeat)
+            if winter_df is None:
+                winter_df, _ = MeteorologicalData.from_csv(meteorological_file_path, use_cache=False)
+                monthly_dfs = MeteorologicalData.seasonal_from_csv(meteorological_file_path, SEASON_SETS['monthly'], use_cache=False)
+                cli_meteorological_file_path = meteorological_file_path
+            logger.info("from_csv[years=%d] done", year_count)
+
+        for count in appliance_counts:
+            load_profile_file_path = os.path.join(directory, f'load_profile_{count}.xlsx')
+            write_load_profile(load_profile_file_path, count)
+            results[f'from_excel[n={count}]'] = _best_time(lambda: ElectricLoad.from_excel(load_profile_file_path, use_cache=False), repeat)
+
+            profile_df, _ = ElectricLoad.from_excel(load_profile_file_path, use_cache=False)
+            results[f'simulate_battery[n={count}]'] = _best_time(
+                lambda battery: battery.simulate_battery(profile_df, winter_df, THRESHOLD, peak_hours), repeat,
+                setup=lambda: (_battery(),))
+
+            battery_profile_df = seasonal_profile(count)
+            results[f'shift_loads[n={count}]'] = _best_time(
+                lambda df: Calculations.shift_loads(df, THRESHOLD, peak_hours), repeat,
+                setup=lambda: (battery_profile_df.copy(),))
+
+            shifted_profile_df = Calculations.shift_loads(battery_profile_df.copy(), THRESHOLD, peak_hours)
+            results[f'generate_adjusted_profile[n={count}]'] = _best_time(
+                lambda: Calculations.generate_adjusted_profile(shifted_profile_df, battery_profile_df), repeat)
+
+            hourly_df = Calculations.generate_adjusted_profile(shifted_profile_df, battery_profile_df)
+            results[f'calculate_energy_cost[n={count}]'] = _best_time(
+                lambda: Calculations.calculate_energy_cost(hourly_df, peak_hours), repeat)
+
+            results[f'analyze_seasons[n={count}]'] = _best_time(
+                lambda: Pipeline.analyze_seasons([profile_df] * len(monthly_dfs), monthly_dfs, THRESHOLD, peak_hours, SEASON_SETS['monthly']), repeat)
+
+            cli_arguments = [load_profile_file_path, cli_meteorological_file_path, '--threshold', str(THRESHOLD)]
+            _cli(cli_arguments, cache_dir)  # Fills the cache
+            results[f'cli[n={count}]'] = _best_time(lambda: _cli(cli_arguments, cache_dir), repeat)
+            logger.info("n=%d done", count)
+
+        profiles = neighborhood_profiles(NEIGHBORHOOD_HOMES)
+        feeder_limit = sum(profile_df.load().mean() for profile_df in profiles) * 1.1
+        results[f'neighborhood[homes={NEIGHBORHOOD_HOMES}]'] = _best_time(
+            lambda: Neighborhood.coordinate(*Neighborhood.load_matrix(profiles), feeder_limit), repeat)
+
+        hourly_df = MeteorologicalData.hourly_from_csv(cli_meteorological_file_path, use_cache=False)
+        results[f'monte_carlo[samples={MONTE_CARLO_SAMPLES}]'] = _best_time(
+            lambda: MonteCarlo.run(profiles[0], hourly_df, THRESHOLD, peak_hours, MONTE_CARLO_SAMPLES, DEFAULT_SEASONS[0], seed=0), repeat)
+        results[f'lifecycle[years={LIFECYCLE_YEARS}]'] = _best_time(
+            lambda: Lifecycle.run(profiles[0], hourly_df, THRESHOLD, peak_hours, LIFECYCLE_YEARS), repeat)
+
+    return results
+
+
+def calibrate(repeat=REPEAT):
+    """
+    Time a fixed mix of NumPy array work and a pure Python loop, the two kinds of work the stages consist of.
+
+    Returns:
+    - Best wall time in seconds.
+    """
+    values = np.random.default_rng(0).random(1_000_000)
+    numbers = values[:200_000].tolist()
+
+    def workload():
+        np.cumsum(np.sort(values))
+        total = 0.0
+        for number in numbers:
+            total += number * number
+
+    return _best_time(workload, repeat)
+
+
+def compare(results, baseline, tolerance=TOLERANCE, scale=1.0):
+    """
+    Compare timings against a baseline.
+
+    Parameters:
+    - results: Timings from run().
+    - baseline: Timings of the baseline, in the same format.
+    - tolerance: Allowed slowdown factor.
+    - scale: Speed of this machine relative to the baseline machine, as the ratio of their calibrate() times;
+      every baseline timing is multiplied by it.
+
+    Returns:
+    - List of (name, scaled baseline seconds, seconds) for every benchmark slower than tolerance times its scaled
+      baseline. Benchmarks missing from either side are not compared.
+    """
+    return [(name, baseline[name] * scale, seconds) for name, seconds in results.items()
+            if name in baseline and seconds > baseline[name] * scale * tolerance]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on synthetic data.")
+    parser.add_argument('--appliances', type=int, nargs='+', default=APPLIANCE_COUNTS, help="Appliance counts of the load profiles.")
+    parser.add_argument('--years', type=int, nargs='+', default=YEARS, help="Lengths of the meteorological files in years.")
+    parser.add_argument('--full', action='store_true', help="Run the full range of sizes (FULL_APPLIANCE_COUNTS and FULL_YEARS).")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Runs per benchmark; the best one is reported (default: 3).")
+    parser.add_argument('--baseline', default=BASELINE_FILE_PATH, help="Baseline JSON file (default: benchmarks/baseline.json).")
+    parser.add_argument('--save', action='store_true', help="Write the results as the new baseline instead of comparing.")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Allowed slowdown factor (default: 1.5).")
+    parser.add_argument('--log-level', default='WARNING', help="Logging level (default: WARNING).")
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+
+    if args.full:
+        args.appliances, args.years = FULL_APPLIANCE_COUNTS, FULL_YEARS
+    calibration = calibrate(args.repeat)
+    results = run(args.appliances, args.years, args.repeat)
+
+    baseline = {}
+    scale = 1.0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored['results']
+        # Baselines without a calibration time are compared as recorded
+        if stored.get('calibration'):
+            scale = calibration / stored['calibration']
+        print(f"{'calibration':40s} {calibration * 1000:10.2f} ms  (this machine runs at {1 / scale:.2f}x the baseline speed)")
+
+    for name, seconds in results.items():
+        reference = f"  (baseline {baseline[name] * scale * 1000:10.2f} ms)" if name in baseline else ''
+        print(f"{name:40s} {seconds * 1000:10.2f} ms{reference}")
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'platform': platform.platform(), 'calibration': calibration, 'results': results},
+                      f, indent=2)
+        logger.info("Baseline written to: %s", args.baseline)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, scale)
+    for name, reference, seconds in regressions:
+        logger.error("Regression in %s: %.2f ms -> %.2f ms", name, reference * 1000, seconds * 1000)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
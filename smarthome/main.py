@@ -1,18 +1,21 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
+from tkinter import filedialog, messagebox, ttk
 
 import os   # For path
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from modules.battery import Battery
-from modules.load_profile import ElectricLoad
-from modules.met_data import MeteorologicalData
-from modules.calculations import Calculations
+from modules.calculations import Calculations, PEAK_START, PEAK_END
+from modules.log import configure, get_logger
+from modules.pipeline import AnalysisCancelled, Pipeline
+from modules.result_store import ResultStore
+from modules.seasons import DEFAULT_SEASONS
 
-PEAK_START = 17
-PEAK_END = 22
+logger = get_logger('main')
+
+# How often the UI thread checks the background analysis for progress (ms)
+POLL_INTERVAL_MS = 50
 
 class EnergyAnalyzerApp:
     def __init__(self, root):
@@ -34,17 +37,55 @@ class EnergyAnalyzerApp:
         tk.Label(root, text="Set Threshold:").grid(row=2, column=0, padx=5, pady=5)
         tk.Entry(root, textvariable=self.threshold).grid(row=2, column=1, padx=5, pady=5)
 
-        # Analyze button
-        tk.Button(root, text="Analyze", command=self.run_analysis).grid(row=3, column=0, columnspan=2, pady=10)
+        # Cost-optimal load scheduling instead of shifting loads after the peak
+        self.optimal_shifting = tk.BooleanVar(value=False)
+        tk.Checkbutton(root, text="Cost-optimal load scheduling", variable=self.optimal_shifting).grid(row=3, column=0, padx=5, pady=5)
+        # Cost-optimal battery dispatch instead of the SoC band rules
+        self.optimal_dispatch = tk.BooleanVar(value=False)
+        tk.Checkbutton(root, text="Cost-optimal battery dispatch", variable=self.optimal_dispatch).grid(row=3, column=1, padx=5, pady=5)
+        # PV production modelled from G(i) and T2m instead of the sun height
+        self.pv_model = tk.BooleanVar(value=False)
+        tk.Checkbutton(root, text="PV model (G(i) and T2m)", variable=self.pv_model).grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+
+        # Analyze and cancel buttons
+        self.analyze_button = tk.Button(root, text="Analyze", command=self.run_analysis)
+        self.analyze_button.grid(row=5, column=0, pady=10)
+        self.cancel_button = tk.Button(root, text="Cancel", command=self.cancel_analysis, state=tk.DISABLED)
+        self.cancel_button.grid(row=5, column=1, pady=10)
+
+        # Progress of the running analysis
+        self.progress = ttk.Progressbar(root, length=300)
+        self.progress.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
+        self.status = tk.StringVar(value="Ready")
+        tk.Label(root, textvariable=self.status).grid(row=7, column=0, columnspan=2, padx=5)
 
         # Output area
         self.output_text = tk.Text(root, wrap=tk.WORD, height=15, width=50)
-        self.output_text.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        self.output_text.grid(row=8, column=0, columnspan=2, padx=5, pady=5)
+
+        # Charts, created once and updated in place after every analysis. Imported here because matplotlib takes
+        # most of the start-up time, and importing main.py (e.g. for its helpers) should not pay for it.
+        from modules.charts import SeasonalCharts
+        self.charts = SeasonalCharts(root)
+        self.charts.notebook.grid(row=0, column=2, rowspan=9, padx=5, pady=5, sticky='nsew')
+        root.columnconfigure(2, weight=1)
+        root.rowconfigure(7, weight=1)
 
         # Initialize file paths as None
         self.load_file_path = None
         self.met_file_path = None
 
+        # The analysis runs on a background worker; it reports stages through a queue that the UI thread polls.
+        # Stage results are cached between runs, so changing only the threshold skips parsing and sizing.
+        # Finished runs are also kept in the result store, so an identical run in a later session is not recomputed.
+        self.graph = Pipeline.analysis_graph()
+        self.results = ResultStore()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis')
+        self.messages = queue.Queue()
+        self.future = None
+        self.cancel_event = None
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
     def select_load_file(self):
         # Open file dialog for selecting the load profile file
         self.load_file_path = filedialog.askopenfilename(
@@ -54,7 +95,7 @@ class EnergyAnalyzerApp:
         if self.load_file_path:
             try:
                 # Validate file format or load preview here
-                print(f"Load profile file selected: {self.load_file_path}")
+                logger.info("Load profile file selected: %s", self.load_file_path)
                 self.default_load_dir = os.path.dirname(self.load_file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Error loading file: {str(e)}")
@@ -68,7 +109,7 @@ class EnergyAnalyzerApp:
         if self.met_file_path:
             try:
                 # Validate file format or load preview here
-                print(f"Meteorological data file selected: {self.met_file_path}")
+                logger.info("Meteorological data file selected: %s", self.met_file_path)
                 self.default_met_dir = os.path.dirname(self.met_file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Error loading file: {str(e)}")
@@ -78,272 +119,142 @@ class EnergyAnalyzerApp:
         if not self.load_file_path or not self.met_file_path:
             messagebox.showerror("Error", "Please select both load profile and meteorological data files.")
             return
-        
-        try:                            
-            # Load data
-            winter_profile_df, summer_profile_df = ElectricLoad.from_excel(self.load_file_path)
-            winter_meteorological_df, summer_meteorological_df = MeteorologicalData.from_csv(self.met_file_path)
+        if self.future is not None and not self.future.done():
+            return
 
+        try:
             threshold = self.threshold.get()                    # Get the threshold value
-            print(f"Threshold set to: {threshold}")
-            peak_hours = list(range(PEAK_START, PEAK_END + 1))  # Define peak hours
-            print(f"Peak hours: {peak_hours}")
-
-            print("\n===================WINTER PROFILE===================\n")
-
-            temp = self.generate_hourly_profile(winter_profile_df)
-            max_rated_power = max(temp['Power (kW)'])  # Get the maximum rated power
-            print(f"Max load set to: {max_rated_power}")
-
-            # Create a battery instance for winter
-            battery = Battery(      # Create a battery instance
-                capacity=max_rated_power * 0.5,  # 50% of max rated power as capacity
-                charge_rate=0.2,    # Charge rate set to 0.2 kW
-                discharge_rate=0.3,     # Discharge rate set to 0.3 kW
-                soc=(max_rated_power * 0.5) * 0.1,  # Initial SoC set to 10% of capacity
-                panel_area=10,
-                panel_efficiency=.70,
-            )
-
-            battery_winter_profile_df, winter_soc = battery.simulate_battery(winter_profile_df, winter_meteorological_df, threshold, peak_hours)    # Manage battery for winter profile
-            shifted_winter_profile_df = Calculations.shift_loads(battery_winter_profile_df, threshold, peak_hours)    # Shift winter profile
-
-            print(f"\nOriginal Profile: {type(winter_profile_df)}, Shape: {np.shape(winter_profile_df)}")
-            print(f"Battery Profile: {type(battery_winter_profile_df)}, Shape: {np.shape(battery_winter_profile_df)}")
-            print(f"Shifted Profile: {type(shifted_winter_profile_df)}, Shape: {np.shape(shifted_winter_profile_df)}")    
-
-            winter_hourly = EnergyAnalyzerApp.generate_adjusted_profile(winter_profile_df)  # Generate adjusted winter profile
-            battery_winter_hourly = EnergyAnalyzerApp.generate_adjusted_profile(winter_profile_df, battery_winter_profile_df)
-            shifted_winter_hourly = EnergyAnalyzerApp.generate_adjusted_profile(shifted_winter_profile_df, battery_winter_profile_df)
-
-            winter_cost = Calculations.calculate_energy_cost(winter_hourly, peak_hours)
-            battery_winter_cost = Calculations.calculate_energy_cost(battery_winter_hourly, peak_hours)
-            shifted_winter_cost = Calculations.calculate_energy_cost(shifted_winter_hourly, peak_hours)
-
-            # Display results in the output text box
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.insert(tk.END, f"Winter Hourly Energy Cost (Original): {winter_cost:.3f} $\n")
-            self.output_text.insert(tk.END, f"Winter Hourly Energy Cost (Battery): {battery_winter_cost:.3f} $\n")
-            self.output_text.insert(tk.END, f"Winter Hourly Energy Cost (Shifted): {shifted_winter_cost:.3f} $\n")
-
-            print("\n===================SUMMER PROFILE===================\n")
-
-            temp = self.generate_hourly_profile(summer_profile_df)
-            max_rated_power = max(temp['Power (kW)'])  # Get the maximum rated power
-            print(f"Max load set to: {max_rated_power}")
-
-            # Create a battery instance for summer
-            battery = Battery(      # Create a battery instance
-                capacity=max_rated_power * 0.5,  # 50% of max rated power as capacity
-                charge_rate=0.2,    # Charge rate set to 0.2 kW
-                discharge_rate=0.3,     # Discharge rate set to 0.3 kW
-                soc=0.1 * max_rated_power * 0.5,  # Initial SoC set to 10% of capacity
-                panel_area=10,
-                panel_efficiency=.70,
-            )
-
-            battery_summer_profile_df, summer_soc = battery.simulate_battery(summer_profile_df, summer_meteorological_df, threshold, peak_hours)    # Manage battery for summer profile
-            shifted_summer_profile_df = Calculations.shift_loads(battery_summer_profile_df, threshold, peak_hours)    # Shift summer profile
-
-            print(f"\nOriginal Profile: {type(summer_profile_df)}, Shape: {np.shape(summer_profile_df)}")                 # Display the original profile
-            print(f"Battery Profile: {type(battery_summer_profile_df)}, Shape: {np.shape(battery_summer_profile_df)}")
-            print(f"Shifted Profile: {type(shifted_summer_profile_df)}, Shape: {np.shape(shifted_summer_profile_df)}") 
-
-            summer_hourly = EnergyAnalyzerApp.generate_adjusted_profile(summer_profile_df)
-            battery_summer_hourly = EnergyAnalyzerApp.generate_adjusted_profile(summer_profile_df, battery_summer_profile_df)
-            shifted_summer_hourly = EnergyAnalyzerApp.generate_adjusted_profile(shifted_summer_profile_df, battery_summer_profile_df)
-            
-            summer_cost = Calculations.calculate_energy_cost(summer_hourly, peak_hours)
-            battery_summer_cost = Calculations.calculate_energy_cost(battery_summer_hourly, peak_hours)
-            shifted_summer_cost = Calculations.calculate_energy_cost(shifted_summer_hourly, peak_hours)
-
-            # Display results in the output text box
-            self.output_text.insert(tk.END, f"\nSummer Hourly Energy Cost (Original): {summer_cost:.3f} $\n")
-            self.output_text.insert(tk.END, f"Summer Hourly Energy Cost (Battery): {battery_summer_cost:.3f} $\n")
-            self.output_text.insert(tk.END, f"Summer Hourly Energy Cost (Shifted): {shifted_summer_cost:.3f} $\n")
-
-            # Plot the profiles
-            self.plot_seasonal_profiles(
-                winter_hourly, battery_winter_hourly, shifted_winter_hourly, winter_meteorological_df, winter_soc, winter_cost, battery_winter_cost, shifted_winter_cost,
-                summer_hourly, battery_summer_hourly, shifted_summer_hourly, summer_meteorological_df, summer_soc, summer_cost, battery_summer_cost, shifted_summer_cost,
-                threshold, peak_hours
-            )
+        except tk.TclError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        logger.info("Threshold set to: %s", threshold)
+        peak_hours = list(range(PEAK_START, PEAK_END + 1))  # Define peak hours
+        logger.info("Peak hours: %s", peak_hours)
+        shift_method = 'optimal' if self.optimal_shifting.get() else 'greedy'
+        dispatch = 'optimal' if self.optimal_dispatch.get() else 'rules'
+        pv_model = 'irradiance' if self.pv_model.get() else None
+
+        # Start the analysis on the worker and keep the window responsive while it runs
+        self.cancel_event = threading.Event()
+        self.analyze_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress['value'] = 0
+        self.status.set("Starting analysis...")
+        self.future = self.executor.submit(self.analyze, self.load_file_path, self.met_file_path, threshold, peak_hours, shift_method, dispatch, pv_model,
+                                          self.cancel_event)
+        self.root.after(POLL_INTERVAL_MS, self.poll_analysis)
+
+    def analyze(self, load_file_path, met_file_path, threshold, peak_hours, shift_method, dispatch, pv_model, cancel_event):
+        """Run the analysis on the worker thread. Never touches Tk; progress is reported through self.messages.
+
+        Stages are memoized in self.graph, so only the stages whose inputs changed since an earlier run are
+        computed, e.g. a new threshold skips file parsing and battery sizing. Runs whose inputs are already in the
+        result store only read the meteorological data for the charts."""
+
+        def report(stage):
+            if cancel_event.is_set():
+                raise AnalysisCancelled()
+            self.messages.put(('stage', stage))
+
+        params = {
+            'load_profile_file_path': load_file_path,
+            'meteorological_file_path': met_file_path,
+            'threshold': threshold,
+            'peak_hours': peak_hours,
+            'tariff': None,
+            'shift_method': shift_method,
+            'dispatch': dispatch,
+            'pv_model': pv_model,
+        }
+        inputs = ResultStore.inputs(load_file_path, met_file_path, threshold, peak_hours, shift_method=shift_method, dispatch=dispatch,
+                                    pv_model=pv_model)
+        stored = self.results.load(inputs['key'])
+        targets = ['meteorology'] if stored is not None else ['winter', 'summer', 'meteorology']
+        self.messages.put(('plan', len(self.graph.plan(targets, **params))))
+        results = self.graph.run(targets, progress=report, **params)
+
+        if stored is not None:
+            winter, summer = stored
+        else:
+            winter, summer = results['winter'], results['summer']
+            self.results.store(inputs, DEFAULT_SEASONS, [winter, summer])
+        winter_meteorological_df, summer_meteorological_df = results['meteorology']
+        return winter, summer, winter_meteorological_df, summer_meteorological_df, threshold, peak_hours
+
+    def poll_analysis(self):
+        """Show the stages reported by the worker and, once it finishes, its results. Runs on the UI thread."""
+        while True:
+            try:
+                kind, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'plan':
+                self.progress.config(maximum=max(value, 1))
+                continue
+            self.progress['value'] += 1
+            if not self.cancel_event.is_set():
+                self.status.set(f"{value.capitalize()}...")
+
+        if not self.future.done():
+            self.root.after(POLL_INTERVAL_MS, self.poll_analysis)
+            return
 
+        self.analyze_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        try:
+            winter, summer, winter_meteorological_df, summer_meteorological_df, threshold, peak_hours = self.future.result()
+        except AnalysisCancelled:
+            self.status.set("Analysis cancelled")
+            return
+        except Exception as e:
+            self.status.set("Analysis failed")
+            messagebox.showerror("Error", str(e))
+            return
+        self.progress['value'] = self.progress['maximum']
+        self.status.set("Analysis complete")
+
+        # Display results in the output text box
+        self.output_text.delete("1.0", tk.END)
+        self.output_text.insert(tk.END, f"Winter Hourly Energy Cost (Original): {winter['original_cost']:.3f} $\n")
+        self.output_text.insert(tk.END, f"Winter Hourly Energy Cost (Battery): {winter['battery_cost']:.3f} $\n")
+        self.output_text.insert(tk.END, f"Winter Hourly Energy Cost (Shifted): {winter['shifted_cost']:.3f} $\n")
+
+        self.output_text.insert(tk.END, f"\nSummer Hourly Energy Cost (Original): {summer['original_cost']:.3f} $\n")
+        self.output_text.insert(tk.END, f"Summer Hourly Energy Cost (Battery): {summer['battery_cost']:.3f} $\n")
+        self.output_text.insert(tk.END, f"Summer Hourly Energy Cost (Shifted): {summer['shifted_cost']:.3f} $\n")
+
+        # Plot the profiles
+        try:
+            self.charts.update(winter, summer, winter_meteorological_df, summer_meteorological_df, threshold, peak_hours)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-    @staticmethod
-    def plot_seasonal_profiles(winter_hourly, battery_winter_hourly, shifted_winter_hourly, winter_meteorological_df, winter_soc, winter_cost, battery_winter_cost, shifted_winter_cost,
-                               summer_hourly, battery_summer_hourly, shifted_summer_hourly, summer_meteorological_df, summer_soc, summer_cost, battery_summer_cost, shifted_summer_cost,
-                               threshold, peak_hours):
-        """Plot winter and summer profiles as bar charts."""
-
-        # Meteorological data plots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-        width = 0.50
-        x = np.arange(24)
-
-        ax1.bar(x, winter_meteorological_df['Irradiation (kW/m^2)'], width, label='Solar Irradiation', color='yellow', alpha=0.7)
-        ax1.set_title('Winter Meteorological Data')
-        ax1.set_xlabel('Hour of Day')
-        ax1.set_ylabel('Irradiation (kW/m^2)')
-        ax1.set_xticks(x)
-        ax1.set_xticklabels([str(i) for i in range(24)])
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        ax2.bar(x, summer_meteorological_df['Irradiation (kW/m^2)'], width, label='Solar Irradiation', color='yellow', alpha=0.7)
-        ax2.set_title('Summer Meteorological Data')
-        ax2.set_xlabel('Hour of Day')
-        ax2.set_ylabel('Irradiation (kW/m^2)')
-        ax2.set_xticks(x)
-        ax2.set_xticklabels([str(i) for i in range(24)])
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        plt.tight_layout()
-        plt.show()
-
-        # State of Charge plots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-        width = 0.50
-        x = np.arange(24)
-
-        ax1.bar(x, winter_soc['State of Charge (%)'], width, label='Battery SoC', color='orange', alpha=0.7)
-        ax1.set_title('Winter SoC')
-        ax1.set_xlabel('Hour of Day')
-        ax1.set_ylabel('State of Charge (%)')
-        ax1.set_xticks(x)
-        ax1.set_xticklabels([str(i) for i in range(24)])
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        ax2.bar(x, summer_soc['State of Charge (%)'], width, label='Battery SoC', color='orange', alpha=0.7)
-        ax2.set_title('Summer SoC')
-        ax2.set_xlabel('Hour of Day')
-        ax2.set_ylabel('State of Charge (%)')
-        ax2.set_xticks(x)
-        ax2.set_xticklabels([str(i) for i in range(24)])
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        plt.tight_layout()
-        plt.show()
-
-        # Load profiles
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-        width = 0.3
-        x = np.arange(24)
-
-        ax1.bar(x - width, winter_hourly['Power (kW)'], width, label='Original Profile', color='blue', alpha=0.7)
-        ax1.bar(x, battery_winter_hourly['Power (kW)'], width, label='Battery Profile', color='green', alpha=0.7)
-        ax1.bar(x + width, shifted_winter_hourly['Power (kW)'], width, label='Shifted Profile', color='red', alpha=0.7)
-        ax1.axvspan(min(peak_hours)-0.5, max(peak_hours)+0.5, color='yellow', alpha=0.2, label='Peak Hours')
-        ax1.axhline(threshold, color='black', linestyle='--', linewidth=1.5, label='Threshold')
-        ax1.set_title('Winter Load Profiles')
-        ax1.set_xlabel('Hour of Day')
-        ax1.set_ylabel('Power (kW)')
-        ax1.set_xticks(x)
-        ax1.set_xticklabels([str(i) for i in range(24)])
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        ax2.bar(x - width, summer_hourly['Power (kW)'], width, label='Original Profile', color='blue', alpha=0.7)
-        ax2.bar(x, battery_summer_hourly['Power (kW)'], width, label='Battery Profile', color='green', alpha=0.7)
-        ax2.bar(x + width, shifted_summer_hourly['Power (kW)'], width, label='Shifted Profile', color='red', alpha=0.7)
-        ax2.axvspan(min(peak_hours)-0.5, max(peak_hours)+0.5, color='yellow', alpha=0.2, label='Peak Hours')
-        ax2.axhline(threshold, color='black', linestyle='--', linewidth=1.5, label='Threshold')
-        ax2.set_title('Summer Load Profiles')
-        ax2.set_xlabel('Hour of Day')
-        ax2.set_ylabel('Power (kW)')
-        ax2.set_xticks(x)
-        ax2.set_xticklabels([str(i) for i in range(24)])
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        plt.tight_layout()
-        plt.show()
-
-        # Cost graphs
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-        width = 0.3
-        x = 3
-
-        ax1.bar(x - width, winter_cost, width, label='Original Profile', color='blue', alpha=0.7)
-        ax1.bar(x, battery_winter_cost, width, label='Battery Profile', color='green', alpha=0.7)
-        ax1.bar(x + width, shifted_winter_cost, width, label='Shifted Profile', color='red', alpha=0.7)
-        ax1.set_title('Winter Cost Calculations')
-        ax1.set_ylabel('Cost ($)')
-        ax1.set_xticks([x - width, x, x + width])
-        ax1.set_xticklabels(['Original\nProfile', 'Battery\nProfile', 'Shifted\nProfile'])
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        ax2.bar(x - width, summer_cost, width, label='Original Profile', color='blue', alpha=0.7)
-        ax2.bar(x, battery_summer_cost, width, label='Battery Profile', color='green', alpha=0.7)
-        ax2.bar(x + width, shifted_summer_cost, width, label='Shifted Profile', color='red', alpha=0.7)
-        ax2.set_title('Summer Cost Calculations')
-        ax2.set_ylabel('Cost ($)')
-        ax2.set_xticks([x - width, x, x + width])
-        ax2.set_xticklabels(['Original\nProfile', 'Battery\nProfile', 'Shifted\nProfile'])
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        plt.tight_layout()
-        plt.show()
+    def cancel_analysis(self):
+        """Ask the running analysis to stop; the worker checks the request before every stage."""
+        if self.cancel_event is not None and self.future is not None and not self.future.done():
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status.set("Cancelling...")
+
+    def close(self):
+        """Cancel any running analysis and close the window without waiting for the worker."""
+        self.cancel_analysis()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
     @staticmethod
     def generate_adjusted_profile(df, battery_df=None):
         """Generate the adjusted profile, considering battery discharge if provided."""
-        
-        # Generate the hourly profile for the given dataframe
-        hourly_profile = EnergyAnalyzerApp.generate_hourly_profile(df)
-        
-        # If battery_df is provided, adjust the profile by subtracting battery discharge
-        if battery_df is not None:
-            # Extract battery discharge entries from the battery_df
-            battery_entries = battery_df[battery_df['Name'].str.contains('Battery Discharge', na=False)]
-            
-            # Create battery discharge profile
-            battery_discharge = pd.DataFrame(0, index=np.arange(24), columns=['Power (kW)'])
-            
-            # Sum up battery discharge for each hour
-            for _, row in battery_entries.iterrows():
-                hour = int(row['Start'])
-                discharge = abs(row['Rated Power (kW)'])  # Convert negative discharge to positive
-                battery_discharge.loc[hour, 'Power (kW)'] += discharge
-            
-            # Subtract battery discharge from the original hourly profile
-            hourly_profile['Power (kW)'] -= battery_discharge['Power (kW)']
-        
-        return hourly_profile
+        return Calculations.generate_adjusted_profile(df, battery_df)
 
     @staticmethod
     def generate_hourly_profile(df):
         """Generate hourly power profile from appliance usage."""
-        
-        # Create an empty DataFrame to store hourly data
-        hourly_profile = pd.DataFrame(0, index=np.arange(24), columns=['Power (kW)'])
-        
-        # Iterate through each row (appliance data)
-        for _, row in df.iterrows():
-            start_time = row['Start']
-            end_time = row['End']
-            power = row['Rated Power (kW)']
-            
-            if start_time < end_time:
-                hourly_profile.loc[int(start_time):int(end_time)-1, 'Power (kW)'] += power
-            else:
-                hourly_profile.loc[int(start_time):23, 'Power (kW)'] += power
-                hourly_profile.loc[0:int(end_time)-1, 'Power (kW)'] += power
-        
-        return hourly_profile
-
-
-# Show the plot
-plt.show()
+        return Calculations.generate_hourly_profile(df)
+
 # Run the GUI application
 if __name__ == "__main__":
+    configure(os.environ.get('SMARTHOME_LOG_LEVEL', 'INFO'))
     root = tk.Tk()
     app = EnergyAnalyzerApp(root)
     root.mainloop()
\ No newline at end of file
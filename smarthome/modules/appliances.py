@@ -0,0 +1,116 @@
+"""
+This module provides the compact appliance table passed between the load profile reader, the battery
+simulation, load shifting and costing. A seasonal profile is kept as one NumPy array per column instead of
+a DataFrame with one row per appliance.
+
+Classes:
+    ApplianceTable: The appliances of a seasonal load profile and the battery discharge channel.
+Methods:
+    from_frame(df): Builds a table from a DataFrame with 'Name', 'Rated Power (kW)', 'Priority Group', 'Start' and 'End' columns.
+    to_frame(): Returns the appliances as a DataFrame, e.g. for display or export.
+    to_records() / from_records(array): Convert to and from structured arrays, e.g. for the on-disk cache.
+    copy(): Returns a table whose usage windows can be edited without changing this one.
+    with_discharge(discharge): Returns a table with battery discharge added to the discharge channel.
+    load(slots_per_hour): Aggregates the appliances into a load vector, net of the battery discharge.
+
+Battery discharge is a numeric channel (kW per slot) rather than negative-power virtual appliances, so
+aggregating, shifting and costing never scan appliance names or concatenate rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import Aggregation
+
+COLUMNS = ['Name', 'Rated Power (kW)', 'Priority Group', 'Start', 'End']
+RECORD_FIELDS = ['name', 'rated_power', 'priority', 'start', 'end']
+
+
+class ApplianceTable:
+    __slots__ = ('name', 'rated_power', 'priority', 'start', 'end', 'discharge')
+
+    def __init__(self, name, rated_power, priority, start, end, discharge=None):
+        self.name = np.asarray(name, dtype=object)  # Appliance names
+        self.rated_power = np.asarray(rated_power, dtype=float)  # kW
+        self.priority = np.asarray(priority)  # Priority group; 1 is never shifted. Keeps the dtype it was read with
+        self.start = np.asarray(start, dtype=float)  # Start of the usage window (decimal hours)
+        self.end = np.asarray(end, dtype=float)  # End of the usage window, exclusive; End <= Start runs across midnight
+        self.discharge = None if discharge is None else np.asarray(discharge, dtype=float)  # Battery discharge per slot (kW)
+
+    def __len__(self):
+        return len(self.rated_power)
+
+    def __repr__(self):
+        battery = '' if self.discharge is None else f", {self.discharge.sum():.3f} kW battery discharge"
+        return f"ApplianceTable({len(self)} appliances{battery})"
+
+    @staticmethod
+    def from_frame(df):
+        """
+        Build a table from a profile DataFrame.
+
+        Args:
+            df (DataFrame): Profile with 'Name', 'Rated Power (kW)', 'Priority Group', 'Start' and 'End' columns.
+
+        Returns:
+            ApplianceTable: The appliances, in row order and without a discharge channel.
+        """
+        missing = set(COLUMNS) - set(df.columns)
+        if missing:
+            raise ValueError(f"Profile is missing the following columns: {missing}")
+        return ApplianceTable(df['Name'].to_numpy(dtype=object), df['Rated Power (kW)'].to_numpy(dtype=float),
+                              df['Priority Group'].to_numpy(), df['Start'].to_numpy(dtype=float),
+                              df['End'].to_numpy(dtype=float))
+
+    def to_frame(self):
+        """ Returns the appliances as a DataFrame with the columns of from_frame; the discharge channel is left out. """
+        return pd.DataFrame(dict(zip(COLUMNS, (self.name, self.rated_power, self.priority, self.start, self.end))))
+
+    def to_records(self):
+        """ Returns the appliances as a structured array with RECORD_FIELDS; names are stored as text and the discharge channel is left out. """
+        return np.rec.fromarrays([self.name.astype(str), self.rated_power, self.priority, self.start, self.end], names=RECORD_FIELDS)
+
+    @staticmethod
+    def from_records(array):
+        """ Builds a table from a structured array written by to_records. Every column is copied, so memory-mapped arrays can be passed. """
+        return ApplianceTable(np.array(array['name'], dtype=object), np.array(array['rated_power'], dtype=float),
+                              np.array(array['priority']), np.array(array['start'], dtype=float), np.array(array['end'], dtype=float))
+
+    def copy(self):
+        """
+        Returns a table with its own usage windows. Load shifting edits only 'start' and 'end', so the other
+        columns and the discharge channel are shared with this table.
+        """
+        return ApplianceTable(self.name, self.rated_power, self.priority, self.start.copy(), self.end.copy(), self.discharge)
+
+    def with_discharge(self, discharge):
+        """
+        Returns a table carrying battery discharge on top of any discharge this one already has. The appliance
+        arrays are shared, so copy() the result before shifting loads in place.
+
+        Args:
+            discharge (array-like): Battery discharge per slot (kW), e.g. 24 hourly values.
+
+        Returns:
+            ApplianceTable: The same appliances with the combined discharge channel.
+        """
+        discharge = np.asarray(discharge, dtype=float)
+        if self.discharge is not None:
+            discharge = self.discharge + discharge
+        return ApplianceTable(self.name, self.rated_power, self.priority, self.start, self.end, discharge)
+
+    def load(self, slots_per_hour: int = 1):
+        """
+        Aggregate the appliances into a load vector and subtract the battery discharge.
+
+        Args:
+            slots_per_hour (int): Resolution, e.g. 4 for 15-minute slots. An hourly discharge channel applies
+                to every slot of its hour.
+
+        Returns:
+            ndarray: Load per slot (kW), shape (24 * slots_per_hour,).
+        """
+        load = Aggregation.profile_load(self, slots_per_hour)
+        if self.discharge is None:
+            return load
+        return load - np.repeat(self.discharge, len(load) // len(self.discharge))
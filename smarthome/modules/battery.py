@@ -1,5 +1,19 @@
+import logging
+
+import numpy as np
 import pandas as pd
 
+from .calculations import OVERLOAD_PENALTY
+from .log import get_logger
+
+logger = get_logger('battery')
+
+# SoC bands of the dispatch rules, shared with optimal dispatch (%)
+MIN_DISCHARGE_SOC = 30
+MAX_CHARGE_SOC = 80
+# Resolution of the SoC grid of optimal dispatch (%)
+DISPATCH_SOC_STEP = 1.0
+
 class Battery:
     def __init__(self, capacity: float, charge_rate: float, discharge_rate: float, soc: float, panel_area: float, panel_efficiency: float):
         self.capacity = capacity  # kWh
@@ -14,14 +28,15 @@ class Battery:
         Simulate the battery operation, adjusting the device consumption based on the available solar power and battery SoC.
 
         Args:
-            profile_df (DataFrame): Hourly energy consumption profile (kW).
+            profile_df (ApplianceTable): Appliances of the seasonal load profile.
             solar_irradiance_df (DataFrame): Hourly solar irradiance values (kW/m^2).
             peak_hours (list): List of hours considered as peak hours.
 
         Returns:
-            DataFrame: Modified profile with adjusted rated powers.
+            tuple: Profile with the battery discharge channel and the SoC DataFrame.
         """
-        print(f"\nSimulating Battery...")
+        logger.info("Simulating battery...")
+        debug = logger.isEnabledFor(logging.DEBUG)
         discharge_log = []  # List to store discharge details per hour
         soc_log = []  # List to store SoC values per hour
         hourly_powers = self.calculate_hourly_power(profile_df)  # Calculate hourly power consumption
@@ -32,7 +47,8 @@ class Battery:
                 irradiance_row = solar_irradiance_df[solar_irradiance_df['Hour'] == hour]
                 irradiance = irradiance_row.iloc[0]['Irradiation (kW/m^2)']
 
-            print(f"Hour {hour} - Solar irradiance: {irradiance:.2f} kW/m^2, Current SoC: {self.soc:.2f}%")
+            if debug:
+                logger.debug("Hour %d - Solar irradiance: %.2f kW/m^2, Current SoC: %.2f%%", hour, irradiance, self.soc)
             soc_log.append({'Hour': hour, 'State of Charge (%)': self.soc})  # Log the current SoC
             
             if self.soc < 80:   # Charge battery with solar energy if SoC is below 80%
@@ -55,15 +71,283 @@ class Battery:
                 discharge_log.append({'Hour': hour, 'Discharge (kW)': 0, 'State of Charge (%)': self.soc})
 
         discharge_df = pd.DataFrame(discharge_log)  # Combine all discharge information into a single DataFrame
-        print(f"\n{discharge_df}")
         soc_df = pd.DataFrame(soc_log)  # Convert SoC log into a DataFrame
-        print(f"\n{soc_df}")
+        if debug:
+            logger.debug("Discharge log:\n%s", discharge_df)
+            logger.debug("SoC log:\n%s", soc_df)
 
-        updated_df = self.update_profile(profile_df, discharge_df)
+        updated_df = self.update_profile(profile_df, discharge_df['Discharge (kW)'].to_numpy(dtype=float))
 
-        print(f"Battery Simulation Complete.")
+        logger.info("Battery simulation complete.")
         return updated_df, soc_df
 
+    def simulate_year(self, profile_df, hourly_irradiance_df, threshold, peak_hours, solar_power=None):
+        """
+        Simulate the battery over every hourly row of a meteorological series (e.g. a full 8760-hour year),
+        carrying the SoC across days. Applies the same rules as simulate_battery.
+
+        Args:
+            profile_df (ApplianceTable): Daily appliance profile, repeated for every simulated day.
+            hourly_irradiance_df (DataFrame): Hourly rows from MeteorologicalData.hourly_from_csv.
+            threshold (float): The threshold above which the battery discharges in peak hours.
+            peak_hours (list): List of hours considered as peak hours.
+            solar_power (ndarray): Optional PV production per row (kW), e.g. a row of PV.from_csv, used instead of
+                the sun height times the panel area and efficiency.
+
+        Returns:
+            tuple: Arrays of battery discharge (kW) and SoC at the start of each hour (%), one entry per row.
+        """
+        hour_of_day = hourly_irradiance_df['Hour'].to_numpy(dtype=np.int64)
+        irradiance = hourly_irradiance_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+        load = np.asarray(self.calculate_hourly_power(profile_df))[hour_of_day]
+
+        return self.simulate_series(load, irradiance, hour_of_day, threshold, peak_hours, solar_power=solar_power)
+
+    def simulate_series(self, load, irradiance, hour_of_day, threshold, peak_hours, step_hours=1.0, solar_power=None):
+        """
+        Step the battery rules over aligned hourly arrays. State lives in preallocated arrays and local
+        floats, so a full year runs in a few milliseconds.
+
+        Args:
+            load (ndarray): Power consumption per step (kW).
+            irradiance (ndarray): Solar irradiance per step (kW/m^2).
+            hour_of_day (ndarray): Hour of day (0-23) of each step, used for the peak-hour rules.
+            threshold (float): The threshold above which the battery discharges in peak hours.
+            peak_hours (list): List of hours considered as peak hours.
+            step_hours (float): Length of a step in hours, e.g. 0.25 for 15-minute slots. Rates stay in kW,
+                so a step charges or discharges at most rate * step_hours kWh.
+            solar_power (ndarray): Optional PV production per step (kW); when given, irradiance is not used.
+
+        Returns:
+            tuple: Arrays of battery discharge (kW) and SoC at the start of each step (%).
+        """
+        steps = len(load)
+        discharge_log = np.zeros(steps)
+        soc_log = np.empty(steps)
+
+        capacity = self.capacity
+        max_charge = self.charge_rate * capacity
+        max_discharge = self.discharge_rate * capacity
+        is_peak = np.isin(hour_of_day, peak_hours).tolist()
+        load = np.asarray(load, dtype=float).tolist()
+        if solar_power is None:
+            solar_power = np.asarray(irradiance, dtype=float) * self.panel_area * self.panel_efficiency
+        solar_power = np.asarray(solar_power, dtype=float).tolist()
+        soc = self.soc
+
+        def charge(soc, solar_power, in_peak_hours):
+            # Mirrors charge_battery_with_solar followed by update_soc
+            if in_peak_hours and soc < 50:
+                charge_needed = (50 - soc) * capacity / 100.0
+            elif not in_peak_hours and soc < 80:
+                charge_needed = (80 - soc) * capacity / 100.0
+            else:
+                return soc
+            charge = min(solar_power * step_hours, max_charge * step_hours, charge_needed)
+            return max(0, min(100, soc + (charge / capacity) * 100))
+
+        for step in range(steps):
+            peak = is_peak[step]
+            sun = solar_power[step]
+            soc_log[step] = soc
+
+            if soc < 80 and sun > 0 and (not peak or soc < 50):
+                soc = charge(soc, sun, peak)
+
+            if peak:
+                # Mirrors discharge_battery followed by update_soc
+                excess = load[step] - threshold
+                if soc > 30 and excess > 0:
+                    discharge = min(max_discharge, excess, (soc - 30) / 100 * capacity / step_hours)
+                    soc = max(0, min(100, soc + -discharge * step_hours * 100 / capacity))
+                    discharge_log[step] = discharge
+
+                if sun > 0:
+                    soc = charge(soc, sun, True)
+
+        self.soc = soc
+        return discharge_log, soc_log
+
+    @staticmethod
+    def simulate_scenarios(load, irradiance, hour_of_day, thresholds, capacities, charge_rates, discharge_rates, initial_socs, panel_areas, panel_efficiencies, peak_hours,
+                           solar_powers=None):
+        """
+        Step the battery rules for many battery configurations at once. Every configuration is one entry
+        on a NumPy scenario axis, so the time loop runs once regardless of how many scenarios are simulated.
+
+        Args:
+            load (ndarray): Power consumption per step (kW), shared by all scenarios with shape (steps,) or one
+                row per scenario with shape (scenarios, steps), e.g. one seasonal day per scenario.
+            irradiance (ndarray): Solar irradiance per step (kW/m^2), with shape (steps,) or (scenarios, steps).
+            hour_of_day (ndarray): Hour of day (0-23) of each step, used for the peak-hour rules.
+            thresholds, capacities, charge_rates, discharge_rates, initial_socs, panel_areas, panel_efficiencies:
+                Scalars or arrays broadcast to the scenario axis.
+            peak_hours (list): List of hours considered as peak hours.
+            solar_powers (ndarray): Optional PV production (kW) with shape (steps,) or (scenarios, steps), e.g. from
+                PV.from_csv; when given, irradiance, panel_areas and panel_efficiencies are not used.
+
+        Returns:
+            tuple: Arrays of battery discharge (kW) and SoC at the start of each step (%), shape (scenarios, steps).
+        """
+        thresholds, capacities, charge_rates, discharge_rates, soc, panel_areas, panel_efficiencies = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (thresholds, capacities, charge_rates, discharge_rates, initial_socs, panel_areas, panel_efficiencies))
+        )
+        load = np.asarray(load, dtype=float)
+        is_peak = np.isin(hour_of_day, peak_hours)
+
+        steps = load.shape[-1]
+        if solar_powers is None:
+            irradiance = np.asarray(irradiance, dtype=float)
+        else:
+            solar_powers = np.broadcast_to(np.asarray(solar_powers, dtype=float), (len(soc), steps))
+        discharge_log = np.zeros((len(soc), steps))
+        soc_log = np.empty((len(soc), steps))
+        max_charge = charge_rates * capacities
+        max_discharge = discharge_rates * capacities
+        soc = soc.copy()
+
+        def charge(soc, solar_power, in_peak_hours):
+            # Mirrors charge_battery_with_solar followed by update_soc
+            limit = 50 if in_peak_hours else 80
+            charge = np.minimum(np.minimum(solar_power, max_charge), (limit - soc) * capacities / 100.0)
+            return np.where(soc < limit, np.clip(soc + (charge / capacities) * 100, 0, 100), soc)
+
+        for step in range(steps):
+            peak = is_peak[step]
+            if solar_powers is None:
+                solar_power = irradiance[..., step] * panel_areas * panel_efficiencies
+            else:
+                solar_power = solar_powers[:, step]
+            # As in simulate_series, only scenarios with sun charge; negative irradiance must not drain the SoC
+            has_sun = solar_power > 0
+            soc_log[:, step] = soc
+
+            soc = np.where((soc < 80) & has_sun, charge(soc, solar_power, peak), soc)
+
+            if peak:
+                # Mirrors discharge_battery followed by update_soc
+                excess = load[..., step] - thresholds
+                discharging = (soc > 30) & (excess > 0)
+                discharge = np.where(discharging, np.minimum(np.minimum(max_discharge, excess), (soc - 30) / 100 * capacities), 0.0)
+                soc = np.where(discharging, np.clip(soc + -discharge * 100 / capacities, 0, 100), soc)
+                discharge_log[:, step] = discharge
+
+                soc = np.where(has_sun, charge(soc, solar_power, True), soc)
+
+        return discharge_log, soc_log
+
+    def dispatch_battery(self, profile_df, solar_irradiance_df, prices, threshold=None, soc_step=DISPATCH_SOC_STEP, solar_power=None):
+        """
+        Cost-optimal alternative to simulate_battery: plan the whole day with optimal_dispatch instead of the SoC rules.
+
+        Args:
+            profile_df (ApplianceTable): Appliances of the seasonal load profile.
+            solar_irradiance_df (DataFrame): Hourly solar irradiance values (kW/m^2).
+            prices (ndarray): Tariff of every hour of the day ($/kWh).
+            threshold (float): Optional grid load limit, enforced as a penalty on the load above it.
+            soc_step (float): Resolution of the SoC grid (%).
+            solar_power (ndarray): Optional PV production per hour (kW), e.g. from PV.seasonal, used instead of the irradiance.
+
+        Returns:
+            tuple: Profile with the battery discharge channel and SoC DataFrame, as simulate_battery.
+        """
+        logger.info("Dispatching battery...")
+        load = np.asarray(self.calculate_hourly_power(profile_df))
+        irradiance = np.zeros(24)
+        irradiance[solar_irradiance_df['Hour'].to_numpy(dtype=np.int64)] = solar_irradiance_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+
+        discharge, soc = self.optimal_dispatch(load, irradiance, prices, self.capacity, self.charge_rate, self.discharge_rate,
+                                               self.soc, self.panel_area, self.panel_efficiency, threshold, soc_step, solar_power)
+        discharge, soc = discharge[0], soc[0]
+        self.soc = soc[-1]
+
+        discharge_df = pd.DataFrame({'Hour': np.arange(24), 'Discharge (kW)': discharge, 'State of Charge (%)': soc[1:]})
+        soc_df = pd.DataFrame({'Hour': np.arange(24), 'State of Charge (%)': soc[:-1]})
+        updated_df = self.update_profile(profile_df, discharge)
+
+        logger.info("Battery dispatch complete.")
+        return updated_df, soc_df
+
+    @staticmethod
+    def optimal_dispatch(load, irradiance, prices, capacities, charge_rates, discharge_rates, initial_socs, panel_areas,
+                         panel_efficiencies, thresholds=None, soc_step=DISPATCH_SOC_STEP, solar_powers=None):
+        """
+        Find the cost-minimizing battery schedule by dynamic programming over a discretized SoC grid.
+
+        The battery is charged from PV only, within the charge rate and up to MAX_CHARGE_SOC, and discharged into
+        the load, within the discharge rate and down to MIN_DISCHARGE_SOC, as in the dispatch rules. Instead of
+        fixed bands, every hour picks the SoC transition that minimizes the cost of the remaining horizon. With a
+        threshold, every kWh of grid load above it costs OVERLOAD_PENALTY. The backward pass is vectorized over the
+        scenario and both SoC axes, so only the time loop runs in Python.
+
+        Args:
+            load (ndarray): Power consumption per step (kW), shape (steps,) or (scenarios, steps), as in simulate_scenarios.
+            irradiance (ndarray): Solar irradiance per step (kW/m^2), shape (steps,) or (scenarios, steps).
+            prices (ndarray): Tariff per step ($/kWh), shape (steps,) or (scenarios, steps).
+            capacities, charge_rates, discharge_rates, initial_socs, panel_areas, panel_efficiencies:
+                Scalars or arrays broadcast to the scenario axis, as in simulate_scenarios.
+            thresholds: Optional scalar or array of grid load limits (kW).
+            soc_step (float): Resolution of the SoC grid (%); coarser grids solve faster.
+            solar_powers (ndarray): Optional PV production (kW) as in simulate_scenarios, used instead of irradiance.
+
+        Returns:
+            tuple: Arrays of battery discharge (kW) with shape (scenarios, steps) and SoC (%) with shape
+            (scenarios, steps + 1), starting with the initial SoC snapped to the grid.
+        """
+        capacities, charge_rates, discharge_rates, initial_socs, panel_areas, panel_efficiencies, thresholds = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (
+                capacities, charge_rates, discharge_rates, initial_socs, panel_areas, panel_efficiencies,
+                np.inf if thresholds is None else thresholds))
+        )
+        load = np.asarray(load, dtype=float)
+        steps, scenarios = load.shape[-1], len(capacities)
+        prices = np.broadcast_to(np.asarray(prices, dtype=float), (scenarios, steps))
+
+        # SoC grid and the energy moved by every transition (scenario, from, to), in kWh
+        grid = np.arange(0, 100 + soc_step / 2, soc_step)
+        change = (grid[None, :] - grid[:, None])[None, :, :] * capacities[:, None, None] / 100
+        # Charging may not go above MAX_CHARGE_SOC and discharging may not go below MIN_DISCHARGE_SOC
+        allowed = ((change <= 0) | (grid[None, None, :] <= MAX_CHARGE_SOC)) & ((change >= 0) | (grid[None, None, :] >= MIN_DISCHARGE_SOC))
+        discharge_energy = np.maximum(-change, 0)
+
+        max_charge = charge_rates * capacities
+        max_discharge = discharge_rates * capacities
+        if solar_powers is None:
+            solar = np.atleast_2d(np.asarray(irradiance, dtype=float)) * (panel_areas * panel_efficiencies)[:, None]
+        else:
+            solar = np.broadcast_to(np.asarray(solar_powers, dtype=float), (scenarios, steps))
+        # Tolerance for transitions that land exactly on a rate limit
+        tolerance = 1e-9 * np.maximum(capacities, 1)[:, None, None]
+
+        value = np.zeros((scenarios, len(grid)))
+        policy = np.empty((steps, scenarios, len(grid)), dtype=np.int32)
+        for step in range(steps - 1, -1, -1):
+            charge_limit = np.minimum(solar[:, step], max_charge)[:, None, None]
+            step_load = np.asarray(load[..., step])
+            discharge_limit = np.minimum(max_discharge, step_load)[:, None, None]
+            feasible = allowed & (change <= charge_limit + tolerance) & (-change <= discharge_limit + tolerance)
+
+            grid_load = step_load[..., None, None] - discharge_energy
+            cost = prices[:, step, None, None] * grid_load + OVERLOAD_PENALTY * np.maximum(grid_load - thresholds[:, None, None], 0)
+            total = np.where(feasible, cost + value[:, None, :], np.inf)
+
+            policy[step] = np.argmin(total, axis=2)
+            value = np.take_along_axis(total, policy[step][:, :, None], axis=2)[:, :, 0]
+
+        # Follow the policy forward from the initial SoC
+        state = np.abs(grid[None, :] - initial_socs[:, None]).argmin(axis=1)
+        rows = np.arange(scenarios)
+        discharge_log = np.zeros((scenarios, steps))
+        soc_log = np.empty((scenarios, steps + 1))
+        soc_log[:, 0] = grid[state]
+        for step in range(steps):
+            next_state = policy[step, rows, state]
+            discharge_log[:, step] = discharge_energy[rows, state, next_state]
+            state = next_state
+            soc_log[:, step + 1] = grid[state]
+
+        return discharge_log, soc_log
+
     def discharge_battery(self, hourly_power, threshold, hour):
         """
         Attempt to discharge the battery during peak hours to reduce power consumption.
@@ -77,16 +361,16 @@ class Battery:
             dict: A dictionary containing discharge information for the hour.
         """
         if self.soc > 30 and hourly_power > threshold:
-            print(f"Hour {hour} - Discharge conditions met. SoC is {self.soc}% and power needed is {hourly_power} kW (Threshold: {threshold} kW)")
+            logger.debug("Hour %s - Discharge conditions met. SoC is %s%% and power needed is %s kW (Threshold: %s kW)", hour, self.soc, hourly_power, threshold)
             max_safe_discharge = (self.soc - 30) / 100 * self.capacity
             discharge = min(self.discharge_rate * self.capacity, hourly_power - threshold, max_safe_discharge)
-            print(f"Hour {hour} - Calculated discharge: {discharge} kW")
+            logger.debug("Hour %s - Calculated discharge: %s kW", hour, discharge)
 
             self.update_soc(-discharge * 100 / self.capacity)
-            print(f"Hour {hour} - Updated SoC after discharge: {self.soc}%")
+            logger.debug("Hour %s - Updated SoC after discharge: %s%%", hour, self.soc)
             return {'Hour': hour, 'Discharge (kW)': discharge, 'State of Charge (%)': self.soc}
         else:
-            print(f"Hour {hour} - Discharge conditions not met: SoC = {self.soc}%, Power needed = {hourly_power} kW, Threshold = {threshold} kW")
+            logger.debug("Hour %s - Discharge conditions not met: SoC = %s%%, Power needed = %s kW, Threshold = %s kW", hour, self.soc, hourly_power, threshold)
             return {'Hour': hour, 'Discharge (kW)': 0, 'State of Charge (%)': self.soc}
         
     def charge_battery_with_solar(self, irradiance, in_peak_hours=False):
@@ -102,11 +386,11 @@ class Battery:
             if in_peak_hours and self.soc < 50:  # Charge to 50% in peak hours
                 charge_needed = (50 - self.soc) * self.capacity / 100.0
                 charge = min(solar_power_kw, self.charge_rate * self.capacity, charge_needed)
-                print(f"Charging battery with solar energy: {charge:.2f} kW")
+                logger.debug("Charging battery with solar energy: %.2f kW", charge)
             elif not in_peak_hours and self.soc < 80:  # Charge to 80% in non-peak hours
                 charge_needed = (80 - self.soc) * self.capacity / 100.0
                 charge = min(solar_power_kw, self.charge_rate * self.capacity, charge_needed)
-                print(f"Charging battery with solar energy: {charge:.2f} kW")
+                logger.debug("Charging battery with solar energy: %.2f kW", charge)
             else:
                 charge = 0
                 
@@ -127,65 +411,27 @@ class Battery:
         Calculate the total power consumption for each hour.
 
         Args:
-            df (DataFrame): The profile DataFrame containing appliance data.
+            df (ApplianceTable): The profile containing appliance data.
 
         Returns:
-            list: List of power consumption values for each hour.
+            list: List of power consumption values for each hour, net of any battery discharge channel.
         """
-        hourly_power = [0] * 24
-        
-        for _, row in df.iterrows():
-            start_time = int(row['Start'])
-            end_time = int(row['End'])
-            power = row['Rated Power (kW)']
-            
-            if start_time < end_time:
-                for hour in range(start_time, end_time):
-                    hourly_power[hour] += power
-            else:
-                for hour in range(start_time, 24):
-                    hourly_power[hour] += power
-                for hour in range(0, end_time):
-                    hourly_power[hour] += power
-        
-        return hourly_power
+        return df.load().tolist()
 
     @staticmethod
-    def update_profile(profile_df, discharge_df):
+    def update_profile(profile_df, discharge):
         """
-        Updates the load profile by adding separate virtual appliances for battery discharge.
+        Updates the load profile with the battery discharge, kept as the profile's discharge channel.
 
         Parameters:
-        - profile_df: DataFrame containing the load profile of appliances.
-        - discharge_df: DataFrame containing battery discharge data (hour, discharge power, and state of charge).
+        - profile_df: ApplianceTable containing the load profile of appliances.
+        - discharge: Battery discharge per hour (kW).
 
         Returns:
-        - Updated profile DataFrame including separate battery discharge rows for each hour in discharge_df.
-        """
-        print("\nUpdating profile with separate battery appliances...")
-
-        new_rows = []
-        for _, row in discharge_df.iterrows():
-            hour = int(row["Hour"])
-            discharge = row["Discharge (kW)"]
-
-            if discharge > 0:
-                # Add a virtual appliance for this specific hour
-                battery_appliance_name = f"Battery Discharge (Hour {hour})"
-                print(f"  Adding virtual appliance: {battery_appliance_name} with discharge {discharge:.3f} kW")
-
-                new_rows.append({
-                    "Name": battery_appliance_name,
-                    "Rated Power (kW)": -discharge,  # Negative power to represent discharge
-                    "Priority Group": 0,  # Highest priority for processing
-                    "Start": hour,  # Active start hour
-                    "End": hour + 1  # Active for the specific hour
-                })
-
-        # Append new rows to the profile DataFrame
-        if new_rows:
-            profile_df = pd.concat([profile_df, pd.DataFrame(new_rows)], ignore_index=True)
-
-        print("\nUpdated profile with separate battery discharge appliances:")
-        print(profile_df)
-        return profile_df
\ No newline at end of file
+        - ApplianceTable with the same appliances whose load is net of the discharge.
+        """
+        discharge = np.asarray(discharge, dtype=float)
+        if logger.isEnabledFor(logging.DEBUG):
+            for hour in np.flatnonzero(discharge > 0):
+                logger.debug("Hour %d - Battery discharge %.3f kW", hour, discharge[hour])
+        return profile_df.with_discharge(discharge)
@@ -0,0 +1,102 @@
+"""
+This module provides a persistent, content-hashed cache for parsed input files, so repeat runs and worker
+processes skip parsing entirely. MeteorologicalData and PV store parsed meteorological data and PV production
+in it, and ElectricLoad.from_excel stores parsed load profiles.
+
+Classes:
+    FileCache: A class containing static methods for storing and loading parsed arrays.
+Methods:
+    key(file_path): Returns the SHA-256 content hash of a source file.
+    load(key, product): Returns the cached array of a product, or None on a miss.
+    store(key, product, array): Writes the array of a product to the cache.
+    to_records(df) / from_records(array): Convert between DataFrames and cacheable structured arrays.
+    clear(): Removes every cached entry.
+
+Entries are NumPy .npy files of structured arrays, opened memory-mapped. They are named after the content
+hash of the source file, so any change to the file produces a new key and stale entries are never read.
+Hashing reads the whole file, so callers compute the key once and pass it to load and store.
+The cache lives in $SMARTHOME_CACHE_DIR, or ~/.cache/smarthome when the variable is not set.
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .log import get_logger
+
+logger = get_logger('cache')
+
+# Bump whenever the layout of a cached product changes
+CACHE_VERSION = 2
+
+
+class FileCache:
+
+    @staticmethod
+    def directory():
+        """ Returns the cache directory. """
+        return os.environ.get('SMARTHOME_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'smarthome')
+
+    @staticmethod
+    def key(file_path: str):
+        """ Returns the SHA-256 hash of the file contents. """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def path(key: str, product: str):
+        """ Returns the cache file path of a product (e.g. 'seasonal' or 'hourly') of the source file with this key. """
+        return os.path.join(FileCache.directory(), f"{key}.{product}.v{CACHE_VERSION}.npy")
+
+    @staticmethod
+    def load(key: str, product: str):
+        """ Returns the cached structured array of a product memory-mapped, or None if it is not cached. """
+        cache_file_path = FileCache.path(key, product)
+        try:
+            return np.load(cache_file_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def store(key: str, product: str, array):
+        """ Writes the structured array of a product to the cache. Failures only disable caching. """
+        cache_file_path = FileCache.path(key, product)
+        try:
+            os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_file_path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, array)
+                os.replace(temp_path, cache_file_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        except OSError as e:
+            logger.warning("Could not write cache entry %s: %s", cache_file_path, e)
+
+    @staticmethod
+    def to_records(df):
+        """ Converts a DataFrame with numeric or datetime columns into a structured array. """
+        return df.to_records(index=False)
+
+    @staticmethod
+    def from_records(array):
+        """ Converts a structured array back into a DataFrame with the same columns and dtypes. """
+        return pd.DataFrame({name: np.asarray(array[name]) for name in array.dtype.names})
+
+    @staticmethod
+    def clear():
+        """ Removes every cached entry. """
+        directory = FileCache.directory()
+        if not os.path.isdir(directory):
+            return
+        for file_name in os.listdir(directory):
+            if file_name.endswith('.npy'):
+                os.remove(os.path.join(directory, file_name))
@@ -11,7 +11,13 @@ Classes:
 Methods:
     - update_profile(profile_df, battery_discharge_profile): Updates the load profile
     - shift_loads(profile_df, threshold, peak_hours): Shifts loads within peak hours
-    - calculate_energy_cost(profile_df, peak_hours): Calculates the energy cost
+    - default_tariff(peak_hours): Builds the standard peak/mid-peak/off-peak tariff schedule
+    - calculate_energy_cost(profile_df, peak_hours, tariff): Calculates the energy cost
+    - calculate_energy_costs(hourly_loads, peak_hours): Calculates the energy cost of many profiles at once
+    - calculate_slot_costs(slot_loads, peak_hours, slots_per_hour): Calculates the energy cost of sub-hourly profiles
+    - calculate_annual_cost(hourly_load, hour_of_day, peak_hours, tariff, month, weekday): Calculates the energy cost of a full-year series
+    - generate_hourly_profile(profile_df): Aggregates a profile into a 24-hour load DataFrame
+    - generate_adjusted_profile(profile_df, battery_df): Aggregates a profile net of battery discharge
 
 Constants:
     - PEAK_START: The start hour for peak pricing (17:00).
@@ -19,10 +25,31 @@ Constants:
     - OFF_PEAK_TARIFF: The tariff rate for off-peak hours.
     - MID_PEAK_TARIFF: The tariff rate for mid-peak hours (6:00 - 17:00).
     - PEAK_TARIFF: The tariff rate for peak hours (17:00 - 22:00).
+    - OVERLOAD_PENALTY: The cost per kWh above the threshold used by the cost-optimal scheduler and battery dispatch.
 """
 
+import logging
+
+import numpy as np
 import pandas as pd
 
+from .log import get_logger
+from .tariff import Tariff
+
+logger = get_logger('calculations')
+
+PEAK_START = 17
+PEAK_END = 22
+OFF_PEAK_TARIFF = 0.1
+MID_PEAK_TARIFF = 0.2
+PEAK_TARIFF = 0.3
+MID_PEAK_START = 6
+MID_PEAK_END = 17
+# Cost per kWh above the threshold in the cost-optimal scheduler and dispatch; large enough that any overload outweighs the tariff differences
+OVERLOAD_PENALTY = 1000.0
+# Largest drift tolerated between an incrementally updated load and a fresh sum before re-summing
+LOAD_ROUNDING_GUARD = 1e-6
+
 
 class Calculations:
     
@@ -32,144 +59,265 @@ class Calculations:
         Shifts loads to reduce errors in each peak hour, starting with the highest-priority loads
         that are contributing to excess load during each peak hour.
 
+        The summed load of every peak hour is kept up to date as appliances move instead of being
+        recomputed from the whole profile after each shift, and the shift candidates are ranked once
+        up front, so the cost grows roughly linearly with the number of appliances.
+
         Parameters:
-        - profile_df: DataFrame containing the load profile of appliances.
+        - profile_df: ApplianceTable containing the load profile of appliances and the battery discharge channel.
         - threshold: Maximum allowable load in any hour to prevent overloading the grid.
         - peak_hours: List of hours considered as peak hours.
 
         Returns:
-        - Updated profile DataFrame with adjusted load timings.
+        - The profile with adjusted load timings; its 'start' and 'end' arrays are edited in place.
         """
-        print("\nShifting Loads...")
+        logger.info("Shifting loads...")
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-        PEAK_START = 17
-        PEAK_END = 22
+        # Sort appliances by their priority group (highest priority first), keeping profile order within a group
+        sorted_positions = np.argsort(-profile_df.priority, kind='stable')
+        if debug:
+            logger.debug("Appliances by priority:\n%s", profile_df.to_frame().iloc[sorted_positions])
 
-        # Initialize a dictionary to track the summed load for each peak hour
-        peak_hour_loads = {hour: 0 for hour in peak_hours}
-        
-        # Dictionary to track which appliances have been shifted
-        shifted_appliances = {}
+        names = profile_df.name
+        rated_power = profile_df.rated_power
+        start = profile_df.start
+        end = profile_df.end
+
+        # Rank the shift candidates once: highest priority group first, then highest rated power.
+        # Priority 1, zero-power loads and appliances that run all day are never shifted.
+        eligible = ((profile_df.priority != 1)
+                    & (rated_power != 0)
+                    & ~((start == 0) & (end == 24)))
+        candidates = sorted_positions[eligible[sorted_positions]]
+        candidates = candidates[np.argsort(-rated_power[candidates], kind='stable')]
+        candidate_start, candidate_end = start[candidates], end[candidates]
+
+        # Summed load for each peak hour, net of the battery discharge, kept up to date as appliances move
+        hours = np.asarray(peak_hours)
+        battery = np.zeros(len(hours)) if profile_df.discharge is None else -profile_df.discharge[hours]
+        peak_hour_loads = Calculations._summed_loads(hours, start, end, rated_power) + battery
 
-        # Function to calculate the total load for a specific peak hour
-        def calculate_total_load_for_hour(hour, load_profile):
-            total_load = sum(load['Rated Power (kW)'] for load in load_profile if load['Start'] <= hour < load['End'])
-            total_load = round(total_load, 3)
-            print(f"Summed load for hour {hour}: {total_load} kW")
+        def calculate_total_load_for_hour(i):
+            total_load = Calculations._rounded_load(peak_hour_loads, i, hours, start, end, rated_power, battery)
+            logger.debug("Summed load for hour %s: %s kW", hours[i], total_load)
             return total_load
 
-        # Sort appliances by their priority group (highest priority first)
-        sorted_profile = profile_df.sort_values(by="Priority Group", ascending=False)
-        print(sorted_profile)
+        # Dictionary to track which appliances have been shifted
+        shifted_appliances = {}
 
         # Iterate over each peak hour to check the load and shift appliances if necessary
-        for hour in peak_hours:
-            print(f"\nProcessing peak hour: {hour}")
-
-            # Calculate the total load for the current peak hour
-            peak_hour_loads[hour] = calculate_total_load_for_hour(hour, profile_df.to_dict(orient='records'))
+        for i, hour in enumerate(peak_hours):
+            logger.debug("Processing peak hour: %s", hour)
 
             # If the load exceeds the threshold, we need to shift some appliances
-            excess_load = peak_hour_loads[hour] - threshold
+            total_load = calculate_total_load_for_hour(i)
+            excess_load = total_load - threshold
             if excess_load <= 0:
-                print(f"No excess load detected: {excess_load} kW. Skipping appliances...")
+                logger.debug("No excess load detected: %s kW. Skipping appliances...", excess_load)
                 continue  # Skip the shifting for this hour, as the load is within limits
-            else:
-                print(f"Excess load detected: {excess_load} kW. Shifting appliances...")
-
-                # Identify appliances that are contributing to the excess load
-                appliances_to_shift = []
-                for index, row in sorted_profile.iterrows():
-                    name = row["Name"]
-                    start, end = row["Start"], row["End"]
-                    rated_power = row["Rated Power (kW)"]
-                    priority = row["Priority Group"]
-                    
-                    # Skip appliances with priority 1
-                    if priority in [1]: 
-                        continue
-
-                    # Skip zero-power loads, battery discharges, or appliances that run all day
-                    if rated_power == 0 or "Battery Discharge" in name or (start == 0 and end == 24):
-                        continue
-
-                    # Only consider appliances that are running during the current peak hour
-                    if start <= hour < end: 
-                        appliances_to_shift.append((index, name, rated_power))
-
-                # Sort appliances by their contribution to the excess load (highest first)
-                appliances_to_shift = sorted(appliances_to_shift, key=lambda x: x[2], reverse=True)
-
-                # Shift appliances that contribute most to the excess load
-                for index, name, rated_power in appliances_to_shift:
-                    # Skip if this appliance has already been shifted
-                    if name in shifted_appliances:
-                        continue
-
-                    # Calculate new times for shifting the appliance
-                    shift_start = (PEAK_END + 1) % 24  # Move to the next hour after the peak
-                    shift_end = (shift_start + (int(profile_df.at[index, "End"]) - int(profile_df.at[index, "Start"]))) % 24
-
-                    # Update the profile with the new start and end times
-                    print(f"  Shifting appliance '{name}' from ({profile_df.at[index, 'Start']}, {profile_df.at[index, 'End']}) to ({shift_start}, {shift_end})")
-                    profile_df.at[index, "Start"] = shift_start
-                    profile_df.at[index, "End"] = shift_end
-
-                    # Mark this appliance as shifted
-                    shifted_appliances[name] = True
-
-                    # Recalculate peak hour loads after shifting the appliance
-                    peak_hour_loads[hour] = calculate_total_load_for_hour(hour, profile_df.to_dict(orient='records'))
-
-                    # Break if the load is now below threshold after shifting
-                    if peak_hour_loads[hour] <= threshold:
-                        print(f"Load for hour {hour} is now within the threshold: {peak_hour_loads[hour]} kW. Stopping further shifts.")
-                        break
-
-        print(f"\nShifted Load Profile:\n{profile_df}")
-        print("Load shifting completed.")
+            logger.debug("Excess load detected: %s kW. Shifting appliances...", excess_load)
+
+            # Appliances that were running during the current peak hour in the original profile, best candidates first
+            running = (candidate_start <= hour) & (hour < candidate_end)
+            for position in candidates[running]:
+                name = names[position]
+                # Skip if this appliance has already been shifted
+                if name in shifted_appliances:
+                    continue
+
+                # Calculate new times for shifting the appliance
+                shift_start = (PEAK_END + 1) % 24  # Move to the next hour after the peak
+                shift_end = (shift_start + (int(end[position]) - int(start[position]))) % 24
+
+                # Move the appliance's power out of the peak hours it covered and into the ones it covers now
+                power = rated_power[position]
+                peak_hour_loads[(start[position] <= hours) & (hours < end[position])] -= power
+                peak_hour_loads[(shift_start <= hours) & (hours < shift_end)] += power
+
+                # Update the profile with the new start and end times
+                logger.debug("Shifting appliance '%s' from (%s, %s) to (%s, %s)", name, start[position], end[position], shift_start, shift_end)
+                start[position], end[position] = shift_start, shift_end
+
+                # Mark this appliance as shifted
+                shifted_appliances[name] = True
+
+                # Break if the load is now below threshold after shifting
+                total_load = calculate_total_load_for_hour(i)
+                if total_load <= threshold:
+                    logger.debug("Load for hour %s is now within the threshold: %s kW. Stopping further shifts.", hour, total_load)
+                    break
+
+        if debug:
+            logger.debug("Shifted load profile:\n%s", profile_df.to_frame())
+        logger.info("Load shifting completed: %d appliances shifted.", len(shifted_appliances))
         return profile_df
 
     @staticmethod
-    def calculate_energy_cost(hourly_df, peak_hours):
+    def _summed_loads(hours, start, end, rated_power):
+        """Sum the appliances running in each hour (Start <= hour < End) in profile order, as a plain loop would."""
+        if len(rated_power) == 0:
+            return np.zeros(len(hours))
+        running = (start[:, None] <= hours) & (hours < end[:, None])
+        return np.cumsum(np.where(running, rated_power[:, None], 0.0), axis=0)[-1]
+
+    @staticmethod
+    def _rounded_load(peak_hour_loads, i, hours, start, end, rated_power, battery):
+        """
+        Round the running load of one peak hour to 3 decimals. The incrementally updated value can drift
+        from a fresh in-order sum by a few ulps; when that drift could change the rounded result, the
+        load is re-summed from the profile so the outcome matches a full recomputation exactly.
+        """
+        estimate = float(peak_hour_loads[i])
+        rounded = round(estimate, 3)
+        if round(estimate - LOAD_ROUNDING_GUARD, 3) == rounded == round(estimate + LOAD_ROUNDING_GUARD, 3):
+            return rounded
+
+        peak_hour_loads[i] = Calculations._summed_loads(hours[i:i + 1], start, end, rated_power)[0] + battery[i]
+        return round(float(peak_hour_loads[i]), 3)
+
+    @staticmethod
+    def default_tariff(peak_hours):
+        """
+        Build the standard three-band schedule: PEAK_TARIFF in the peak hours, MID_PEAK_TARIFF from
+        MID_PEAK_START to MID_PEAK_END and OFF_PEAK_TARIFF otherwise.
+
+        Parameters:
+        - peak_hours: List of hours considered peak hours.
+
+        Returns:
+        - Tariff schedule.
+        """
+        bands = [(MID_PEAK_START, MID_PEAK_END, MID_PEAK_TARIFF)] + [(hour, hour + 1, PEAK_TARIFF) for hour in peak_hours]
+        return Tariff.time_of_use(bands, OFF_PEAK_TARIFF, name='Standard')
+
+    @staticmethod
+    def calculate_energy_cost(hourly_df, peak_hours, tariff=None, months=None, weekdays=None):
         """
         Calculate the energy cost based on consumption during peak, mid-peak, and off-peak hours.
         
         Parameters:
         - profile_df: DataFrame containing the hourly load profile of appliances.
         - peak_hours: List of hours considered peak hours (e.g., 17:00 to 22:00).
+        - tariff: Tariff schedule; defaults to the standard peak/mid-peak/off-peak bands.
+        - months, weekdays: Days the 24-hour profile stands for, for month- or weekday-dependent tariffs.
         
         Returns:
         - Total energy cost calculated based on consumption during peak, mid-peak, and off-peak hours.
         """
-        print(f"\nCalculating energy cost...")
-
-        OFF_PEAK_TARIFF = 0.1
-        MID_PEAK_TARIFF = 0.2
-        PEAK_TARIFF = 0.3
-
-        # Initialize the total cost
-        total_cost = 0
-
-        # Loop through each hour to calculate the cost based on the tariff
-        for hour in range(24):
-            consumption = hourly_df.loc[hour, "Power (kW)"]
-            if hour in peak_hours:
-                cost = consumption * PEAK_TARIFF
-                print(f"Hour {hour}: Peak rate {PEAK_TARIFF} -> Cost: {round(cost, 2)}")
-                total_cost += cost
-            elif 6 <= hour < 17:
-                cost = consumption * MID_PEAK_TARIFF
-                print(f"Hour {hour}: Mid-peak rate {MID_PEAK_TARIFF} -> Cost: {round(cost, 2)}")
-                total_cost += cost
-            else:
-                cost = consumption * OFF_PEAK_TARIFF
-                print(f"Hour {hour}: Off-peak rate {OFF_PEAK_TARIFF} -> Cost: {round(cost, 2)}")
-                total_cost += cost
+        # Price every hour at once; the running sum keeps the hour-by-hour order of accumulation
+        consumption = hourly_df['Power (kW)'].to_numpy(dtype=float)[:24]
+        tariffs = Calculations.hourly_tariffs(np.arange(24), peak_hours, tariff, months, weekdays)
+        hourly_costs = consumption * tariffs
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for hour in range(24):
+                logger.debug("Hour %s: Rate %s -> Cost: %s", hour, tariffs[hour], round(hourly_costs[hour], 2))
 
         # Round total cost for better readability
-        total_cost = round(total_cost, 2)
-        print(f"\nTotal Energy Cost: {total_cost}")
+        total_cost = round(np.cumsum(hourly_costs)[-1], 2)
+        logger.info("Total energy cost: %s", total_cost)
+        return total_cost
+
+    @staticmethod
+    def calculate_energy_costs(hourly_loads, peak_hours, tariff=None, months=None, weekdays=None):
+        """
+        Calculate the energy cost of many 24-hour load profiles at once. The hourly costs are accumulated
+        in the same order as calculate_energy_cost, so the rounded totals are identical.
+
+        Parameters:
+        - hourly_loads: Array of hourly loads with shape (profiles, 24).
+        - peak_hours: List of hours considered peak hours.
+        - tariff, months, weekdays: Tariff schedule and the days the profiles stand for (see calculate_energy_cost).
+
+        Returns:
+        - Array of total energy costs, one per profile.
+        """
+        hourly_costs = np.asarray(hourly_loads, dtype=float) * Calculations.hourly_tariffs(np.arange(24), peak_hours, tariff, months, weekdays)
+        return np.round(np.cumsum(hourly_costs, axis=-1)[..., -1], 2)
+
+    @staticmethod
+    def calculate_slot_costs(slot_loads, peak_hours, slots_per_hour=1, tariff=None, months=None, weekdays=None):
+        """
+        Calculate the energy cost of daily load profiles at any resolution, e.g. 96 15-minute slots.
+        Every slot is priced at the tariff of its hour and weighted by its length, so at one slot per hour
+        the result equals calculate_energy_costs.
+
+        Parameters:
+        - slot_loads: Array of loads per slot (kW) with shape (24 * slots_per_hour,) or (profiles, 24 * slots_per_hour).
+        - peak_hours: List of hours considered peak hours.
+        - slots_per_hour: Resolution of the profiles.
+        - tariff, months, weekdays: Tariff schedule and the days the profiles stand for (see calculate_energy_cost).
+
+        Returns:
+        - Total energy cost, or an array of costs for several profiles.
+        """
+        slot_loads = np.asarray(slot_loads, dtype=float)
+        prices = Calculations.hourly_tariffs(np.arange(slot_loads.shape[-1]) // slots_per_hour, peak_hours, tariff, months, weekdays)
+        return np.round(np.cumsum(slot_loads * prices / slots_per_hour, axis=-1)[..., -1], 2)
+
+    @staticmethod
+    def hourly_tariffs(hour_of_day, peak_hours, tariff=None, months=None, weekdays=None):
+        """
+        Look up the tariff for every hour of a series.
+
+        Parameters:
+        - hour_of_day: Array of hours of day (0-23), or timestamps, one per simulated hour.
+        - peak_hours: List of hours considered peak hours.
+        - tariff: Tariff schedule; defaults to the standard peak/mid-peak/off-peak bands.
+        - months, weekdays: Days a typical-day series stands for (see Tariff.prices).
 
-        print("Energy cost calculation completed.")
-        return total_cost
\ No newline at end of file
+        Returns:
+        - Array of tariffs, one per simulated hour.
+        """
+        if tariff is None:
+            tariff = Calculations.default_tariff(peak_hours)
+        return tariff.prices(hour_of_day, months, weekdays)
+
+    @staticmethod
+    def calculate_annual_cost(hourly_load, hour_of_day, peak_hours, tariff=None, month=None, weekday=None):
+        """
+        Calculate the energy cost of an hourly load series (e.g. a full 8760-hour year) in one array operation.
+
+        Parameters:
+        - hourly_load: Array of grid consumption per simulated hour (kW).
+        - hour_of_day: Array of hours of day (0-23) aligned with hourly_load, or timestamps for calendar or dynamic tariffs.
+        - peak_hours: List of hours considered peak hours.
+        - tariff: Tariff schedule; defaults to the standard peak/mid-peak/off-peak bands.
+        - month, weekday: Arrays of the month (1-12) and weekday (0 = Monday) of every hour, so month- and
+          weekday-dependent tariffs price every hour at its own day (see Tariff.calendar_prices). Without them,
+          hours of day are priced at the average over all days.
+
+        Returns:
+        - Total energy cost of the series.
+        """
+        if month is None:
+            prices = Calculations.hourly_tariffs(hour_of_day, peak_hours, tariff)
+        else:
+            if tariff is None:
+                tariff = Calculations.default_tariff(peak_hours)
+            prices = tariff.calendar_prices(hour_of_day, month, weekday)
+        total_cost = float(np.dot(np.asarray(hourly_load, dtype=float), prices))
+        return round(total_cost, 2)
+
+    @staticmethod
+    def generate_adjusted_profile(df, battery_df=None):
+        """Generate the adjusted profile, considering battery discharge if provided."""
+        
+        # Generate the hourly profile for the given appliance table
+        hourly_profile = Calculations.generate_hourly_profile(df)
+        
+        # If battery_df is provided, adjust the profile by subtracting its battery discharge channel
+        if battery_df is not None and battery_df.discharge is not None:
+            hourly_profile['Power (kW)'] -= battery_df.discharge
+        
+        return hourly_profile
+
+    @staticmethod
+    def generate_hourly_profile(df):
+        """Generate hourly power profile from appliance usage."""
+        
+        # Aggregate all appliances into a 24-hour load vector in a single pass, net of the battery discharge channel
+        hourly_profile = pd.DataFrame({'Power (kW)': df.load()}, index=np.arange(24))
+        
+        return hourly_profile
@@ -0,0 +1,211 @@
+"""
+This module provides the charts embedded in the Energy Analyzer window. The figures, bars and lines are created
+once; every analysis only updates bar heights, SoC values and the threshold line in place.
+
+Classes:
+    SeasonalCharts: A notebook of four tabs (irradiation, SoC, load profiles and costs), each with a winter and a summer chart.
+Methods:
+    update(winter, summer, winter_meteorological_df, summer_meteorological_df, threshold, peak_hours): Shows new results.
+
+Bars and the threshold line are animated artists: while the axis limits still fit the new values, only those
+artists are redrawn over a cached background (blitting). A full redraw happens only when limits or peak hours change.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from .log import get_logger
+
+logger = get_logger('charts')
+
+FIGURE_SIZE = (9, 6)
+HOURS = np.arange(24)
+PROFILES = ['Original', 'Battery', 'Shifted']
+PROFILE_COLORS = ['blue', 'green', 'red']
+# Headroom above the largest value when the y-axis has to be rescaled
+Y_MARGIN = 1.1
+# Keep the current y-axis while the largest value uses at least this share of it, so small changes can blit
+Y_SHRINK_RATIO = 0.5
+
+
+class _Panel:
+    """ One notebook tab: a figure with a winter and a summer axis and the artists that change between runs. """
+
+    def __init__(self, notebook, title):
+        self.figure = Figure(figsize=FIGURE_SIZE)
+        self.axes = self.figure.subplots(2, 1)
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=title)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.animated = []
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def animate(self, artists):
+        for artist in artists:
+            artist.set_animated(True)
+        self.animated.extend(artists)
+        return artists
+
+    def _on_draw(self, event):
+        # A full draw leaves out the animated artists; keep that as the background and draw them on top
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self.animated:
+            self.figure.draw_artist(artist)
+
+    def set_ylim(self, ax, low, high):
+        """ Rescale the y-axis if the values no longer fit. Returns True when a full redraw is needed. """
+        bottom, top = ax.get_ylim()
+        high, low = max(high, 0), min(low, 0)
+        if low >= bottom and high <= top and high >= top / Y_MARGIN * Y_SHRINK_RATIO and (low < 0) == (bottom < 0):
+            return False
+        ax.set_ylim(low * Y_MARGIN, (high or 1) * Y_MARGIN)
+        return True
+
+    def refresh(self, full):
+        if full or self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+
+class SeasonalCharts:
+    def __init__(self, parent):
+        self.notebook = ttk.Notebook(parent)
+        self.peak_hours = None
+        self.peak_spans = []
+
+        self.irradiation = _Panel(self.notebook, "Irradiation")
+        self.irradiation_bars = [
+            self.irradiation.animate(ax.bar(HOURS, np.zeros(24), 0.50, label='Solar Irradiation', color='yellow', alpha=0.7).patches)
+            for ax in self.irradiation.axes
+        ]
+        self._decorate(self.irradiation.axes, 'Meteorological Data', 'Irradiation (kW/m^2)')
+
+        self.soc = _Panel(self.notebook, "State of Charge")
+        self.soc_bars = [
+            self.soc.animate(ax.bar(HOURS, np.zeros(24), 0.50, label='Battery SoC', color='orange', alpha=0.7).patches)
+            for ax in self.soc.axes
+        ]
+        self._decorate(self.soc.axes, 'SoC', 'State of Charge (%)')
+
+        width = 0.3
+        self.load = _Panel(self.notebook, "Load Profiles")
+        self.load_bars = []
+        self.threshold_lines = []
+        for ax in self.load.axes:
+            self.load_bars.append([
+                self.load.animate(ax.bar(HOURS + offset * width, np.zeros(24), width, label=f'{profile} Profile', color=color, alpha=0.7).patches)
+                for offset, profile, color in zip((-1, 0, 1), PROFILES, PROFILE_COLORS)
+            ])
+            self.threshold_lines.append(self.load.animate(ax.plot([-0.5, 23.5], [0, 0], color='black', linestyle='--', linewidth=1.5, label='Threshold'))[0])
+        self._decorate(self.load.axes, 'Load Profiles', 'Power (kW)')
+
+        self.cost = _Panel(self.notebook, "Costs")
+        self.cost_bars = []
+        x = 3
+        positions = [x - width, x, x + width]
+        for ax, season in zip(self.cost.axes, ('Winter', 'Summer')):
+            self.cost_bars.append([
+                self.cost.animate(ax.bar(position, 0, width, label=f'{profile} Profile', color=color, alpha=0.7).patches)[0]
+                for position, profile, color in zip(positions, PROFILES, PROFILE_COLORS)
+            ])
+            ax.set_title(f'{season} Cost Calculations')
+            ax.set_ylabel('Cost ($)')
+            ax.set_xticks(positions)
+            ax.set_xticklabels([f'{profile}\nProfile' for profile in PROFILES])
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+        self.cost.figure.tight_layout()
+
+    @staticmethod
+    def _decorate(axes, title, ylabel):
+        for ax, season in zip(axes, ('Winter', 'Summer')):
+            ax.set_title(f'{season} {title}')
+            ax.set_xlabel('Hour of Day')
+            ax.set_ylabel(ylabel)
+            ax.set_xticks(HOURS)
+            ax.set_xticklabels([str(i) for i in range(24)])
+            ax.set_xlim(-0.5, 23.5)
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+        axes[0].figure.tight_layout()
+
+    @staticmethod
+    def _set_heights(bars, values):
+        for bar, value in zip(bars, values):
+            bar.set_height(value)
+
+    @staticmethod
+    def _hourly(meteorological_df):
+        # Hours missing from the seasonal averages have no irradiation
+        irradiation = np.zeros(24)
+        irradiation[meteorological_df['Hour'].to_numpy(dtype=np.int64)] = meteorological_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+        return irradiation
+
+    def update(self, winter, summer, winter_meteorological_df, summer_meteorological_df, threshold, peak_hours):
+        """
+        Show the results of an analysis.
+
+        Parameters:
+        - winter, summer: Result dictionaries of Pipeline.analyze_season.
+        - winter_meteorological_df, summer_meteorological_df: Seasonal hourly average irradiation.
+        - threshold: Maximum allowable load in any hour.
+        - peak_hours: List of hours considered peak hours.
+        """
+        seasons = (winter, summer)
+
+        full = False
+        for ax, bars, meteorological_df in zip(self.irradiation.axes, self.irradiation_bars, (winter_meteorological_df, summer_meteorological_df)):
+            irradiation = self._hourly(meteorological_df)
+            self._set_heights(bars, irradiation)
+            full |= self.irradiation.set_ylim(ax, irradiation.min(), irradiation.max())
+        self.irradiation.refresh(full)
+
+        full = False
+        for ax, bars, result in zip(self.soc.axes, self.soc_bars, seasons):
+            soc = result['soc']['State of Charge (%)'].to_numpy(dtype=float)
+            self._set_heights(bars, soc)
+            full |= self.soc.set_ylim(ax, soc.min(), soc.max())
+        self.soc.refresh(full)
+
+        full = self._set_peak_hours(peak_hours)
+        for ax, profile_bars, line, result in zip(self.load.axes, self.load_bars, self.threshold_lines, seasons):
+            loads = [result[f'{profile.lower()}_hourly']['Power (kW)'].to_numpy(dtype=float) for profile in PROFILES]
+            for bars, load in zip(profile_bars, loads):
+                self._set_heights(bars, load)
+            line.set_ydata([threshold, threshold])
+            full |= self.load.set_ylim(ax, min(load.min() for load in loads), max(max(load.max() for load in loads), threshold))
+        self.load.refresh(full)
+
+        full = False
+        for ax, bars, result in zip(self.cost.axes, self.cost_bars, seasons):
+            costs = [result[f'{profile.lower()}_cost'] for profile in PROFILES]
+            self._set_heights(bars, costs)
+            full |= self.cost.set_ylim(ax, min(costs), max(costs))
+        self.cost.refresh(full)
+
+        logger.debug("Charts updated (threshold %s)", threshold)
+
+    def _set_peak_hours(self, peak_hours):
+        """ Move the peak hour spans when the peak hours change. Returns True when a full redraw is needed. """
+        if self.peak_hours == list(peak_hours):
+            return False
+        for peak_span in self.peak_spans:
+            peak_span.remove()
+        self.peak_spans = [ax.axvspan(min(peak_hours) - 0.5, max(peak_hours) + 0.5, color='yellow', alpha=0.2, label='Peak Hours')
+                           for ax in self.load.axes]
+        self.peak_hours = list(peak_hours)
+        for ax in self.load.axes:
+            ax.legend()
+        return True
@@ -0,0 +1,248 @@
+"""
+This module provides the headless command line interface: it runs the seasonal analysis of one home (winter and summer by default)
+from arguments and writes the results as JSON or CSV, without tkinter or matplotlib.
+
+Functions:
+    analyze(load_profile_file_path, meteorological_file_path, threshold, peak_hours, ...): Runs both seasons and returns a JSON-ready report.
+    analyze_year(load_profile_file_path, meteorological_file_path, threshold, peak_hours, ...): Runs every hour of the year and returns a JSON-ready report.
+    main(argv): Command line entry point.
+
+Usage, from the repository root (or `python -m modules.cli` from the smarthome directory):
+    python -m smarthome data/load_profile_data/load_profile_v3.xlsx data/meteorological_data/meteorological_data.csv --threshold 4
+    python -m smarthome profile.xlsx met.csv --format csv --hourly --output hourly.csv
+    python -m smarthome profile.xlsx met.csv --seasons monthly
+    python -m smarthome profile.xlsx met.csv --year --format csv
+    python -m smarthome profile.xlsx met.csv --pv-model irradiance
+
+Output formats:
+    - json: Costs, battery size, hourly profiles and SoC of every season.
+    - csv: One row of costs per season, or with --hourly one row per season and hour.
+
+Seasons (--seasons, see seasons.py): 'winter-summer' (default), 'monthly' or 'day-types' (weekdays and weekend
+of winter and summer). All seasons are analyzed in one batch (Pipeline.analyze_seasons).
+
+Year mode (--year) runs the battery over every hourly row of the meteorological file with the load profile of
+each month (Pipeline.analyze_year), carrying the SoC across days and pricing every hour at its own month and
+weekday. It reports the original and battery costs of the year; loads are not shifted.
+
+PV model (--pv-model, see pv.py): by default the battery charges from the sun height of the file times the panel
+area and efficiency. 'irradiance' models the panels from the plane-of-array irradiance G(i) and the air temperature
+T2m, and 'pvgis' scales the PVGIS power column P; both need a PVGIS file with those columns.
+
+Schedulers start many short runs, so start-up time matters. This module imports only the standard library
+at import time; NumPy, pandas and the pipeline are imported after the arguments are parsed, so --help and
+argument errors return immediately, and parsed input files are cached (see cache.py), so repeat runs skip
+openpyxl and CSV parsing. Measured cold start (benchmarks/run.py, 'cli' entries): about 50 ms for --help and
+about 0.55 s for a full run on a small profile, of which about 0.4 s is importing NumPy and pandas.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+from .log import LOG_LEVELS, configure, get_logger
+from .seasons import SEASON_SETS
+
+logger = get_logger('cli')
+
+FORMATS = ('json', 'csv')
+# The methods and PV models of pipeline.py, repeated here because the pipeline is imported only after the arguments are parsed
+SHIFT_METHODS = ('greedy', 'optimal')
+DISPATCH_METHODS = ('rules', 'optimal')
+PV_MODELS = ('irradiance', 'pvgis')
+PROFILES = ('original', 'battery', 'shifted')
+SUMMARY_COLUMNS = ['Season', 'Max Load (kW)', 'Capacity (kWh)', 'Cost (Original)', 'Cost (Battery)', 'Cost (Shifted)']
+HOURLY_COLUMNS = ['Season', 'Hour', 'Original (kW)', 'Battery (kW)', 'Shifted (kW)', 'State of Charge (%)']
+YEAR_COLUMNS = ['Max Load (kW)', 'Capacity (kWh)', 'Cost (Original)', 'Cost (Battery)', 'Discharged (kWh)']
+YEAR_HOURLY_COLUMNS = ['Time', 'Original (kW)', 'Battery (kW)', 'State of Charge (%)']
+
+
+def analyze(load_profile_file_path, meteorological_file_path, threshold, peak_hours=None, shift_method='greedy',
+            dispatch='rules', use_cache=True, seasons='winter-summer', pv_model=None):
+    """
+    Run the seasonal analysis of one home, winter and summer by default.
+
+    Args:
+        load_profile_file_path (str): Load profile Excel file.
+        meteorological_file_path (str): PVGIS CSV file.
+        threshold (float): Maximum allowable load in any hour.
+        peak_hours (list): Hours considered peak hours; defaults to PEAK_START - PEAK_END.
+        shift_method (str): One of Pipeline's SHIFT_METHODS.
+        dispatch (str): One of Pipeline's DISPATCH_METHODS.
+        use_cache (bool): Whether parsed input files may be read from and written to the cache.
+        seasons (str): Name of a season set in SEASON_SETS.
+        pv_model (str): One of Pipeline's PV_MODELS for the solar production, or None to charge from the sun height.
+
+    Returns:
+        dict: The inputs, the season names under 'seasons' and, per season, the battery size, costs, hourly
+        profiles and SoC, as plain Python types.
+    """
+    # Deferred so that importing this module and parsing arguments never pay for NumPy and pandas
+    from .calculations import PEAK_START, PEAK_END
+    from .pipeline import Pipeline
+
+    if seasons not in SEASON_SETS:
+        raise ValueError(f"Unknown season set {seasons!r}; expected one of {list(SEASON_SETS)}")
+    season_set = SEASON_SETS[seasons]
+    if peak_hours is None:
+        peak_hours = list(range(PEAK_START, PEAK_END + 1))
+    profiles, meteorology = Pipeline.load_seasons(load_profile_file_path, meteorological_file_path, season_set, use_cache=use_cache)
+    solar_powers = Pipeline.solar_powers(meteorological_file_path, season_set, pv_model, use_cache=use_cache)
+
+    report = {
+        'load_profile': load_profile_file_path,
+        'meteorological_data': meteorological_file_path,
+        'threshold': threshold,
+        'peak_hours': list(peak_hours),
+        'shift_method': shift_method,
+        'dispatch': dispatch,
+        'pv_model': pv_model,
+        'seasons': [season.name for season in season_set],
+    }
+    results = Pipeline.analyze_seasons(profiles, meteorology, threshold, peak_hours, season_set, shift_method=shift_method, dispatch=dispatch,
+                                       solar_powers=solar_powers)
+    for season, result in zip(season_set, results):
+        report[season.name] = {
+            'max_load': float(result['max_load']),
+            'capacity': float(result['capacity']),
+            **{f'{profile}_cost': float(result[f'{profile}_cost']) for profile in PROFILES},
+            'hourly': {profile: result[f'{profile}_hourly']['Power (kW)'].tolist() for profile in PROFILES},
+            'soc': result['soc']['State of Charge (%)'].tolist(),
+        }
+    return report
+
+
+def analyze_year(load_profile_file_path, meteorological_file_path, threshold, peak_hours=None, use_cache=True, pv_model=None):
+    """
+    Run the battery of one home over every hourly row of the meteorological file.
+
+    Args:
+        load_profile_file_path (str): Load profile Excel file; its winter and summer hours apply in the months of MONTHLY_PROFILES.
+        meteorological_file_path (str): PVGIS CSV file.
+        threshold (float): The threshold above which the battery discharges in peak hours.
+        peak_hours (list): Hours considered peak hours; defaults to PEAK_START - PEAK_END.
+        use_cache (bool): Whether parsed input files may be read from and written to the cache.
+        pv_model (str): One of Pipeline's PV_MODELS for the solar production, or None to charge from the sun height.
+
+    Returns:
+        dict: The inputs and, under 'year', the battery size, costs, energy discharged, hourly loads and SoC, as plain Python types.
+    """
+    from .calculations import PEAK_START, PEAK_END
+    from .load_profile import PROFILES, ElectricLoad
+    from .met_data import MeteorologicalData
+    from .pipeline import Pipeline
+    from .pv import PV
+
+    if peak_hours is None:
+        peak_hours = list(range(PEAK_START, PEAK_END + 1))
+    tables = dict(zip(PROFILES, ElectricLoad.from_excel(load_profile_file_path, use_cache=use_cache)))
+    solar_power = None
+    if pv_model is None:
+        hourly_df = MeteorologicalData.hourly_from_csv(meteorological_file_path, use_cache=use_cache)
+    else:
+        hourly_df, production = PV.from_csv(meteorological_file_path, model=pv_model, use_cache=use_cache)
+        solar_power = production[0]
+    result = Pipeline.analyze_year(tables, hourly_df, threshold, peak_hours, solar_power=solar_power)
+    return {
+        'load_profile': load_profile_file_path,
+        'meteorological_data': meteorological_file_path,
+        'threshold': threshold,
+        'peak_hours': list(peak_hours),
+        'pv_model': pv_model,
+        'year': {
+            'max_load': float(result['max_load']),
+            'capacity': float(result['capacity']),
+            'original_cost': float(result['original_cost']),
+            'battery_cost': float(result['battery_cost']),
+            'discharged': float(result['discharge'].sum()),
+            'time': [time.isoformat() for time in result['time']],
+            'hourly': {'original': result['original_load'].tolist(), 'battery': result['battery_load'].tolist()},
+            'soc': result['soc'].tolist(),
+        },
+    }
+
+
+def _peak_hours(text):
+    """ Parses '17-22' (inclusive) or '7,8,17-22' into a list of hours. """
+    hours = []
+    for part in text.split(','):
+        start, _, end = part.partition('-')
+        try:
+            hours.extend(range(int(start), int(end or start) + 1))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid peak hours: {text!r}") from None
+    if not hours or not all(0 <= hour < 24 for hour in hours):
+        raise argparse.ArgumentTypeError(f"peak hours must be between 0 and 23: {text!r}")
+    return sorted(set(hours))
+
+
+def _write_csv(report, output_file, hourly):
+    writer = csv.writer(output_file, lineterminator='\n')
+    if 'year' in report:
+        result = report['year']
+        if hourly:
+            writer.writerow(YEAR_HOURLY_COLUMNS)
+            writer.writerows(zip(result['time'], result['hourly']['original'], result['hourly']['battery'], result['soc']))
+        else:
+            writer.writerow(YEAR_COLUMNS)
+            writer.writerow([result['max_load'], result['capacity'], result['original_cost'], result['battery_cost'], result['discharged']])
+        return
+    if hourly:
+        writer.writerow(HOURLY_COLUMNS)
+        for season in report['seasons']:
+            result = report[season]
+            for hour, row in enumerate(zip(*(result['hourly'][profile] for profile in PROFILES), result['soc'])):
+                writer.writerow([season.capitalize(), hour, *row])
+        return
+    writer.writerow(SUMMARY_COLUMNS)
+    for season in report['seasons']:
+        result = report[season]
+        writer.writerow([season.capitalize(), result['max_load'], result['capacity'], *(result[f'{profile}_cost'] for profile in PROFILES)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='smarthome', description="Run the seasonal analysis of one home without the GUI.")
+    parser.add_argument('load_profile', help="Load profile Excel file.")
+    parser.add_argument('meteorological_data', help="PVGIS meteorological CSV file.")
+    parser.add_argument('--threshold', type=float, default=3.0, help="Maximum allowable load in any hour (default: 3.0).")
+    parser.add_argument('--peak-hours', type=_peak_hours, default=None, help="Peak hours, e.g. 17-22 or 7,17-22 (default: 17-22).")
+    parser.add_argument('--shift-method', choices=SHIFT_METHODS, default='greedy', help="Load shifting (default: greedy).")
+    parser.add_argument('--dispatch', choices=DISPATCH_METHODS, default='rules', help="Battery dispatch (default: rules).")
+    parser.add_argument('--seasons', choices=list(SEASON_SETS), default='winter-summer', help="Seasons to analyze (default: winter-summer).")
+    parser.add_argument('--pv-model', choices=PV_MODELS, default=None, help="Model the PV production from G(i) and T2m ('irradiance') or P ('pvgis') (default: sun height).")
+    parser.add_argument('--year', action='store_true', help="Run the battery over every hour of the meteorological file instead of typical seasonal days.")
+    parser.add_argument('--format', choices=FORMATS, default='json', help="Output format (default: json).")
+    parser.add_argument('--hourly', action='store_true', help="CSV only: write one row per season and hour (per hour of the year with --year) instead of the costs.")
+    parser.add_argument('--output', help="Output file (default: standard output).")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the input files instead of using the cache.")
+    parser.add_argument('--log-level', type=str.upper, choices=LOG_LEVELS, default='WARNING', help="Logging level (default: WARNING).")
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+
+    try:
+        if args.year:
+            report = analyze_year(args.load_profile, args.meteorological_data, args.threshold, args.peak_hours, use_cache=not args.no_cache,
+                                  pv_model=args.pv_model)
+        else:
+            report = analyze(args.load_profile, args.meteorological_data, args.threshold, args.peak_hours,
+                             args.shift_method, args.dispatch, use_cache=not args.no_cache, seasons=args.seasons, pv_model=args.pv_model)
+    except (OSError, ValueError) as e:
+        logger.error("%s", e)
+        return 1
+
+    output_file = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            _write_csv(report, output_file, args.hourly)
+        else:
+            json.dump(report, output_file, indent=2)
+            output_file.write('\n')
+    finally:
+        if args.output:
+            output_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""
+This module runs the battery rules online: instead of simulating a whole day from a load profile, a controller
+takes one meter and PV reading at a time from an asyncio source and returns the charge/discharge decision.
+
+Classes:
+    BatteryController: Applies the SoC rules of Battery.simulate_battery to one reading at a time.
+    SimulatedMeter: Async source of readings replayed from a load profile and meteorological data, for testing.
+Methods:
+    step(hour, load, solar_power): Decides one tick and updates the battery's SoC.
+    run(readings, latency_budget): Async generator of decisions, one per reading of an async iterable.
+
+Usage, from the smarthome directory (replays a simulated meter and prints one CSV row per tick):
+    python -m modules.controller data/load_profile_data/load_profile_v3.xlsx data/meteorological_data/meteorological_data.csv --threshold 3 --days 2
+
+Readings are dictionaries with 'Hour' (hour of day, 0-23), 'Power (kW)' (household load) and 'Solar Power (kW)'
+(PV output). A step only does a fixed number of float operations on the controller's state, so every tick costs
+the same no matter how long the controller has been running. Replaying a day through the controller gives the
+same discharge and SoC as Battery.simulate_battery; decisions carry the SoC after their tick, which the simulation
+logs at the start of the next hour.
+"""
+
+import argparse
+import asyncio
+import csv
+import sys
+import time
+
+from .log import LOG_LEVELS, configure, get_logger
+
+logger = get_logger('controller')
+
+# Longest a decision may take before it is reported as an overrun (s)
+LATENCY_BUDGET = 0.001
+DECISION_COLUMNS = ['Hour', 'Power (kW)', 'Solar Power (kW)', 'Charge (kW)', 'Discharge (kW)', 'Grid (kW)', 'State of Charge (%)']
+
+
+class BatteryController:
+    def __init__(self, battery, threshold: float, peak_hours, step_hours: float = 1.0):
+        """
+        Args:
+            battery (Battery): The battery to control; its soc is read and updated on every step.
+            threshold (float): The threshold above which the battery discharges in peak hours.
+            peak_hours (list): List of hours considered as peak hours.
+            step_hours (float): Length of a tick in hours, e.g. 1/60 for a meter read every minute. Rates stay
+                in kW, so a tick charges or discharges at most rate * step_hours kWh.
+        """
+        self.battery = battery
+        self.threshold = threshold
+        self.peak_hours = frozenset(peak_hours)  # Constant-time lookup per tick
+        self.step_hours = step_hours
+        self.max_charge = battery.charge_rate * battery.capacity  # kW
+        self.max_discharge = battery.discharge_rate * battery.capacity  # kW
+        self.overruns = 0  # Ticks whose decision took longer than the latency budget
+
+    def step(self, hour: int, load: float, solar_power: float):
+        """
+        Decide one tick with the rules of charge_battery_with_solar and discharge_battery: charge from PV up to
+        80% (50% in peak hours), discharge the load above the threshold in peak hours down to 30%, then top up
+        from PV to 50% in peak hours.
+
+        Args:
+            hour (int): Hour of day of the reading (0-23).
+            load (float): Household load (kW).
+            solar_power (float): PV output (kW).
+
+        Returns:
+            dict: The reading, the mean charge and discharge power over the tick (kW), the resulting grid load (kW)
+            and the SoC after the tick (%).
+        """
+        battery = self.battery
+        capacity = battery.capacity
+        step_hours = self.step_hours
+        soc = battery.soc
+        peak = hour in self.peak_hours
+        charged = 0.0
+        discharge = 0.0
+
+        if soc < 80 and solar_power > 0 and (not peak or soc < 50):
+            soc, energy = self._charge(soc, solar_power, peak)
+            charged += energy
+
+        if peak:
+            excess = load - self.threshold
+            if soc > 30 and excess > 0:
+                discharge = min(self.max_discharge, excess, (soc - 30) / 100 * capacity / step_hours)
+                soc = max(0, min(100, soc + -discharge * step_hours * 100 / capacity))
+
+            if solar_power > 0:
+                soc, energy = self._charge(soc, solar_power, True)
+                charged += energy
+
+        battery.soc = soc
+        return {
+            'Hour': hour,
+            'Power (kW)': load,
+            'Solar Power (kW)': solar_power,
+            'Charge (kW)': charged / step_hours,
+            'Discharge (kW)': discharge,
+            'Grid (kW)': load - discharge,
+            'State of Charge (%)': soc,
+        }
+
+    def _charge(self, soc, solar_power, in_peak_hours):
+        """ Returns the SoC after charging from PV and the energy charged (kWh), as charge_battery_with_solar. """
+        limit = 50 if in_peak_hours else 80
+        if soc >= limit:
+            return soc, 0.0
+        capacity = self.battery.capacity
+        charge = min(solar_power * self.step_hours, self.max_charge * self.step_hours, (limit - soc) * capacity / 100.0)
+        return max(0, min(100, soc + (charge / capacity) * 100)), charge
+
+    async def run(self, readings, latency_budget: float = LATENCY_BUDGET):
+        """
+        Decide every reading of an async source as it arrives.
+
+        Args:
+            readings: Async iterable of reading dictionaries, e.g. a SimulatedMeter or a live meter client.
+            latency_budget (float): Seconds a decision may take; slower ticks are counted in overruns and logged.
+
+        Yields:
+            dict: The decision of every reading, as returned by step.
+        """
+        async for reading in readings:
+            started = time.perf_counter()
+            decision = self.step(reading['Hour'], reading['Power (kW)'], reading['Solar Power (kW)'])
+            elapsed = time.perf_counter() - started
+            if elapsed > latency_budget:
+                self.overruns += 1
+                logger.warning("Hour %s - Decision took %.3f ms, over the %.3f ms budget", reading['Hour'], elapsed * 1000, latency_budget * 1000)
+            yield decision
+
+
+class SimulatedMeter:
+    def __init__(self, profile_df, meteorological_df, panel_area: float, panel_efficiency: float, days: int = 1,
+                 slots_per_hour: int = 1, interval: float = 0.0):
+        """
+        Args:
+            profile_df (ApplianceTable): Daily appliance profile, replayed every day.
+            meteorological_df (DataFrame): Hourly average irradiation (kW/m^2), as from MeteorologicalData.from_csv.
+            panel_area, panel_efficiency: PV panel area (m^2) and efficiency (decimal).
+            days (int): Number of days to replay.
+            slots_per_hour (int): Readings per hour, e.g. 60 for a meter read every minute.
+            interval (float): Seconds to wait between readings; 0 replays as fast as the consumer reads.
+        """
+        self.load = profile_df.load(slots_per_hour).tolist()
+        irradiance = [0.0] * 24
+        for hour, value in zip(meteorological_df['Hour'].astype(int), meteorological_df['Irradiation (kW/m^2)']):
+            irradiance[hour] = value
+        self.solar_power = [value * panel_area * panel_efficiency for value in irradiance]
+        self.days = days
+        self.slots_per_hour = slots_per_hour
+        self.interval = interval
+
+    async def __aiter__(self):
+        for _ in range(self.days):
+            for slot, load in enumerate(self.load):
+                hour = slot // self.slots_per_hour
+                yield {'Hour': hour, 'Power (kW)': load, 'Solar Power (kW)': self.solar_power[hour]}
+                await asyncio.sleep(self.interval)
+
+
+async def _replay(controller, meter, writer):
+    async for decision in controller.run(meter):
+        writer.writerow([decision[column] for column in DECISION_COLUMNS])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a load profile through the online battery controller.")
+    parser.add_argument('load_profile', help="Load profile Excel file.")
+    parser.add_argument('meteorological_data', help="PVGIS meteorological CSV file.")
+    parser.add_argument('--season', choices=['winter', 'summer'], default='winter', help="Season to replay (default: winter).")
+    parser.add_argument('--threshold', type=float, default=3.0, help="Load above which the battery discharges in peak hours (default: 3.0).")
+    parser.add_argument('--days', type=int, default=1, help="Days to replay (default: 1).")
+    parser.add_argument('--slots-per-hour', type=int, default=1, help="Meter readings per hour (default: 1).")
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds between readings (default: 0).")
+    parser.add_argument('--log-level', type=str.upper, choices=LOG_LEVELS, default='WARNING', help="Logging level (default: WARNING).")
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+
+    from .battery import Battery
+    from .calculations import PEAK_START, PEAK_END
+    from .load_profile import ElectricLoad
+    from .met_data import MeteorologicalData
+    from .pipeline import CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY, Pipeline
+
+    index = 0 if args.season == 'winter' else 1
+    profile_df = ElectricLoad.from_excel(args.load_profile)[index]
+    meteorological_df = MeteorologicalData.from_csv(args.meteorological_data)[index]
+    _, capacity = Pipeline.size_battery(profile_df)
+    battery = Battery(capacity, CHARGE_RATE, DISCHARGE_RATE, capacity * INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY)
+    controller = BatteryController(battery, args.threshold, range(PEAK_START, PEAK_END + 1), 1 / args.slots_per_hour)
+    meter = SimulatedMeter(profile_df, meteorological_df, PANEL_AREA, PANEL_EFFICIENCY, args.days, args.slots_per_hour, args.interval)
+
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    writer.writerow(DECISION_COLUMNS)
+    asyncio.run(_replay(controller, meter, writer))
+    if controller.overruns:
+        logger.warning("%d decisions exceeded the latency budget", controller.overruns)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
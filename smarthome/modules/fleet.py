@@ -0,0 +1,228 @@
+"""
+This module runs the winter/summer analysis headlessly for whole portfolios of homes across a process pool
+and writes one consolidated result table.
+
+Classes:
+    Fleet: A class containing static methods for collecting homes and running them in parallel.
+Methods:
+    from_directory(load_profile_dir, meteorological_file_path): Builds a home list from every .xlsx file in a directory.
+    from_manifest(manifest_file_path): Builds a home list from a CSV manifest.
+    run(homes, threshold, output_file_path, workers): Analyzes every home and streams the results to a CSV file.
+
+Manifest columns:
+    - Home: Identifier written to the result table.
+    - Load Profile: Path of the load profile Excel file (relative paths are resolved against the manifest).
+    - Meteorological Data: Path of the PVGIS CSV file (relative paths are resolved against the manifest).
+    - Threshold (optional): Per-home threshold overriding the one passed to run().
+
+Results of every home are kept in the result store (see result_store.py), keyed by the content of its files and its
+threshold, so rerunning a portfolio where only a few load profiles changed only analyzes those homes.
+
+Usage:
+    python -m modules.fleet --profiles data/load_profile_data --met data/meteorological_data/meteorological_data.csv --output results.csv
+"""
+
+import argparse
+import csv
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+import pandas as pd
+
+from .calculations import PEAK_START, PEAK_END
+from .log import LOG_LEVELS, configure, get_logger, span
+from .met_data import MeteorologicalData
+from .pipeline import Pipeline
+from .result_store import ResultStore
+from .seasons import DEFAULT_SEASONS
+
+logger = get_logger('fleet')
+
+# Parsed meteorological files kept per worker; homes usually share a handful of sites
+MET_CACHE_SIZE = 8
+# Homes a worker processes before it is replaced, which releases any memory it accumulated
+TASKS_PER_WORKER = 200
+# Futures kept in flight per worker, so the pending queue never holds the whole portfolio
+IN_FLIGHT_PER_WORKER = 4
+
+RESULT_COLUMNS = [
+    'Home', 'Load Profile', 'Meteorological Data', 'Threshold',
+    'Winter Max Load (kW)', 'Winter Capacity (kWh)', 'Winter Cost (Original)', 'Winter Cost (Battery)', 'Winter Cost (Shifted)',
+    'Summer Max Load (kW)', 'Summer Capacity (kWh)', 'Summer Cost (Original)', 'Summer Cost (Battery)', 'Summer Cost (Shifted)',
+    'Error',
+]
+
+
+@lru_cache(maxsize=MET_CACHE_SIZE)
+def _load_meteorological_data(meteorological_file_path):
+    return MeteorologicalData.from_csv(meteorological_file_path)
+
+
+@lru_cache(maxsize=1)
+def _result_store():
+    return ResultStore()
+
+
+def _analyze_home(home, use_store=True):
+    """Worker entry point: runs one home, or reads it from the result store, and returns a flat result row.
+    Errors are reported in the row."""
+    row = dict.fromkeys(RESULT_COLUMNS)
+    row.update({'Home': home['Home'], 'Load Profile': home['Load Profile'], 'Meteorological Data': home['Meteorological Data'], 'Threshold': home['Threshold']})
+
+    try:
+        results = None
+        if use_store:
+            inputs = ResultStore.inputs(home['Load Profile'], home['Meteorological Data'], home['Threshold'], range(PEAK_START, PEAK_END + 1))
+            results = _result_store().load(inputs['key'])
+        if results is None:
+            winter_meteorological_df, summer_meteorological_df = _load_meteorological_data(home['Meteorological Data'])
+            results = Pipeline.analyze_home(home['Load Profile'], winter_meteorological_df, summer_meteorological_df, home['Threshold'])
+            if use_store:
+                _result_store().store(inputs, DEFAULT_SEASONS, results)
+        winter, summer = results
+
+        for season, result in (('Winter', winter), ('Summer', summer)):
+            row[f'{season} Max Load (kW)'] = float(result['max_load'])
+            row[f'{season} Capacity (kWh)'] = float(result['capacity'])
+            row[f'{season} Cost (Original)'] = result['original_cost']
+            row[f'{season} Cost (Battery)'] = result['battery_cost']
+            row[f'{season} Cost (Shifted)'] = result['shifted_cost']
+    except Exception as e:
+        row['Error'] = f"{type(e).__name__}: {e}"
+
+    return row
+
+
+class Fleet:
+
+    @staticmethod
+    def from_directory(load_profile_dir: str, meteorological_file_path: str, threshold: float = None):
+        """
+        Build a home list from every load profile workbook in a directory, all sharing one meteorological file.
+
+        Args:
+            load_profile_dir (str): Directory containing the load profile .xlsx files.
+            meteorological_file_path (str): PVGIS CSV file used for every home.
+            threshold (float): Optional per-home threshold; None uses the threshold passed to run().
+
+        Returns:
+            list: One dictionary per home.
+        """
+        file_names = sorted(name for name in os.listdir(load_profile_dir) if name.lower().endswith('.xlsx') and not name.startswith('~$'))
+        return [{
+            'Home': os.path.splitext(name)[0],
+            'Load Profile': os.path.join(load_profile_dir, name),
+            'Meteorological Data': meteorological_file_path,
+            'Threshold': threshold,
+        } for name in file_names]
+
+    @staticmethod
+    def from_manifest(manifest_file_path: str):
+        """
+        Build a home list from a CSV manifest (see the module docstring for the columns).
+
+        Args:
+            manifest_file_path (str): Path of the manifest CSV file.
+
+        Returns:
+            list: One dictionary per home.
+        """
+        manifest = pd.read_csv(manifest_file_path)
+        required_columns = {'Home', 'Load Profile', 'Meteorological Data'}
+        if not required_columns.issubset(manifest.columns):
+            raise ValueError(f"Manifest file must contain the following columns: {required_columns}")
+
+        base_dir = os.path.dirname(os.path.abspath(manifest_file_path))
+        thresholds = manifest['Threshold'] if 'Threshold' in manifest.columns else pd.Series(None, index=manifest.index)
+        return [{
+            'Home': str(home),
+            'Load Profile': os.path.join(base_dir, load_path),
+            'Meteorological Data': os.path.join(base_dir, met_path),
+            'Threshold': None if pd.isna(threshold) else float(threshold),
+        } for home, load_path, met_path, threshold in zip(manifest['Home'], manifest['Load Profile'], manifest['Meteorological Data'], thresholds)]
+
+    @staticmethod
+    def run(homes, threshold: float, output_file_path: str, workers: int = None, use_store: bool = True):
+        """
+        Analyze every home across a process pool and stream one result row per home to a CSV file.
+
+        Only a bounded number of homes is in flight at any time and workers are recycled periodically,
+        so memory stays flat no matter how many homes the portfolio contains.
+
+        Args:
+            homes (list): Home dictionaries from from_directory or from_manifest.
+            threshold (float): Threshold used for homes that do not define their own.
+            output_file_path (str): Path of the consolidated result CSV file.
+            workers (int): Number of worker processes; defaults to all cores.
+            use_store (bool): Whether results may be read from and written to the result store.
+
+        Returns:
+            int: Number of homes that failed (their rows carry the error message).
+        """
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = workers * IN_FLIGHT_PER_WORKER
+        tasks = ({**home, 'Threshold': threshold if home['Threshold'] is None else home['Threshold']} for home in homes)
+        failed = 0
+        done_count = 0
+
+        # Per-home progress would flood the console, so workers only log warnings unless debugging
+        worker_log_level = logging.DEBUG if logger.isEnabledFor(logging.DEBUG) else logging.WARNING
+        logger.info("Analyzing %d homes with %d workers...", len(homes), workers)
+        with span(logger, "Fleet analysis"), open(output_file_path, 'w', newline='') as output_file, \
+                ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=TASKS_PER_WORKER,
+                                    initializer=configure, initargs=(worker_log_level,)) as executor:
+            writer = csv.DictWriter(output_file, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+
+            pending = set()
+            for home in tasks:
+                pending.add(executor.submit(_analyze_home, home, use_store))
+                if len(pending) < max_in_flight:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                failed += Fleet._write_rows(writer, done)
+                done_count += len(done)
+
+            done, _ = wait(pending)
+            failed += Fleet._write_rows(writer, done)
+            done_count += len(done)
+
+        logger.info("Fleet analysis complete: %d homes, %d failed. Results written to: %s", done_count, failed, output_file_path)
+        return failed
+
+    @staticmethod
+    def _write_rows(writer, futures):
+        failed = 0
+        for future in futures:
+            row = future.result()
+            failed += row['Error'] is not None
+            writer.writerow(row)
+        return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the winter/summer analysis for a portfolio of homes.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--profiles', help="Directory of load profile .xlsx files (requires --met).")
+    source.add_argument('--manifest', help="CSV manifest with Home, Load Profile and Meteorological Data columns.")
+    parser.add_argument('--met', help="Meteorological CSV file shared by every home in --profiles.")
+    parser.add_argument('--threshold', type=float, default=3.0, help="Threshold for homes without their own (default: 3.0).")
+    parser.add_argument('--output', required=True, help="Path of the consolidated result CSV file.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: all cores).")
+    parser.add_argument('--no-store', action='store_true', help="Analyze every home instead of reusing stored results.")
+    parser.add_argument('--log-level', type=str.upper, choices=LOG_LEVELS, default='INFO', help="Logging level (default: INFO).")
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+
+    if args.profiles and not args.met:
+        parser.error("--profiles requires --met")
+
+    homes = Fleet.from_directory(args.profiles, args.met) if args.profiles else Fleet.from_manifest(args.manifest)
+    failed = Fleet.run(homes, args.threshold, args.output, args.workers, use_store=not args.no_store)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
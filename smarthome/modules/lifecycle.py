@@ -0,0 +1,279 @@
+"""
+This module simulates a battery over its whole life: many years of hourly operation with capacity fade from
+cycling and calendar ageing, and the payback of the battery from the savings on the energy bill.
+
+Classes:
+    Lifecycle: A class containing static methods for lifecycle simulation.
+Methods:
+    run(profiles, hourly_df, threshold, peak_hours, years, ...): Simulates every year and returns the yearly summary and payback.
+    reversals(series): Returns the turning points of a series.
+    rainflow(reversals, residue): Counts the closed cycles of a series of turning points with the rainflow method.
+    residue_cycles(residue): Returns the half cycles left open at the end of a series.
+    cycle_damage(ranges, counts): Returns the fraction of the cycle life used by counted cycles.
+    payback(investment, savings, discount_rate): Returns the years until the savings repay the investment.
+
+Constants:
+    - CYCLE_LIFE: Full (100% depth) cycles until the battery reaches END_OF_LIFE_CAPACITY.
+    - DOD_EXPONENT: Exponent of the depth of discharge in the cycle life curve.
+    - CALENDAR_FADE: Capacity lost per year without cycling (fraction of the initial capacity).
+    - END_OF_LIFE_CAPACITY: Remaining capacity at the end of the cycle life (fraction of the initial capacity).
+    - BATTERY_PRICE: Installed battery cost ($/kWh).
+    - YEARS: Default number of simulated years.
+
+Usage, from the smarthome directory:
+    python -m modules.lifecycle data/load_profile_data/load_profile_v3.xlsx data/meteorological_data/meteorological_data.csv --years 20
+
+Every simulated year replays the hourly meteorological rows (a PVGIS TMY file holds one typical year) with the
+load profile of every month (see MONTHLY_PROFILES in seasons.py), carrying the SoC across years. Years are
+simulated one at a time and only their summaries are kept: the SoC trace of a year is reduced to its turning
+points with array operations, the rainflow stack then runs over the turning points only, and what is left on the
+stack carries over to the next year. The half cycles left on the stack at the end count towards the last year, so
+cycles are counted as the SoC trace would be counted in one piece, and 20 years (175,200 hours) take a fraction of
+a second with memory for a single year.
+"""
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .battery import Battery
+from .calculations import Calculations
+from .log import LOG_LEVELS, configure, get_logger, span
+from .pipeline import BATTERY_CAPACITY_RATIO, CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY, Pipeline
+
+logger = get_logger('lifecycle')
+
+# Cycle life of lithium iron phosphate cells: full cycles to END_OF_LIFE_CAPACITY, and N(depth) = CYCLE_LIFE * depth ** -DOD_EXPONENT
+CYCLE_LIFE = 6000
+DOD_EXPONENT = 1.5
+# Capacity lost per year of calendar ageing (fraction of the initial capacity)
+CALENDAR_FADE = 0.01
+END_OF_LIFE_CAPACITY = 0.8
+# Installed battery cost ($/kWh)
+BATTERY_PRICE = 500.0
+YEARS = 20
+YEAR_COLUMNS = [
+    'Year', 'Capacity (kWh)', 'Discharged (kWh)', 'Equivalent Full Cycles', 'Cycle Fade (%)', 'Calendar Fade (%)',
+    'Cost (No Battery)', 'Cost (Battery)', 'Savings', 'Cumulative Savings',
+]
+
+
+class Lifecycle:
+
+    @staticmethod
+    def run(profiles, hourly_df, threshold, peak_hours, years=YEARS, capacity=None, charge_rate=CHARGE_RATE, discharge_rate=DISCHARGE_RATE,
+            panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, tariff=None, battery_price=BATTERY_PRICE, discount_rate=0.0,
+            month_profiles=None):
+        """
+        Simulate the battery rules over several years, fading the capacity after every year.
+
+        Parameters:
+        - profiles: One ApplianceTable used all year, or a dictionary of tables by profile name (e.g. the 'Winter'
+          and 'Summer' tables of ElectricLoad.from_excel) used in the months of month_profiles.
+        - hourly_df: Hourly meteorological rows of one year, as from MeteorologicalData.hourly_from_csv.
+        - threshold: The threshold above which the battery discharges in peak hours.
+        - peak_hours: List of hours considered as peak hours.
+        - years: Number of simulated years.
+        - capacity: Initial battery capacity (kWh); defaults to BATTERY_CAPACITY_RATIO times the highest hourly load.
+        - charge_rate, discharge_rate, panel_area, panel_efficiency, tariff: As in Pipeline.analyze_season.
+        - battery_price: Installed cost ($/kWh of initial capacity).
+        - discount_rate: Yearly discount rate of the savings for the payback.
+        - month_profiles: Profile name of every month (1-12); defaults to MONTHLY_PROFILES.
+
+        Returns:
+        - Dictionary with 'years' (DataFrame with YEAR_COLUMNS, one row per year), 'investment' ($) and 'payback'
+          (years until the discounted savings repay the investment, or None if they do not within the simulated years).
+        """
+        month = hourly_df['Month'].to_numpy(dtype=np.int64)
+        weekday = pd.DatetimeIndex(hourly_df['time']).dayofweek.to_numpy()
+        hour_of_day = hourly_df['Hour'].to_numpy(dtype=np.int64)
+        irradiance = hourly_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+        load = Pipeline.year_load(profiles, hourly_df, month_profiles)
+        if capacity is None:
+            capacity = load.max() * BATTERY_CAPACITY_RATIO
+
+        # The grid load without a battery is the same every year
+        original_cost = Calculations.calculate_annual_cost(load, hour_of_day, peak_hours, tariff, month, weekday)
+        battery = Battery(capacity, charge_rate, discharge_rate, capacity * INITIAL_SOC_RATIO, panel_area, panel_efficiency)
+        investment = capacity * battery_price
+
+        rows = []
+        residue = []
+        damage = 0.0
+        cumulative_savings = 0.0
+        with span(logger, f"Lifecycle of {years} years"):
+            for year in range(1, years + 1):
+                year_capacity = battery.capacity
+                discharge, soc = battery.simulate_series(load, irradiance, hour_of_day, threshold, peak_hours)
+                ranges, counts, residue = Lifecycle.rainflow(Lifecycle.reversals(soc), residue)
+                damage += Lifecycle.cycle_damage(ranges, counts)
+
+                battery_cost = Calculations.calculate_annual_cost(load - discharge, hour_of_day, peak_hours, tariff, month, weekday)
+                savings = original_cost - battery_cost
+                cumulative_savings += savings
+                cycle_fade = damage * (1 - END_OF_LIFE_CAPACITY)
+                calendar_fade = year * CALENDAR_FADE
+                rows.append([year, year_capacity, discharge.sum(), float(np.dot(ranges, counts)) / 100, cycle_fade * 100, calendar_fade * 100,
+                             original_cost, battery_cost, savings, cumulative_savings])
+
+                # Fade the capacity for the next year; the SoC stays a percentage of the remaining capacity
+                remaining = 1 - cycle_fade - calendar_fade
+                if remaining <= 0:
+                    logger.warning("Battery worn out after %d years", year)
+                    break
+                battery.capacity = capacity * remaining
+
+            # The half cycles still open when the simulation ends count towards its last year
+            ranges, counts = Lifecycle.residue_cycles(residue)
+            if rows and len(ranges):
+                damage += Lifecycle.cycle_damage(ranges, counts)
+                rows[-1][3] += float(np.dot(ranges, counts)) / 100
+                rows[-1][4] = damage * (1 - END_OF_LIFE_CAPACITY) * 100
+
+        summary = pd.DataFrame(rows, columns=YEAR_COLUMNS)
+        payback = Lifecycle.payback(investment, summary['Savings'].to_numpy(), discount_rate)
+        logger.info("Capacity after %d years: %.2f of %.2f kWh. Payback: %s", years, battery.capacity, capacity,
+                    "none" if payback is None else f"{payback:.1f} years")
+        return {'years': summary, 'investment': investment, 'payback': payback}
+
+    @staticmethod
+    def reversals(series):
+        """
+        Reduce a series to its turning points: repeated values are dropped and only the first and last points and
+        the points where the direction changes are kept. Runs in array operations only.
+
+        Returns:
+        - ndarray: The turning points, in order.
+        """
+        series = np.asarray(series, dtype=float)
+        if len(series) == 0:
+            return series
+        series = series[np.r_[True, np.diff(series) != 0]]
+        if len(series) < 3:
+            return series
+        direction = np.sign(np.diff(series))
+        return series[np.r_[True, direction[1:] != direction[:-1], True]]
+
+    @staticmethod
+    def rainflow(reversals, residue=()):
+        """
+        Count cycles with the three-point rainflow method (ASTM E1049). The stack left by an earlier call is
+        passed as residue, so a long series can be counted in pieces with the same result as in one piece.
+
+        Args:
+            reversals (ndarray): Turning points, as from reversals().
+            residue (list): Stack left by the call for the preceding piece.
+
+        Returns:
+            tuple: Cycle ranges, cycle counts (1 for full cycles, 0.5 for half cycles) and the new residue. Count
+            the residue itself with residue_cycles once the series ends.
+        """
+        stack = [float(value) for value in residue]
+        ranges = []
+        counts = []
+        for value in np.asarray(reversals, dtype=float).tolist():
+            # Where two pieces meet, the last point of the stack may not be a turning point
+            if len(stack) >= 2 and (value - stack[-1]) * (stack[-1] - stack[-2]) >= 0:
+                stack[-1] = value
+            elif stack and value == stack[-1]:
+                continue
+            else:
+                stack.append(value)
+
+            while len(stack) >= 3:
+                x = abs(stack[-1] - stack[-2])
+                y = abs(stack[-2] - stack[-3])
+                if x < y:
+                    break
+                ranges.append(y)
+                if len(stack) == 3:
+                    # The range holds the starting point: half a cycle, and the start is dropped
+                    counts.append(0.5)
+                    del stack[0]
+                else:
+                    counts.append(1.0)
+                    del stack[-3:-1]
+        return np.array(ranges), np.array(counts), stack
+
+    @staticmethod
+    def residue_cycles(residue):
+        """ Returns the ranges and counts of the half cycles left on the stack at the end of a series. """
+        return np.abs(np.diff(np.asarray(residue, dtype=float))), np.full(max(len(residue) - 1, 0), 0.5)
+
+    @staticmethod
+    def cycle_damage(ranges, counts):
+        """
+        Return the fraction of the cycle life used by counted cycles (Palmgren-Miner), with the cycle life of a
+        cycle of depth d (fraction of capacity) given by CYCLE_LIFE * d ** -DOD_EXPONENT.
+
+        Args:
+            ranges (ndarray): Cycle ranges in % SoC, as from rainflow.
+            counts (ndarray): Cycle counts, as from rainflow.
+        """
+        depth = np.asarray(ranges, dtype=float) / 100
+        return float(np.sum(np.asarray(counts, dtype=float) * depth ** DOD_EXPONENT) / CYCLE_LIFE)
+
+    @staticmethod
+    def payback(investment, savings, discount_rate=0.0):
+        """
+        Return the years until the discounted yearly savings repay the investment, interpolated within the year
+        they do, or None if they never do. Nothing to repay takes no time.
+        """
+        if investment <= 0:
+            return 0.0
+        savings = np.asarray(savings, dtype=float) / (1 + discount_rate) ** np.arange(1, len(savings) + 1)
+        cumulative = np.cumsum(savings)
+        repaid = np.flatnonzero(cumulative >= investment)
+        if len(repaid) == 0:
+            return None
+        year = repaid[0]
+        if savings[year] <= 0:
+            return float(year)
+        before = cumulative[year - 1] if year > 0 else 0.0
+        return float(year + (investment - before) / savings[year])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a battery over many years with capacity fade and report its payback.")
+    parser.add_argument('load_profile', help="Load profile Excel file.")
+    parser.add_argument('meteorological_data', help="PVGIS meteorological CSV file.")
+    parser.add_argument('--threshold', type=float, default=3.0, help="Load above which the battery discharges in peak hours (default: 3.0).")
+    parser.add_argument('--years', type=int, default=YEARS, help=f"Years to simulate (default: {YEARS}).")
+    parser.add_argument('--capacity', type=float, default=None, help="Initial battery capacity in kWh (default: half the highest hourly load).")
+    parser.add_argument('--price', type=float, default=BATTERY_PRICE, help=f"Installed battery cost in $/kWh (default: {BATTERY_PRICE}).")
+    parser.add_argument('--discount-rate', type=float, default=0.0, help="Yearly discount rate of the savings (default: 0).")
+    parser.add_argument('--output', help="Output CSV file of the yearly summary (default: standard output).")
+    parser.add_argument('--log-level', type=str.upper, choices=LOG_LEVELS, default='WARNING', help="Logging level (default: WARNING).")
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+
+    from .calculations import PEAK_START, PEAK_END
+    from .load_profile import PROFILES, ElectricLoad
+    from .met_data import MeteorologicalData
+
+    tables = dict(zip(PROFILES, ElectricLoad.from_excel(args.load_profile)))
+    hourly_df = MeteorologicalData.hourly_from_csv(args.meteorological_data)
+    result = Lifecycle.run(tables, hourly_df, args.threshold, list(range(PEAK_START, PEAK_END + 1)), args.years, args.capacity,
+                           battery_price=args.price, discount_rate=args.discount_rate)
+
+    output_file = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(output_file, lineterminator='\n')
+        writer.writerow(YEAR_COLUMNS)
+        for row in result['years'].itertuples(index=False):
+            writer.writerow([round(value, 3) for value in row])
+    finally:
+        if args.output:
+            output_file.close()
+
+    payback = result['payback']
+    print(f"Investment: {result['investment']:.2f} $. Payback: " + ("not within the simulated years" if payback is None else f"{payback:.1f} years"),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
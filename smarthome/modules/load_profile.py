@@ -5,86 +5,122 @@ It defines the ElectricLoad class, which represents an electric load with attrib
 Classes:
     ElectricLoad: A class to represent an electric load and provide methods to read data from files.
 Methods:
-    from_excel(load_profile_file_path): Reads electric load data from an Excel file and returns a list of ElectricLoad instances.
+    from_excel(load_profile_file_path, use_cache, profiles): Reads electric load data from an Excel file and returns the winter and summer ApplianceTables.
+
+Hour columns accept decimal hours (7.25) or times of day (07:15), so profiles can use sub-hourly resolution.
+Parsed profiles are stored in the content-hashed cache of cache.py, so repeat runs skip reading the workbook
+(and importing openpyxl); pass use_cache=False to always parse.
 
 NOTE: THIS CODE ONLY WORKS WITH SPECIFIC FILES THAT CONTAIN THE EXPECTED STRUCTURE.
 """
 
+import datetime
+import logging
+
 import pandas as pd
 
+from .appliances import ApplianceTable
+from .log import get_logger
+from .cache import FileCache
+
+logger = get_logger('load_profile')
+
+# Load profiles read by default, in the order from_excel returns them; each has '<Profile> Hours Start' and '<Profile> Hours End' columns
+PROFILES = ('Winter', 'Summer')
+
 class ElectricLoad:
 
     @staticmethod
-    def from_excel(load_profile_file_path: str):
-        """ Reads an Excel file with electric load profiles and returns a clean DataFrame. """
+    def from_excel(load_profile_file_path: str, use_cache: bool = True, profiles=PROFILES):
+        """
+        Reads an Excel file with electric load profiles and returns clean winter and summer ApplianceTables.
+
+        Other column pairs can be read by name, e.g. profiles=('Winter', 'Weekend') for a workbook with
+        'Weekend Hours Start' and 'Weekend Hours End' columns; one table is returned per name, in order.
+        """
+        if use_cache:
+            key = FileCache.key(load_profile_file_path)
+            cached = [FileCache.load(key, ElectricLoad._cache_product(profile)) for profile in profiles]
+            if all(array is not None for array in cached):
+                logger.info("Loaded cached load profile for: %s", load_profile_file_path)
+                return tuple(ApplianceTable.from_records(array) for array in cached)
+
         # Read Excel file and validate columns
-        print(f"\nReading Excel file: {load_profile_file_path}")
+        logger.info("Reading Excel file: %s", load_profile_file_path)
         df = pd.read_excel(load_profile_file_path)
-        print(f"Columns found: {df.columns.tolist()}")
+        logger.debug("Columns found: %s", df.columns.tolist())
 
         # Ensure all required columns exist in the dataframe
-        required_columns = {'Name', 'Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End'}
+        hour_columns = [f'{profile} Hours {bound}' for profile in profiles for bound in ('Start', 'End')]
+        required_columns = {'Name', 'Rated Power (kW)', 'Priority Group', *hour_columns}
         if not required_columns.issubset(df.columns):
             raise ValueError(f"Excel file must contain the following columns: {required_columns}")
 
         # Drop rows with missing essential data
         df = df.dropna(subset=['Name', 'Rated Power (kW)'])
-        print(f"Dropped rows with missing 'Name' or 'Rated Power (kW)', remaining rows: {len(df)}")
+        logger.debug("Dropped rows with missing 'Name' or 'Rated Power (kW)', remaining rows: %d", len(df))
 
         # Convert columns to numeric values and handle invalid entries
-        print("Converting columns to numeric values...")
-        numeric_columns = ['Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End']
+        numeric_columns = ['Rated Power (kW)', 'Priority Group', *hour_columns]
+        # Hours may be decimal hours (7.25) or times of day (07:15), which allows sub-hourly profiles
+        df[hour_columns] = df[hour_columns].apply(ElectricLoad._to_hours)
         df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce')
-        print(f"Converted columns to numeric values. Number of rows with numeric values: {len(df)}")
+        logger.debug("Converted columns to numeric values. Number of rows with numeric values: %d", len(df))
 
         # Replace invalid hour values (outside 0-24) with 0
-        print("Checking for invalid hour values...")
-        invalid_rows = []
-        for col in ['Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End']:
-            invalid_values = ~df[col].between(0, 24)
-            invalid_rows.append(df[invalid_values])
-        invalid_df = pd.concat(invalid_rows)
-        invalid_df = invalid_df.drop_duplicates()
-        if not invalid_df.empty:
-            print(f"\nInvalid values found in the following rows:\n{invalid_df}")
-            print(f"Replaced invalid hour values with 0. Number of rows replaced: {replaced_count}")
-        else:
-            print("No invalid hour values found.")
-        replaced_count = 0
-        for col in ['Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End']:
-            invalid_values = ~df[col].between(0, 24)
-            replaced_count += invalid_values.sum()
-            df[col] = df[col].where(df[col].between(0, 24), 0)
-
-        # Separate DataFrames for winter and summer loads
-        winter_load = df[['Name', 'Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End']].copy()
-        summer_load = df[['Name', 'Rated Power (kW)', 'Priority Group', 'Summer Hours Start', 'Summer Hours End']].copy()
-
-        # Rename columns to 'Start' and 'End'
-        winter_load.rename(columns={'Winter Hours Start': 'Start', 'Winter Hours End': 'End'}, inplace=True)
-        summer_load.rename(columns={'Summer Hours Start': 'Start', 'Summer Hours End': 'End'}, inplace=True)
-
-        # Replace rows where both 'Start' and 'End' are 0 with NaN
-        print("Replacing rows with 'Start' = 0 and 'End' = 0 with NaN and dropping them...")
-        winter_load.loc[(winter_load['Start'] == 0) & (winter_load['End'] == 0), ['Start', 'End']] = None
-        summer_load.loc[(summer_load['Start'] == 0) & (summer_load['End'] == 0), ['Start', 'End']] = None
-
-        # Drop rows where 'Start' or 'End' is NaN
-        initial_winter_count = len(winter_load)
-        initial_summer_count = len(summer_load)
-
-        winter_load = winter_load.dropna(subset=['Start', 'End'])
-        summer_load = summer_load.dropna(subset=['Start', 'End'])
-
-        dropped_winter = initial_winter_count - len(winter_load)
-        dropped_summer = initial_summer_count - len(summer_load)
-
-        print(f"Dropped {dropped_winter} rows from winter load where 'Start' and 'End' are 0.")
-        print(f"Dropped {dropped_summer} rows from summer load where 'Start' and 'End' are 0.")
-
-        print(f"\nCleaned Electric Load Data Table:\n{df}")
-        print(f"\nWinter Load Data:\n{winter_load}")
-        print(f"\nSummer Load Data:\n{summer_load}")
-
-        print("\nElectric Load Data Processing Complete.")
-        return winter_load, summer_load
\ No newline at end of file
+        invalid_values = ~df[hour_columns].apply(lambda column: column.between(0, 24))
+        replaced_count = int(invalid_values.to_numpy().sum())
+        if replaced_count:
+            logger.warning("Replaced %d invalid hour values with 0.", replaced_count)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Invalid values found in the following rows:\n%s", df[invalid_values.any(axis=1)])
+        df[hour_columns] = df[hour_columns].where(~invalid_values, 0)
+
+        loads = []
+        for profile in profiles:
+            # Separate DataFrame per profile, with its hour columns renamed to 'Start' and 'End'
+            load = df[['Name', 'Rated Power (kW)', 'Priority Group', f'{profile} Hours Start', f'{profile} Hours End']].copy()
+            load.rename(columns={f'{profile} Hours Start': 'Start', f'{profile} Hours End': 'End'}, inplace=True)
+
+            # Replace rows where both 'Start' and 'End' are 0 with NaN, then drop rows where 'Start' or 'End' is NaN
+            load.loc[(load['Start'] == 0) & (load['End'] == 0), ['Start', 'End']] = None
+            initial_count = len(load)
+            load = load.dropna(subset=['Start', 'End'])
+            logger.debug("Dropped %d rows from %s load where 'Start' and 'End' are 0.", initial_count - len(load), profile.lower())
+            loads.append(load)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Cleaned electric load data table:\n%s", df)
+            for profile, load in zip(profiles, loads):
+                logger.debug("%s load data:\n%s", profile, load)
+
+        logger.info("Read %d appliances (%s).", len(df), ", ".join(f"{len(load)} in {profile.lower()}" for profile, load in zip(profiles, loads)))
+        tables = tuple(ApplianceTable.from_frame(load) for load in loads)
+        if use_cache:
+            for profile, table in zip(profiles, tables):
+                FileCache.store(key, ElectricLoad._cache_product(profile), table.to_records())
+        return tables
+
+    @staticmethod
+    def _cache_product(profile):
+        """ Returns the cache product of a parsed profile, e.g. 'winter_profile'. """
+        return f"{profile.lower()}_profile"
+
+    @staticmethod
+    def _to_hours(column):
+        """ Converts times of day (datetime.time, datetime or 'HH:MM[:SS]' text) in an hour column to decimal hours. """
+        numeric = pd.to_numeric(column, errors='coerce')
+        is_time = numeric.isna() & column.notna()
+        if not is_time.any():
+            return column
+
+        def hours(value):
+            if isinstance(value, (datetime.time, datetime.datetime)):
+                return value.hour + value.minute / 60 + value.second / 3600
+            parts = str(value).strip().split(':')
+            try:
+                return int(parts[0]) + sum(float(part) / 60 ** i for i, part in enumerate(parts[1:], start=1)) if len(parts) > 1 else float('nan')
+            except ValueError:
+                return float('nan')
+
+        return column.where(~is_time, column[is_time].map(hours))
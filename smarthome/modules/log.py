@@ -0,0 +1,80 @@
+"""
+This module provides the leveled logging and timing layer used by every other module instead of print.
+
+Functions:
+    get_logger(name): Returns the logger of a module, under the common 'smarthome' logger.
+    configure(level): Sets the level of all smarthome loggers and installs a console handler once.
+    span(logger, stage, level): Context manager that logs how long a pipeline stage took.
+
+Levels:
+    - DEBUG: Per-hour details and full DataFrame dumps.
+    - INFO: One line per stage (files read, simulations run, costs) and stage timings.
+    - WARNING: Data problems that were worked around, e.g. invalid hour values.
+    - ERROR: Only failures.
+    LOG_LEVELS lists them for the --log-level option of the command-line tools.
+
+Messages use logging's lazy %-formatting, and loops and DataFrame dumps check isEnabledFor first, so a
+disabled level formats nothing. The level can also be set with the SMARTHOME_LOG_LEVEL environment variable.
+"""
+
+import logging
+import os
+import time
+
+LOGGER_NAME = 'smarthome'
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR']
+
+
+def get_logger(name: str):
+    """ Returns the logger of a module, e.g. get_logger('battery') -> 'smarthome.battery'. """
+    return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+
+def configure(level=None):
+    """
+    Sets the level of all smarthome loggers and installs a console handler the first time it is called.
+
+    Args:
+        level (str or int): Logging level; defaults to $SMARTHOME_LOG_LEVEL or WARNING.
+    """
+    if level is None:
+        level = os.environ.get('SMARTHOME_LOG_LEVEL', 'WARNING')
+    if isinstance(level, str):
+        level = level.upper()
+
+    root = logging.getLogger(LOGGER_NAME)
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+
+
+class span:
+    """
+    Context manager that logs the wall time of a pipeline stage:
+
+        with span(logger, "battery simulation"):
+            ...
+
+    When the level is disabled it does not even read the clock.
+    """
+
+    __slots__ = ('logger', 'stage', 'level', 'start')
+
+    def __init__(self, logger, stage: str, level=logging.INFO):
+        self.logger = logger
+        self.stage = stage
+        self.level = level
+        self.start = None
+
+    def __enter__(self):
+        if self.logger.isEnabledFor(self.level):
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            self.logger.log(self.level, "%s took %.2f ms", self.stage, (time.perf_counter() - self.start) * 1000)
+        return False
@@ -1,70 +1,214 @@
 """
 This module provides functionality to read and process meteorological data from Excel and CSV files.
-It calculates solar irradiance per hour and average solar irradiation for winter and summer months.
+It calculates solar irradiance per hour and average solar irradiation for winter and summer months, or any other seasons.
 
 Classes:
     MeteorologicalData: A class to represent meteorological data and provide methods to read data from files.
 Methods:
     from_excel(meteorological_file_path): Reads meteorological data from an Excel file and returns a list of MeteorologicalData instances.
     from_csv(meteorological_file_path): Reads meteorological data from a CSV file and returns a list of MeteorologicalData instances.
+    seasonal_from_csv(meteorological_file_path, seasons): Averages a CSV file into a typical day for every season (see seasons.py).
+    hourly_from_csv(meteorological_file_path): Reads every hourly row of a CSV file for full-year simulations.
+
+Parsed results are cached on disk by content hash (see cache.py); pass use_cache=False to always parse.
 
 NOTE: THIS CODE ONLY WORKS WITH SPECICIF FILES. ITS COMPATIBLE WITH CSV METEOROLOGY FILES FROM: https://re.jrc.ec.europa.eu/pvg_tools/en/#TMY
 """
 
+import logging
+
+import numpy as np
 import pandas as pd
 
+from .log import get_logger
+from .cache import FileCache
+from .seasons import DEFAULT_SEASONS, Season
+
+logger = get_logger('met_data')
+
+# Rows parsed per chunk when streaming a CSV file
+CHUNK_SIZE = 100_000
+# PVGIS columns kept by hourly_from_csv for the PV model: (CSV column, column name, scale, value for missing entries)
+PV_COLUMNS = [
+    ('G(i)', 'Irradiance (kW/m^2)', 1 / 1000, 0.0),   # Plane-of-array irradiance, W/m^2 in the file
+    ('T2m', 'Temperature (C)', 1.0, 25.0),           # Air temperature; missing hours are not derated
+    ('P', 'PV Power (kW)', 1 / 1000, 0.0),           # Output of the PVGIS reference system, W in the file
+]
+
 class MeteorologicalData:
 
-    def from_csv(meteorological_file_path: str):
-        """ Reads a CSV file with meteorological data and returns a DataFrame with hourly average solar irradiance for both winter and summer seasons. """
-        # Read CSV file and validate columns
-        print(f"\nReading CSV file: {meteorological_file_path}")
-        df = pd.read_csv(meteorological_file_path, skiprows=10, low_memory=False, on_bad_lines='warn')  
-        print(f"Columns found in the CSV file: {df.columns.tolist()}")
+    def from_csv(meteorological_file_path: str, use_cache: bool = True, chunksize: int = CHUNK_SIZE):
+        """
+        Reads a CSV file with meteorological data and returns a DataFrame with hourly average solar irradiance for both winter and summer seasons.
+        """
+        winter_df, summer_df = MeteorologicalData.seasonal_from_csv(meteorological_file_path, DEFAULT_SEASONS, use_cache, chunksize)
+        return winter_df, summer_df
+
+    def seasonal_from_csv(meteorological_file_path: str, seasons=DEFAULT_SEASONS, use_cache: bool = True, chunksize: int = CHUNK_SIZE):
+        """
+        Reads a CSV file with meteorological data and returns the hourly average solar irradiance of every season.
+
+        The file is streamed in chunks and only running sums and counts per (season, hour) are kept, so memory stays
+        constant for multi-year series and any number of seasons is averaged in a single pass. A row counts towards
+        every season whose months and weekdays contain it, so seasons may overlap. Sums use the same compensated
+        summation as pandas' groupby mean, so the averages are identical to grouping the whole file at once.
+
+        Returns:
+            list: One DataFrame with 'Hour' and 'Irradiation (kW/m^2)' columns per season, in the order of seasons.
+        """
+        product = f"seasonal-{Season.digest(seasons)}"
+        if use_cache:
+            key = FileCache.key(meteorological_file_path)
+            cached = FileCache.load(key, product)
+            if cached is not None:
+                logger.info("Loaded cached meteorological data for: %s", meteorological_file_path)
+                seasonal_df = FileCache.from_records(cached)
+                return [seasonal_df[seasonal_df['Season'] == index].drop(columns='Season').reset_index(drop=True)
+                        for index in range(len(seasons))]
+
+        # Locate the header row and validate columns
+        logger.info("Reading CSV file: %s", meteorological_file_path)
+        header_row, columns = MeteorologicalData._find_header(meteorological_file_path)
+        logger.debug("Columns found in the CSV file: %s", columns)
 
         # Ensure all required columns exist in the dataframe
         required_columns = {'time', 'H_sun'}  
-        if not required_columns.issubset(df.columns):
+        if not required_columns.issubset(columns):
             raise ValueError(f"CSV file must contain the following columns: {required_columns}")
 
-        # Drop rows with invalid 'time' values
-        df = df.dropna(subset=['time'])  
-        print(f"Dropped rows with invalid 'time', remaining rows: {len(df)}")
-        
-        # Convert 'time' column to datetime for easier manipulation
-        print("Converting 'time' column to datetime format...")
-        df['time'] = pd.to_datetime(df['time'], format='%Y%m%d:%H%M', errors='coerce')  
-        print(f"Time conversion complete. Number of rows with 'time': {df['time'].notna().sum()}")
-
-        # Extract hour, day, month
-        df['hour'] = df['time'].dt.hour
-        df['day'] = df['time'].dt.day
-        df['month'] = df['time'].dt.month
-        print("Extracted hour, day, and month from 'time' column.")
-
-        # Define winter and summer months
-        winter_months = [12, 1, 2]
-        summer_months = [6, 7, 8]
-
-        # Filter data for winter and summer months
-        winter_data = df[df['month'].isin(winter_months)]
-        summer_data = df[df['month'].isin(summer_months)]
-        print(f"Filtered winter data: {len(winter_data)} rows, summer data: {len(summer_data)} rows.")
-
-        # Convert 'H_sun' to numeric
-        df['H_sun'] = pd.to_numeric(df['H_sun'], errors='coerce')
-        print("Converted 'H_sun' to numeric.")
-
-        # Calculate average solar irradiation per hour for winter and summer months
-        winter_irradiation_avg = winter_data.groupby('hour')['H_sun'].mean().to_dict()
-        summer_irradiation_avg = summer_data.groupby('hour')['H_sun'].mean().to_dict()
-
-        # Create DataFrames for both winter and summer irradiation averages
-        winter_df = pd.DataFrame(list(winter_irradiation_avg.items()), columns=['Hour', 'Irradiation (kW/m^2)'])
-        summer_df = pd.DataFrame(list(summer_irradiation_avg.items()), columns=['Hour', 'Irradiation (kW/m^2)'])
-
-        print(f"\nWinter Profile:\n{winter_df.head(24)}")
-        print(f"\nSummer Profile:\n{summer_df.head(24)}")
-        
-        print("\nMeteorological Data Processing Complete.")
-        return winter_df, summer_df
\ No newline at end of file
+        # Map every (month, weekday) to the seasons that contain it
+        membership = np.zeros((len(seasons), 13, 7), dtype=bool)
+        for index, season in enumerate(seasons):
+            membership[np.ix_([index], season.months, season.weekdays or range(7))] = True
+
+        # Running state per (season, hour) group; this is all that is kept between chunks
+        sums = np.zeros(len(seasons) * 24)
+        compensation = np.zeros(len(seasons) * 24)
+        observations = np.zeros(len(seasons) * 24, dtype=np.int64)
+        rows_seen = np.zeros(len(seasons) * 24, dtype=np.int64)
+
+        reader = pd.read_csv(meteorological_file_path, skiprows=header_row, usecols=['time', 'H_sun'], dtype={'time': str},
+                             chunksize=chunksize, on_bad_lines='warn')
+        for chunk in reader:
+            # Rows whose 'time' does not parse (e.g. the PVGIS footer) are dropped
+            time = pd.to_datetime(chunk['time'], format='%Y%m%d:%H%M', errors='coerce')
+            valid = time.notna().to_numpy()
+            month = time.dt.month.to_numpy()[valid].astype(np.int64)
+            weekday = time.dt.dayofweek.to_numpy()[valid].astype(np.int64)
+            hour = time.dt.hour.to_numpy()[valid].astype(np.int64)
+            irradiation = pd.to_numeric(chunk['H_sun'], errors='coerce').to_numpy(dtype=float)[valid]
+
+            # One entry per (season, row) pair; the accumulation keeps the row order within every group
+            season, row = np.nonzero(membership[:, month, weekday])
+            MeteorologicalData._accumulate(season * 24 + hour[row], irradiation[row], sums, compensation, observations, rows_seen)
+
+        for index, season in enumerate(seasons):
+            logger.debug("Filtered %s data: %d rows.", season.name, rows_seen[index * 24:(index + 1) * 24].sum())
+
+        # Calculate average solar irradiation per hour for every season
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(observations > 0, sums / observations, np.nan)
+
+        def season_profile(index):
+            groups = np.arange(24) + index * 24
+            present = rows_seen[groups] > 0
+            return pd.DataFrame({'Hour': np.arange(24, dtype=float)[present], 'Irradiation (kW/m^2)': means[groups][present]})
+
+        profiles = [season_profile(index) for index in range(len(seasons))]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for season, profile in zip(seasons, profiles):
+                logger.debug("%s profile:\n%s", season.name.capitalize(), profile)
+
+        if use_cache:
+            seasonal_df = pd.concat([profile.assign(Season=index) for index, profile in enumerate(profiles)], ignore_index=True)
+            FileCache.store(key, product, FileCache.to_records(seasonal_df))
+
+        return profiles
+
+    def hourly_from_csv(meteorological_file_path: str, use_cache: bool = True, chunksize: int = CHUNK_SIZE):
+        """
+        Reads a CSV file with meteorological data and returns every hourly row, in file order, for full-year simulations.
+        Besides the sun height ('Irradiation (kW/m^2)', as in from_csv), the PVGIS columns used by the PV model are
+        included when the file has them: G(i) as 'Irradiance (kW/m^2)', T2m as 'Temperature (C)' and P as 'PV Power (kW)'.
+
+        The header row is located as in seasonal_from_csv, so preambles of any length are read, and the file is
+        streamed in chunks of which only the kept columns are converted, so the raw text of a multi-year file is
+        never held in memory at once.
+        """
+        if use_cache:
+            key = FileCache.key(meteorological_file_path)
+            cached = FileCache.load(key, 'hourly')
+            if cached is not None:
+                return FileCache.from_records(cached)
+
+        # Locate the header row and validate columns
+        logger.info("Reading CSV file: %s", meteorological_file_path)
+        header_row, columns = MeteorologicalData._find_header(meteorological_file_path)
+        required_columns = {'time', 'H_sun'}
+        if not required_columns.issubset(columns):
+            raise ValueError(f"CSV file must contain the following columns: {required_columns}")
+
+        # Only the kept columns are parsed, one chunk at a time
+        pv_columns = [(column, name, scale, fill_value) for column, name, scale, fill_value in PV_COLUMNS if column in columns]
+        reader = pd.read_csv(meteorological_file_path, skiprows=header_row, usecols=['time', 'H_sun', *(column for column, *_ in pv_columns)],
+                             dtype={'time': str}, chunksize=chunksize, on_bad_lines='warn')
+        chunks = []
+        for chunk in reader:
+            # The PVGIS footer rows do not parse as timestamps and are dropped here
+            time = pd.to_datetime(chunk['time'], format='%Y%m%d:%H%M', errors='coerce')
+            valid = time.notna().to_numpy()
+            time = time[valid]
+            hourly_chunk = pd.DataFrame({
+                'time': time.to_numpy(),
+                'Month': time.dt.month.to_numpy(),
+                'Hour': time.dt.hour.to_numpy(),
+                'Irradiation (kW/m^2)': pd.to_numeric(chunk['H_sun'], errors='coerce').fillna(0).to_numpy(dtype=float)[valid],
+            })
+            for column, name, scale, fill_value in pv_columns:
+                hourly_chunk[name] = pd.to_numeric(chunk[column], errors='coerce').fillna(fill_value).to_numpy(dtype=float)[valid] * scale
+            chunks.append(hourly_chunk)
+        hourly_df = pd.concat(chunks, ignore_index=True)
+
+        if use_cache:
+            FileCache.store(key, 'hourly', FileCache.to_records(hourly_df))
+
+        logger.info("Read %d hourly rows from: %s", len(hourly_df), meteorological_file_path)
+        return hourly_df
+
+    def _find_header(meteorological_file_path: str):
+        """ Returns the line index and the column names of the 'time,...' header row that follows the PVGIS preamble. """
+        with open(meteorological_file_path, 'r') as f:
+            for index, line in enumerate(f):
+                if line.startswith('time'):
+                    return index, line.strip().split(',')
+        raise ValueError(f"CSV file must contain the following columns: {{'time', 'H_sun'}}")
+
+    def _accumulate(group, values, sums, compensation, observations, rows_seen):
+        """
+        Adds a chunk of values to the running per-group sums in place, in row order, using the Kahan-compensated
+        summation of pandas' groupby mean. Values are visited one rank at a time, vectorized over the groups.
+        """
+        rows_seen += np.bincount(group, minlength=len(rows_seen))
+
+        observed = ~np.isnan(values)
+        group = group[observed]
+        values = values[observed]
+        if len(values) == 0:
+            return
+
+        order = np.argsort(group, kind='stable')
+        values = values[order]
+        counts = np.bincount(group, minlength=len(sums))
+        starts = np.cumsum(counts) - counts
+        observations += counts
+
+        groups = np.flatnonzero(counts)
+        for rank in range(counts.max()):
+            groups = groups[counts[groups] > rank]
+            y = values[starts[groups] + rank] - compensation[groups]
+            t = sums[groups] + y
+            c = t - sums[groups] - y
+            # An infinite value makes the compensation NaN; pandas resets it to 0
+            compensation[groups] = np.where(np.isnan(c), 0, c)
+            sums[groups] = t
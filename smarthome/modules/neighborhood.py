@@ -0,0 +1,268 @@
+"""
+This module coordinates load shifting and battery discharge across the homes of a neighborhood so that the summed
+feeder load stays under a transformer limit. Shifting every home against its own threshold moves their flexible loads
+to the same off-peak hours and creates a new feeder peak there; here the homes share the feeder's headroom instead.
+
+Classes:
+    Neighborhood: A class containing static methods for coordinated peak shaving.
+Methods:
+    load_matrix(profiles, slots_per_hour): Builds the fixed and shiftable load matrices of many ApplianceTables.
+    coordinate(fixed_loads, shiftable_loads, feeder_limit, ...): Shifts loads and dispatches batteries under the feeder limit.
+    shift(fixed_loads, shiftable_loads, feeder_limit, peak_hours): The load shifting stage of coordinate.
+    dispatch(loads, feeder_limit, capacities, ...): The battery stage of coordinate.
+
+Usage, from the smarthome directory:
+    python -m modules.neighborhood --profiles data/load_profile_data --met data/meteorological_data/meteorological_data.csv --feeder-limit 15
+
+Coordination:
+    - Shifting: in every hour above the limit, each home gives up the same share of its shiftable load, just
+      enough to bring the feeder down to the limit. The removed energy is placed in the hours outside peak_hours
+      with the lowest feeder load, filling them up to a common level that never exceeds the limit, and every home
+      receives the same share of that fill as it gave up. Loads are shiftable under the rule of
+      Calculations.shift_loads: priority groups above 1, non-zero power and not running all day.
+    - Shifting is an energy relaxation of moving appliances: every home keeps its daily shiftable energy, but a
+      run may be split into fractions of its power over several hours, so run lengths and contiguous runs are
+      not kept. The resulting feeder load is a lower bound for what shifting whole appliance runs can reach.
+    - Batteries: hour by hour, the batteries charge from PV with the SoC bands of Battery.simulate_battery and,
+      while the feeder is still above the limit, discharge in proportion to what each can deliver (within its
+      discharge rate, down to 30% SoC and at most its own load).
+
+Every stage works on (homes, hours) matrices, so its cost is a few array operations per hour regardless of the
+number of homes; 10,000 homes coordinate in well under a second.
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from .aggregation import Aggregation
+from .calculations import PEAK_START, PEAK_END
+from .log import LOG_LEVELS, configure, get_logger, span
+from .pipeline import BATTERY_CAPACITY_RATIO, CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY
+
+logger = get_logger('neighborhood')
+
+# Columns of the hourly feeder table written by main
+FEEDER_COLUMNS = ['Hour', 'Feeder Load (kW)', 'Coordinated Feeder Load (kW)', 'Battery Discharge (kW)', 'Overload (kW)']
+
+
+class Neighborhood:
+
+    @staticmethod
+    def load_matrix(profiles, slots_per_hour: int = 1):
+        """
+        Aggregate many seasonal profiles into per-home load matrices. Battery discharge channels are ignored.
+        Appliances that Calculations.shift_loads never moves (priority group 1, zero power or running all day) are
+        fixed load.
+
+        Args:
+            profiles (list): ApplianceTables, one per home.
+            slots_per_hour (int): Resolution, e.g. 4 for 15-minute slots.
+
+        Returns:
+            tuple: Fixed load and shiftable load (kW), each with shape (homes, 24 * slots_per_hour).
+        """
+        home = np.repeat(np.arange(len(profiles)), [len(profile_df) for profile_df in profiles])
+        hour_start = np.concatenate([profile_df.start for profile_df in profiles])
+        hour_end = np.concatenate([profile_df.end for profile_df in profiles])
+        start = Aggregation.to_slots(hour_start, slots_per_hour)
+        end = Aggregation.to_slots(hour_end, slots_per_hour)
+        power = np.concatenate([profile_df.rated_power for profile_df in profiles])
+        priority = np.concatenate([profile_df.priority for profile_df in profiles]).astype(float)
+        # The eligibility rule of Calculations.shift_loads
+        fixed = (priority == 1) | (power == 0) | ((hour_start == 0) & (hour_end == 24))
+
+        slots = 24 * slots_per_hour
+        fixed_loads = Aggregation.group_load(home[fixed], start[fixed], end[fixed], power[fixed], len(profiles), slots)
+        shiftable_loads = Aggregation.group_load(home[~fixed], start[~fixed], end[~fixed], power[~fixed], len(profiles), slots)
+        return fixed_loads, shiftable_loads
+
+    @staticmethod
+    def coordinate(fixed_loads, shiftable_loads, feeder_limit: float, peak_hours=None, capacities=None, charge_rates=CHARGE_RATE,
+                   discharge_rates=DISCHARGE_RATE, initial_socs=None, solar_powers=0.0, slots_per_hour: int = 1):
+        """
+        Keep the summed load of all homes under the feeder limit, first by shifting and then with the batteries.
+
+        Args:
+            fixed_loads (ndarray): Load that cannot move (kW), shape (homes, slots).
+            shiftable_loads (ndarray): Load that may move to other slots (kW), shape (homes, slots).
+            feeder_limit (float): Transformer limit for the summed load (kW).
+            peak_hours (list): Hours shiftable load may not be moved into; defaults to PEAK_START - PEAK_END.
+            capacities (array-like): Battery capacity per home (kWh); defaults to BATTERY_CAPACITY_RATIO times the
+                home's maximum load, as Pipeline.size_battery. Pass 0 for homes without a battery.
+            charge_rates, discharge_rates, initial_socs: Scalars or arrays per home, as in Battery.simulate_scenarios;
+                initial_socs defaults to INITIAL_SOC_RATIO times the capacity, as in the pipeline.
+            solar_powers (array-like): PV output per slot (kW), shape (slots,) or (homes, slots).
+            slots_per_hour (int): Resolution of the matrices.
+
+        Returns:
+            dict: 'shifted' (shiftable load after shifting), 'discharge', 'soc' (at the start of every slot, %) and
+            'loads' (grid load per home) with shape (homes, slots), and 'original_feeder', 'feeder' and 'overload'
+            (feeder load left above the limit) with shape (slots,).
+        """
+        fixed_loads = np.asarray(fixed_loads, dtype=float)
+        shiftable_loads = np.asarray(shiftable_loads, dtype=float)
+        if peak_hours is None:
+            peak_hours = list(range(PEAK_START, PEAK_END + 1))
+        if capacities is None:
+            capacities = (fixed_loads + shiftable_loads).max(axis=1) * BATTERY_CAPACITY_RATIO
+        capacities = np.broadcast_to(np.asarray(capacities, dtype=float), (len(fixed_loads),))
+        if initial_socs is None:
+            initial_socs = capacities * INITIAL_SOC_RATIO
+
+        with span(logger, "Coordinated shifting"):
+            shifted = Neighborhood.shift(fixed_loads, shiftable_loads, feeder_limit, peak_hours, slots_per_hour)
+        loads = fixed_loads + shifted
+        with span(logger, "Coordinated battery dispatch"):
+            discharge, soc = Neighborhood.dispatch(loads, feeder_limit, capacities, charge_rates, discharge_rates, initial_socs,
+                                                   solar_powers, peak_hours, slots_per_hour)
+        loads = loads - discharge
+
+        original_feeder = (fixed_loads + shiftable_loads).sum(axis=0)
+        feeder = loads.sum(axis=0)
+        overload = np.maximum(feeder - feeder_limit, 0)
+        logger.info("Feeder peak of %d homes: %.2f kW -> %.2f kW (limit %.2f kW)", len(loads), original_feeder.max(), feeder.max(), feeder_limit)
+        return {
+            'shifted': shifted,
+            'discharge': discharge,
+            'soc': soc,
+            'loads': loads,
+            'original_feeder': original_feeder,
+            'feeder': feeder,
+            'overload': overload,
+        }
+
+    @staticmethod
+    def shift(fixed_loads, shiftable_loads, feeder_limit: float, peak_hours, slots_per_hour: int = 1):
+        """
+        Move shiftable load out of the slots where the feeder is above the limit into the least loaded slots
+        outside the peak hours, without raising any of them above the limit. Every home keeps its daily energy;
+        only the eligible loads of load_matrix belong in shiftable_loads, and moved runs are not kept whole.
+
+        Returns:
+            ndarray: Shiftable load after shifting (kW), shape (homes, slots).
+        """
+        shiftable_loads = np.asarray(shiftable_loads, dtype=float)
+        feeder = (fixed_loads + shiftable_loads).sum(axis=0)
+        flexible = shiftable_loads.sum(axis=0)
+
+        # The same share of every home's shiftable load leaves each overloaded slot
+        excess = np.maximum(feeder - feeder_limit, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share = np.where(flexible > 0, np.minimum(excess / flexible, 1), 0)
+        removed = shiftable_loads * share
+
+        # Fill the emptiest allowed slots up to a common level, at most the limit
+        allowed = ~np.isin(np.arange(feeder.shape[0]) // slots_per_hour, peak_hours) & (feeder < feeder_limit)
+        headroom = np.where(allowed, feeder_limit - feeder, 0).sum()
+        total = removed.sum()
+        if total <= 0 or headroom <= 0:
+            return shiftable_loads.copy()
+        if total > headroom:
+            # Not enough room: only move what fits, in the same proportions
+            removed *= headroom / total
+            total = headroom
+        fill = Neighborhood._fill(feeder - removed.sum(axis=0), total, feeder_limit, allowed)
+
+        # Every home receives the same share of the fill as it gave up
+        return shiftable_loads - removed + removed.sum(axis=1, keepdims=True) * (fill / fill.sum())[None, :]
+
+    @staticmethod
+    def dispatch(loads, feeder_limit: float, capacities, charge_rates=CHARGE_RATE, discharge_rates=DISCHARGE_RATE, initial_socs=None,
+                 solar_powers=0.0, peak_hours=None, slots_per_hour: int = 1):
+        """
+        Charge every battery from PV with the SoC bands of the dispatch rules and discharge them together whenever
+        the feeder is above the limit, each in proportion to what it can deliver.
+
+        Returns:
+            tuple: Arrays of battery discharge (kW) and SoC at the start of each slot (%), shape (homes, slots).
+        """
+        loads = np.asarray(loads, dtype=float)
+        homes, slots = loads.shape
+        step_hours = 1 / slots_per_hour
+        capacities, charge_rates, discharge_rates = np.broadcast_arrays(
+            *(np.broadcast_to(np.asarray(value, dtype=float), (homes,)) for value in (capacities, charge_rates, discharge_rates)))
+        soc = np.broadcast_to(np.asarray(capacities * INITIAL_SOC_RATIO if initial_socs is None else initial_socs, dtype=float), (homes,)).copy()
+        solar_powers = np.broadcast_to(np.asarray(solar_powers, dtype=float), (homes, slots))
+        is_peak = np.isin(np.arange(slots) // slots_per_hour, list(range(PEAK_START, PEAK_END + 1)) if peak_hours is None else peak_hours)
+
+        has_battery = capacities > 0
+        safe_capacities = np.where(has_battery, capacities, 1)
+        max_charge = charge_rates * capacities
+        max_discharge = discharge_rates * capacities
+        discharge_log = np.zeros((homes, slots))
+        soc_log = np.empty((homes, slots))
+
+        for slot in range(slots):
+            soc_log[:, slot] = soc
+            # Mirrors charge_battery_with_solar: up to 50% in peak hours and 80% otherwise
+            limit = 50 if is_peak[slot] else 80
+            charge = np.minimum(np.minimum(solar_powers[:, slot], max_charge) * step_hours, (limit - soc) * capacities / 100.0)
+            soc = np.where(has_battery & (charge > 0), np.clip(soc + charge / safe_capacities * 100, 0, 100), soc)
+
+            excess = loads[:, slot].sum() - feeder_limit
+            if excess <= 0:
+                continue
+            available = np.where(has_battery, np.clip(np.minimum(np.minimum(max_discharge, (soc - 30) / 100 * capacities / step_hours), loads[:, slot]), 0, None), 0)
+            supply = available.sum()
+            if supply <= 0:
+                continue
+            discharge = available * min(excess / supply, 1)
+            soc = np.where(has_battery, np.clip(soc - discharge * step_hours * 100 / safe_capacities, 0, 100), soc)
+            discharge_log[:, slot] = discharge
+
+        return discharge_log, soc_log
+
+    @staticmethod
+    def _fill(feeder, amount, feeder_limit, allowed):
+        """ Returns the load to add per slot so the allowed slots are filled from the lowest up to a common level. """
+        values = np.sort(feeder[allowed])
+        levels = (amount + np.cumsum(values)) / np.arange(1, len(values) + 1)
+        # The level is reached once it no longer exceeds the next slot's load
+        upper = np.append(values[1:], np.inf)
+        level = min(levels[np.argmax(levels <= upper)], feeder_limit)
+        return np.where(allowed, np.maximum(level - feeder, 0), 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coordinate load shifting and batteries of many homes under a feeder limit.")
+    parser.add_argument('--profiles', required=True, help="Directory of load profile .xlsx files, one per home.")
+    parser.add_argument('--met', required=True, help="Meteorological CSV file shared by every home.")
+    parser.add_argument('--feeder-limit', type=float, required=True, help="Transformer limit for the summed load (kW).")
+    parser.add_argument('--season', choices=['winter', 'summer'], default='winter', help="Season to coordinate (default: winter).")
+    parser.add_argument('--output', help="Hourly feeder CSV file (default: standard output).")
+    parser.add_argument('--log-level', type=str.upper, choices=LOG_LEVELS, default='INFO', help="Logging level (default: INFO).")
+    args = parser.parse_args(argv)
+    configure(args.log_level)
+
+    from .load_profile import ElectricLoad
+    from .met_data import MeteorologicalData
+
+    index = 0 if args.season == 'winter' else 1
+    file_names = sorted(name for name in os.listdir(args.profiles) if name.endswith('.xlsx'))
+    profiles = [ElectricLoad.from_excel(os.path.join(args.profiles, name))[index] for name in file_names]
+    meteorological_df = MeteorologicalData.from_csv(args.met)[index]
+    irradiance = np.zeros(24)
+    irradiance[meteorological_df['Hour'].to_numpy(dtype=np.int64)] = meteorological_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+
+    fixed_loads, shiftable_loads = Neighborhood.load_matrix(profiles)
+    result = Neighborhood.coordinate(fixed_loads, shiftable_loads, args.feeder_limit, solar_powers=irradiance * PANEL_AREA * PANEL_EFFICIENCY)
+
+    output_file = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(output_file, lineterminator='\n')
+        writer.writerow(FEEDER_COLUMNS)
+        for hour in range(24):
+            writer.writerow([hour, round(result['original_feeder'][hour], 3), round(result['feeder'][hour], 3),
+                             round(result['discharge'][:, hour].sum(), 3), round(result['overload'][hour], 3)])
+    finally:
+        if args.output:
+            output_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,607 @@
+"""
+This module runs the seasonal analysis pipeline without any GUI dependencies, so it can be shared by
+the tkinter application and headless batch runs.
+
+Classes:
+    Pipeline: A class containing static methods that chain battery simulation, load shifting and costing.
+Methods:
+    analyze_season(profile_df, meteorological_df, threshold, peak_hours): Runs the pipeline for one season.
+    analyze_seasons(profiles, meteorological_dfs, threshold, peak_hours, seasons): Runs the pipeline for any number of seasons as one batch.
+    analyze_home(load_profile_file_path, winter_meteorological_df, summer_meteorological_df, threshold): Runs both seasons for one home.
+    load_seasons(load_profile_file_path, meteorological_file_path, seasons): Reads the profile and meteorology of every season.
+    solar_powers(meteorological_file_path, seasons, pv_model): Returns the typical-day PV production of every season, or None.
+    analyze_season_slots(profile_df, meteorological_df, threshold, peak_hours, slots_per_hour): Runs one season at sub-hourly resolution.
+    analyze_year(profiles, hourly_df, threshold, peak_hours): Runs the battery over every hourly row of a year and prices each hour at its own day.
+    year_load(profiles, hourly_df, month_profiles): Builds the hourly load of a year from the load profile of every month.
+    size_battery, simulate_battery, shift_loads, price_profile: The individual stages of analyze_season.
+    size_batteries, simulate_batteries, season_profiles, price_seasons: The batched stages of analyze_seasons.
+    analysis_graph(): Builds the memoized stage graph used for interactive re-runs.
+
+Exceptions:
+    AnalysisCancelled: Raised by a progress callback to abort a run between stages.
+
+Constants:
+    - BATTERY_CAPACITY_RATIO: Battery capacity as a fraction of the maximum hourly load.
+    - CHARGE_RATE: Charge rate as a fraction of capacity per hour.
+    - DISCHARGE_RATE: Discharge rate as a fraction of capacity per hour.
+    - INITIAL_SOC_RATIO: Initial SoC as a fraction of capacity.
+    - PANEL_AREA: PV panel area (m^2).
+    - PANEL_EFFICIENCY: PV panel efficiency (decimal).
+    - SHIFT_METHODS: Load shifting methods accepted by analyze_season.
+    - DISPATCH_METHODS: Battery dispatch methods accepted by analyze_season.
+    - PV_MODELS: PV production models accepted by solar_powers (see pv.py).
+    - SEASON_STAGES: Stage names reported to the progress callback of analyze_season.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import SLOTS_PER_HOUR
+from .battery import Battery
+from .calculations import Calculations, PEAK_START, PEAK_END
+from .load_profile import ElectricLoad
+from .log import get_logger, span
+from .met_data import MeteorologicalData
+from .scheduler import Scheduler
+from .seasons import DEFAULT_SEASONS, MONTHLY_PROFILES
+from .stages import StageGraph
+
+logger = get_logger('pipeline')
+
+BATTERY_CAPACITY_RATIO = 0.5
+CHARGE_RATE = 0.2
+DISCHARGE_RATE = 0.3
+INITIAL_SOC_RATIO = 0.1
+PANEL_AREA = 10
+PANEL_EFFICIENCY = 0.70
+# Load shifting methods: the greedy shift_loads rule or the cost-optimal Scheduler
+SHIFT_METHODS = ('greedy', 'optimal')
+# Battery dispatch methods: the SoC band rules of simulate_battery or the cost-optimal dispatch_battery
+DISPATCH_METHODS = ('rules', 'optimal')
+# PV production models of pv.py; without one the battery charges from the sun height times panel area and efficiency
+PV_MODELS = ('irradiance', 'pvgis')
+# Stages reported to the progress callback of analyze_season, in order
+SEASON_STAGES = ["Battery simulation", "Load shifting", "Hourly profiles", "Energy costs"]
+
+
+class AnalysisCancelled(Exception):
+    """ Raised from a progress callback to stop a running analysis. """
+
+
+class Pipeline:
+
+    @staticmethod
+    def analyze_season(profile_df, meteorological_df, threshold, peak_hours, capacity=None, charge_rate=CHARGE_RATE,
+                       discharge_rate=DISCHARGE_RATE, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, tariff=None, progress=None, shift_method='greedy',
+                       dispatch='rules', solar_power=None, season=None):
+        """
+        Size a battery for the profile, simulate it, shift loads and price the original, battery and shifted profiles.
+
+        Parameters:
+        - profile_df: ApplianceTable containing the seasonal load profile of appliances.
+        - meteorological_df: DataFrame with the seasonal hourly average irradiation.
+        - threshold: Maximum allowable load in any hour.
+        - peak_hours: List of hours considered as peak hours.
+        - capacity: Battery capacity (kWh); defaults to BATTERY_CAPACITY_RATIO times the maximum hourly load.
+        - charge_rate, discharge_rate, panel_area, panel_efficiency: Battery and PV parameters.
+        - tariff: Tariff schedule used for the costs; defaults to the standard peak/mid-peak/off-peak bands.
+        - progress: Optional callable, called with the name of every stage in SEASON_STAGES before it starts.
+          It may raise AnalysisCancelled to abort the run.
+        - shift_method: 'greedy' for Calculations.shift_loads or 'optimal' for Scheduler.schedule.
+        - dispatch: 'rules' for Battery.simulate_battery or 'optimal' for Battery.dispatch_battery.
+        - solar_power: Optional PV production of every hour of the day (kW), e.g. from PV.seasonal_from_csv, charging
+          the battery instead of the irradiation times panel_area and panel_efficiency.
+        - season: Optional Season definition; its months and weekdays select the prices of the day, as in analyze_seasons.
+
+        Returns:
+        - Dictionary with the hourly profiles, SoC DataFrame, maximum load and the three costs.
+        """
+        max_rated_power, default_capacity = Pipeline.size_battery(profile_df)
+        if capacity is None:
+            capacity = default_capacity
+
+        report = progress or (lambda stage: None)
+
+        report("Battery simulation")
+        with span(logger, "Battery simulation"):
+            battery_profile_df, soc_df = Pipeline.simulate_battery(profile_df, meteorological_df, threshold, peak_hours, capacity,
+                                                                   charge_rate, discharge_rate, panel_area, panel_efficiency, dispatch, tariff, solar_power,
+                                                                   season)
+        report("Load shifting")
+        with span(logger, "Load shifting"):
+            shifted_profile_df = Pipeline.shift_loads(battery_profile_df, threshold, peak_hours, shift_method, tariff)
+
+        report("Hourly profiles")
+        with span(logger, "Hourly profiles"):
+            original_hourly = Calculations.generate_adjusted_profile(profile_df)
+            battery_hourly = Calculations.generate_adjusted_profile(profile_df, battery_profile_df)
+            shifted_hourly = Calculations.generate_adjusted_profile(shifted_profile_df, battery_profile_df)
+
+        report("Energy costs")
+        months, weekdays = (season.months, season.weekdays) if season is not None else (None, None)
+        with span(logger, "Energy costs"):
+            original_cost = Calculations.calculate_energy_cost(original_hourly, peak_hours, tariff, months, weekdays)
+            battery_cost = Calculations.calculate_energy_cost(battery_hourly, peak_hours, tariff, months, weekdays)
+            shifted_cost = Calculations.calculate_energy_cost(shifted_hourly, peak_hours, tariff, months, weekdays)
+
+        return {
+            'max_load': max_rated_power,
+            'capacity': capacity,
+            'battery_profile': battery_profile_df,
+            'shifted_profile': shifted_profile_df,
+            'original_hourly': original_hourly,
+            'battery_hourly': battery_hourly,
+            'shifted_hourly': shifted_hourly,
+            'soc': soc_df,
+            'original_cost': original_cost,
+            'battery_cost': battery_cost,
+            'shifted_cost': shifted_cost,
+        }
+
+    @staticmethod
+    def analyze_seasons(profiles, meteorological_dfs, threshold, peak_hours, seasons=None, capacity=None, charge_rate=CHARGE_RATE,
+                        discharge_rate=DISCHARGE_RATE, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, tariff=None, progress=None,
+                        shift_method='greedy', dispatch='rules', solar_powers=None):
+        """
+        Run analyze_season for any number of seasons as one batched computation over a season axis.
+
+        The battery of every season is sized and simulated in one call of Battery.simulate_scenarios (or
+        optimal_dispatch), and the original, battery and shifted profiles of all seasons are priced in one array
+        operation; only load shifting, which is sequential, runs per season. Every season gives the same result
+        as analyze_season on its own.
+
+        Parameters:
+        - profiles: ApplianceTables, one per season.
+        - meteorological_dfs: DataFrames with the hourly average irradiation, one per season (see MeteorologicalData.seasonal_from_csv).
+        - threshold, peak_hours, capacity, charge_rate, discharge_rate, panel_area, panel_efficiency, tariff, shift_method, dispatch: As in analyze_season.
+        - seasons: Optional Season definitions; their months and weekdays select the days each season is priced at.
+        - progress: Optional callable, called with the name of every stage in SEASON_STAGES before it starts, once for all seasons.
+        - solar_powers: Optional PV production (kW) with shape (seasons, 24), as solar_power of analyze_season.
+
+        Returns:
+        - List of dictionaries in the format of analyze_season, one per season.
+        """
+        report = progress or (lambda stage: None)
+        max_loads, capacities = Pipeline.size_batteries(profiles)
+        if capacity is not None:
+            capacities = np.broadcast_to(np.asarray(capacity, dtype=float), capacities.shape)
+
+        report("Battery simulation")
+        with span(logger, "Battery simulation"):
+            batteries = Pipeline.simulate_batteries(profiles, meteorological_dfs, threshold, peak_hours, capacities, charge_rate,
+                                                    discharge_rate, panel_area, panel_efficiency, dispatch, tariff, seasons, solar_powers)
+        report("Load shifting")
+        with span(logger, "Load shifting"):
+            shifted_profiles = [Pipeline.shift_loads(battery[0], threshold, peak_hours, shift_method, tariff) for battery in batteries]
+
+        report("Hourly profiles")
+        with span(logger, "Hourly profiles"):
+            hourly = Pipeline.season_profiles(profiles, batteries, shifted_profiles)
+
+        report("Energy costs")
+        with span(logger, "Energy costs"):
+            costs = Pipeline.price_seasons(hourly, peak_hours, tariff, seasons)
+
+        return Pipeline._season_results((max_loads, capacities), batteries, shifted_profiles, hourly, costs)
+
+    @staticmethod
+    def analyze_season_slots(profile_df, meteorological_df, threshold, peak_hours, slots_per_hour, capacity=None, charge_rate=CHARGE_RATE,
+                             discharge_rate=DISCHARGE_RATE, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, tariff=None):
+        """
+        Run the seasonal pipeline at sub-hourly resolution, e.g. slots_per_hour=4 for 15-minute slots.
+
+        Appliance windows are converted to integer slot indices and aggregated with prefix sums, the battery
+        steps once per slot with slot-length energy limits, and loads are rescheduled with Scheduler on the
+        slot grid (the greedy shift_loads rule is hour-based). The battery discharge channel holds one value
+        per slot; as in analyze_season, the shifted load keeps the channel and is adjusted by the discharge once more.
+
+        Parameters:
+        - profile_df: ApplianceTable containing the seasonal load profile; usage windows in decimal hours.
+        - meteorological_df: DataFrame with the seasonal hourly average irradiation; each hour's value holds for all its slots.
+        - threshold: Maximum allowable load in any slot.
+        - peak_hours: List of hours considered as peak hours.
+        - slots_per_hour: Resolution; one of the values of SLOTS_PER_HOUR.
+        - capacity, charge_rate, discharge_rate, panel_area, panel_efficiency, tariff: As in analyze_season.
+
+        Returns:
+        - Dictionary with 'hours' (start of every slot in decimal hours), the original, battery and shifted
+          load arrays, 'discharge' and 'soc' arrays, the shifted profile and the three costs.
+        """
+        if slots_per_hour not in SLOTS_PER_HOUR.values():
+            raise ValueError(f"Unsupported resolution: {slots_per_hour} slots per hour; expected one of {sorted(SLOTS_PER_HOUR.values())}")
+        slots = 24 * slots_per_hour
+        hour_of_day = np.arange(slots) // slots_per_hour
+
+        load = profile_df.load(slots_per_hour)
+        max_load = load.max()
+        if capacity is None:
+            capacity = max_load * BATTERY_CAPACITY_RATIO
+        logger.info("Max load set to: %s", max_load)
+
+        irradiance = np.zeros(24)
+        irradiance[meteorological_df['Hour'].to_numpy(dtype=np.int64)] = meteorological_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+
+        battery = Battery(
+            capacity=capacity,
+            charge_rate=charge_rate,
+            discharge_rate=discharge_rate,
+            soc=capacity * INITIAL_SOC_RATIO,
+            panel_area=panel_area,
+            panel_efficiency=panel_efficiency,
+        )
+        with span(logger, "Battery simulation"):
+            discharge, soc = battery.simulate_series(load, irradiance[hour_of_day], hour_of_day, threshold, peak_hours, 1 / slots_per_hour)
+        with span(logger, "Load shifting"):
+            shifted_profile_df = Scheduler.schedule(profile_df.copy().with_discharge(discharge), threshold, peak_hours, tariff, slots_per_hour=slots_per_hour)
+            shifted_load = shifted_profile_df.load(slots_per_hour) - discharge
+
+        with span(logger, "Energy costs"):
+            battery_load = load - discharge
+            original_cost, battery_cost, shifted_cost = Calculations.calculate_slot_costs(
+                np.stack([load, battery_load, shifted_load]), peak_hours, slots_per_hour, tariff)
+
+        return {
+            'max_load': max_load,
+            'capacity': capacity,
+            'hours': np.arange(slots) / slots_per_hour,
+            'shifted_profile': shifted_profile_df,
+            'original_load': load,
+            'battery_load': battery_load,
+            'shifted_load': shifted_load,
+            'discharge': discharge,
+            'soc': soc,
+            'original_cost': original_cost,
+            'battery_cost': battery_cost,
+            'shifted_cost': shifted_cost,
+        }
+
+    @staticmethod
+    def analyze_year(profiles, hourly_df, threshold, peak_hours, capacity=None, charge_rate=CHARGE_RATE, discharge_rate=DISCHARGE_RATE,
+                     panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, tariff=None, month_profiles=None, solar_power=None):
+        """
+        Run the battery rules over every hourly row of a meteorological series (e.g. a full 8760-hour year), carrying
+        the SoC across days, and price the original and battery load.
+
+        Every hour is priced at its own month, weekday and hour of day, so month- and weekday-dependent tariffs
+        apply where they hold instead of being averaged over the year.
+
+        Parameters:
+        - profiles: One ApplianceTable used all year, or a dictionary of tables by profile name (e.g. the 'Winter'
+          and 'Summer' tables of ElectricLoad.from_excel) used in the months of month_profiles.
+        - hourly_df: Hourly rows, as from MeteorologicalData.hourly_from_csv.
+        - threshold, peak_hours, charge_rate, discharge_rate, panel_area, panel_efficiency, tariff: As in analyze_season.
+        - capacity: Battery capacity (kWh); defaults to BATTERY_CAPACITY_RATIO times the highest hourly load of the year.
+        - month_profiles: Profile name of every month (1-12); defaults to MONTHLY_PROFILES.
+        - solar_power: Optional PV production of every row (kW), e.g. a row of PV.from_csv, used instead of the irradiation.
+
+        Returns:
+        - Dictionary with the maximum load, the capacity, the 'time', 'original_load', 'battery_load', 'discharge' and
+          'soc' arrays (one entry per row) and the original and battery costs of the series.
+        """
+        load = Pipeline.year_load(profiles, hourly_df, month_profiles)
+        max_load = load.max()
+        if capacity is None:
+            capacity = max_load * BATTERY_CAPACITY_RATIO
+        logger.info("Max load set to: %s", max_load)
+
+        time = pd.DatetimeIndex(hourly_df['time'])
+        hour_of_day = hourly_df['Hour'].to_numpy(dtype=np.int64)
+        month = hourly_df['Month'].to_numpy(dtype=np.int64)
+        weekday = time.dayofweek.to_numpy()
+        battery = Battery(capacity, charge_rate, discharge_rate, capacity * INITIAL_SOC_RATIO, panel_area, panel_efficiency)
+        with span(logger, "Battery simulation"):
+            discharge, soc = battery.simulate_series(load, hourly_df['Irradiation (kW/m^2)'].to_numpy(dtype=float), hour_of_day,
+                                                     threshold, peak_hours, solar_power=solar_power)
+
+        with span(logger, "Energy costs"):
+            battery_load = load - discharge
+            original_cost = Calculations.calculate_annual_cost(load, hour_of_day, peak_hours, tariff, month, weekday)
+            battery_cost = Calculations.calculate_annual_cost(battery_load, hour_of_day, peak_hours, tariff, month, weekday)
+
+        return {
+            'max_load': max_load,
+            'capacity': capacity,
+            'time': time,
+            'original_load': load,
+            'battery_load': battery_load,
+            'discharge': discharge,
+            'soc': soc,
+            'original_cost': original_cost,
+            'battery_cost': battery_cost,
+        }
+
+    @staticmethod
+    def year_load(profiles, hourly_df, month_profiles=None):
+        """
+        Build the load of every hourly row of a meteorological series from the daily load of its month's profile.
+
+        Parameters:
+        - profiles: One ApplianceTable used all year, or a dictionary of tables by profile name (see analyze_year).
+        - hourly_df: Hourly rows with 'Month' and 'Hour' columns, as from MeteorologicalData.hourly_from_csv.
+        - month_profiles: Profile name of every month (1-12); defaults to MONTHLY_PROFILES.
+
+        Returns:
+        - Array of the load of every row (kW).
+        """
+        month = hourly_df['Month'].to_numpy(dtype=np.int64)
+        hour_of_day = hourly_df['Hour'].to_numpy(dtype=np.int64)
+        if not isinstance(profiles, dict):
+            return np.asarray(profiles.load())[hour_of_day]
+        month_profiles = month_profiles or MONTHLY_PROFILES
+        names = list(profiles)
+        daily = np.stack([profiles[name].load() for name in names])
+        profile_of_month = np.array([0] + [names.index(month_profiles[m]) for m in range(1, 13)])
+        return daily[profile_of_month[month], hour_of_day]
+
+    @staticmethod
+    def size_battery(profile_df):
+        """
+        Size the battery of a seasonal profile.
+
+        Returns:
+        - Tuple of the maximum hourly load (kW) and the default capacity, BATTERY_CAPACITY_RATIO times that load (kWh).
+        """
+        hourly = Calculations.generate_hourly_profile(profile_df)
+        max_rated_power = max(hourly['Power (kW)'])  # Get the maximum rated power
+        logger.info("Max load set to: %s", max_rated_power)
+        return max_rated_power, max_rated_power * BATTERY_CAPACITY_RATIO
+
+    @staticmethod
+    def size_batteries(profiles):
+        """
+        Size the batteries of several seasonal profiles at once.
+
+        Returns:
+        - Tuple of arrays of the maximum hourly loads (kW) and the default capacities (kWh), one entry per profile.
+        """
+        max_loads = np.stack([profile_df.load() for profile_df in profiles]).max(axis=1)
+        logger.info("Max loads set to: %s", max_loads.tolist())
+        return max_loads, max_loads * BATTERY_CAPACITY_RATIO
+
+    @staticmethod
+    def simulate_battery(profile_df, meteorological_df, threshold, peak_hours, capacity, charge_rate=CHARGE_RATE,
+                         discharge_rate=DISCHARGE_RATE, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, dispatch='rules', tariff=None,
+                         solar_power=None, season=None):
+        """
+        Simulate a freshly charged battery (INITIAL_SOC_RATIO of its capacity) over one seasonal day.
+
+        Parameters:
+        - dispatch: 'rules' follows the SoC bands of Battery.simulate_battery; 'optimal' plans the day with
+          Battery.dispatch_battery, minimizing the cost under tariff with the threshold as a grid load limit.
+        - solar_power: Optional PV production of every hour (kW), used instead of the irradiation of meteorological_df.
+        - season: Optional Season definition, whose months and weekdays select the prices of optimal dispatch.
+
+        Returns:
+        - Tuple of the profile with the battery discharge channel and the SoC DataFrame, as Battery.simulate_battery.
+        """
+        battery = Battery(
+            capacity=capacity,
+            charge_rate=charge_rate,
+            discharge_rate=discharge_rate,
+            soc=capacity * INITIAL_SOC_RATIO,
+            panel_area=panel_area,
+            panel_efficiency=panel_efficiency,
+        )
+        if dispatch not in DISPATCH_METHODS:
+            raise ValueError(f"Unknown dispatch method {dispatch!r}; expected one of {DISPATCH_METHODS}")
+        if dispatch == 'optimal':
+            prices = Pipeline.season_tariffs(peak_hours, tariff, None if season is None else [season])[0]
+            return battery.dispatch_battery(profile_df, meteorological_df, prices, threshold, solar_power=solar_power)
+        if solar_power is not None:
+            # The same rules as simulate_battery, stepping over the given production
+            discharge, soc = battery.simulate_series(profile_df.load(), None, np.arange(24), threshold, peak_hours, solar_power=solar_power)
+            return Battery.update_profile(profile_df, discharge), pd.DataFrame({'Hour': np.arange(24), 'State of Charge (%)': soc})
+        return battery.simulate_battery(profile_df, meteorological_df, threshold, peak_hours)
+
+    @staticmethod
+    def simulate_batteries(profiles, meteorological_dfs, threshold, peak_hours, capacities, charge_rate=CHARGE_RATE, discharge_rate=DISCHARGE_RATE,
+                           panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, dispatch='rules', tariff=None, seasons=None, solar_powers=None):
+        """
+        Simulate the freshly charged battery of every seasonal day in one call, with the seasons on the scenario axis.
+
+        Parameters:
+        - capacities: Battery capacity of every season (kWh).
+        - seasons: Optional Season definitions, whose months and weekdays select the prices of optimal dispatch.
+        - solar_powers: Optional PV production (kW) with shape (seasons, 24), used instead of the irradiation.
+
+        Returns:
+        - List of (profile with the battery discharge channel, SoC DataFrame) tuples, as simulate_battery.
+        """
+        if dispatch not in DISPATCH_METHODS:
+            raise ValueError(f"Unknown dispatch method {dispatch!r}; expected one of {DISPATCH_METHODS}")
+        capacities = np.asarray(capacities, dtype=float)
+        loads = np.stack([profile_df.load() for profile_df in profiles])
+        irradiance = np.zeros((len(profiles), 24))
+        for index, meteorological_df in enumerate(meteorological_dfs):
+            irradiance[index, meteorological_df['Hour'].to_numpy(dtype=np.int64)] = meteorological_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+        initial_socs = capacities * INITIAL_SOC_RATIO
+
+        if dispatch == 'optimal':
+            prices = Pipeline.season_tariffs(peak_hours, tariff, seasons, len(profiles))
+            discharge, soc = Battery.optimal_dispatch(loads, irradiance, prices, capacities, charge_rate, discharge_rate, initial_socs,
+                                                      panel_area, panel_efficiency, threshold, solar_powers=solar_powers)
+            soc = soc[:, :-1]
+        else:
+            discharge, soc = Battery.simulate_scenarios(loads, irradiance, np.arange(24), threshold, capacities, charge_rate, discharge_rate,
+                                                        initial_socs, panel_area, panel_efficiency, peak_hours, solar_powers)
+        return [(Battery.update_profile(profile_df, discharge[index]), pd.DataFrame({'Hour': np.arange(24), 'State of Charge (%)': soc[index]}))
+                for index, profile_df in enumerate(profiles)]
+
+    @staticmethod
+    def shift_loads(battery_profile_df, threshold, peak_hours, method='greedy', tariff=None):
+        """
+        Shift loads of a profile with a battery discharge channel, leaving the input untouched.
+
+        Parameters:
+        - method: 'greedy' moves peak-hour appliances after the peak (Calculations.shift_loads); 'optimal' places
+          every shiftable appliance to minimize cost under the threshold (Scheduler.schedule, priced with tariff).
+        """
+        if method not in SHIFT_METHODS:
+            raise ValueError(f"Unknown shift method {method!r}; expected one of {SHIFT_METHODS}")
+        # Both edit the usage windows of their input in place, and the battery profile shares them with the input profile
+        if method == 'optimal':
+            return Scheduler.schedule(battery_profile_df.copy(), threshold, peak_hours, tariff)
+        return Calculations.shift_loads(battery_profile_df.copy(), threshold, peak_hours)
+
+    @staticmethod
+    def price_profile(profile_df, peak_hours, battery_profile_df=None, tariff=None):
+        """
+        Aggregate a profile, net of the battery discharge channel of battery_profile_df if given, and price it.
+
+        Returns:
+        - Tuple of the hourly profile DataFrame and its energy cost.
+        """
+        hourly = Calculations.generate_adjusted_profile(profile_df, battery_profile_df)
+        return hourly, Calculations.calculate_energy_cost(hourly, peak_hours, tariff)
+
+    @staticmethod
+    def season_profiles(profiles, batteries, shifted_profiles):
+        """ Returns the (original, battery, shifted) hourly profile DataFrames of every season. """
+        return [(Calculations.generate_adjusted_profile(profile_df),
+                 Calculations.generate_adjusted_profile(profile_df, battery[0]),
+                 Calculations.generate_adjusted_profile(shifted_profile_df, battery[0]))
+                for profile_df, battery, shifted_profile_df in zip(profiles, batteries, shifted_profiles)]
+
+    @staticmethod
+    def price_seasons(hourly, peak_hours, tariff=None, seasons=None):
+        """
+        Price the hourly profiles of every season in one array operation, accumulating the hourly costs in the
+        same order as Calculations.calculate_energy_cost.
+
+        Parameters:
+        - hourly: Hourly profile DataFrames per season, as returned by season_profiles.
+        - seasons: Optional Season definitions; their months and weekdays select the prices of each season.
+
+        Returns:
+        - Array of costs with shape (seasons, profiles per season).
+        """
+        loads = np.array([[profile['Power (kW)'].to_numpy(dtype=float)[:24] for profile in season] for season in hourly])
+        prices = Pipeline.season_tariffs(peak_hours, tariff, seasons, len(hourly))
+        return np.round(np.cumsum(loads * prices[:, None, :], axis=-1)[..., -1], 2)
+
+    @staticmethod
+    def season_tariffs(peak_hours, tariff=None, seasons=None, count=1):
+        """ Returns the hourly prices of every season with shape (seasons, 24); without seasons, count rows of all-year prices. """
+        if seasons is None:
+            return np.tile(Calculations.hourly_tariffs(np.arange(24), peak_hours, tariff), (count, 1))
+        return np.stack([Calculations.hourly_tariffs(np.arange(24), peak_hours, tariff, season.months, season.weekdays) for season in seasons])
+
+    @staticmethod
+    def analysis_graph(seasons=DEFAULT_SEASONS):
+        """
+        Build the memoized stage graph of a home analysis, as run by the GUI.
+
+        Run parameters:
+        - load_profile_file_path, meteorological_file_path: Input files; editing either invalidates its stages.
+        - threshold: Maximum allowable load in any hour.
+        - peak_hours: List of hours considered as peak hours.
+        - tariff: Tariff schedule, or None for the standard bands.
+        - shift_method: One of SHIFT_METHODS.
+        - dispatch: One of DISPATCH_METHODS.
+        - pv_model: One of PV_MODELS, or None to charge from the irradiation (see solar_powers).
+
+        Targets:
+        - One per season, named after it ('winter' and 'summer' by default): Result dictionaries in the format of analyze_season.
+        - 'meteorology': Tuple of the hourly average irradiation of every season.
+
+        Every stage runs for all seasons at once, as in analyze_seasons. Only the battery, shifting and costing
+        stages depend on the threshold, so changing it alone skips the file parsing and battery sizing.
+        """
+        profile_names = list(dict.fromkeys(season.profile for season in seasons))
+        graph = StageGraph()
+        graph.add('load_profile', lambda load_profile_file_path: ElectricLoad.from_excel(load_profile_file_path, profiles=profile_names),
+                  files=['load_profile_file_path'])
+        graph.add('meteorology', lambda meteorological_file_path: tuple(MeteorologicalData.seasonal_from_csv(meteorological_file_path, seasons)),
+                  files=['meteorological_file_path'])
+        graph.add('profiles', lambda tables: [tables[profile_names.index(season.profile)] for season in seasons], inputs=['load_profile'])
+        graph.add('solar', lambda meteorological_file_path, pv_model: Pipeline.solar_powers(meteorological_file_path, seasons, pv_model),
+                  params=['pv_model'], files=['meteorological_file_path'])
+        graph.add('sizing', Pipeline.size_batteries, inputs=['profiles'])
+        graph.add('battery',
+                  lambda profiles, meteorology, sizing, solar, threshold, peak_hours, dispatch, tariff:
+                      Pipeline.simulate_batteries(profiles, meteorology, threshold, peak_hours, sizing[1], dispatch=dispatch, tariff=tariff, seasons=seasons,
+                                                  solar_powers=solar),
+                  inputs=['profiles', 'meteorology', 'sizing', 'solar'], params=['threshold', 'peak_hours', 'dispatch', 'tariff'])
+        graph.add('shifting',
+                  lambda batteries, threshold, peak_hours, shift_method, tariff:
+                      [Pipeline.shift_loads(battery[0], threshold, peak_hours, shift_method, tariff) for battery in batteries],
+                  inputs=['battery'], params=['threshold', 'peak_hours', 'shift_method', 'tariff'])
+        graph.add('hourly profiles', Pipeline.season_profiles, inputs=['profiles', 'battery', 'shifting'])
+        graph.add('costs', lambda hourly, peak_hours, tariff: Pipeline.price_seasons(hourly, peak_hours, tariff, seasons),
+                  inputs=['hourly profiles'], params=['peak_hours', 'tariff'])
+        graph.add('results', Pipeline._season_results, inputs=['sizing', 'battery', 'shifting', 'hourly profiles', 'costs'])
+        for index, season in enumerate(seasons):
+            graph.add(season.name, lambda results, index=index: results[index], inputs=['results'])
+        return graph
+
+    @staticmethod
+    def _season_results(sizing, batteries, shifted_profiles, hourly, costs):
+        """ Assemble the batched stage results into one dictionary per season, in the format of analyze_season. """
+        return [{
+            'max_load': sizing[0][index],
+            'capacity': sizing[1][index],
+            'battery_profile': batteries[index][0],
+            'shifted_profile': shifted_profiles[index],
+            'original_hourly': hourly[index][0],
+            'battery_hourly': hourly[index][1],
+            'shifted_hourly': hourly[index][2],
+            'soc': batteries[index][1],
+            'original_cost': costs[index, 0],
+            'battery_cost': costs[index, 1],
+            'shifted_cost': costs[index, 2],
+        } for index in range(len(batteries))]
+
+    @staticmethod
+    def load_seasons(load_profile_file_path, meteorological_file_path, seasons=DEFAULT_SEASONS, use_cache=True):
+        """
+        Read the load profile and the typical meteorological day of every season.
+
+        Returns:
+        - Tuple of the list of ApplianceTables and the list of irradiation DataFrames, one entry per season.
+        """
+        profile_names = list(dict.fromkeys(season.profile for season in seasons))
+        tables = ElectricLoad.from_excel(load_profile_file_path, use_cache=use_cache, profiles=profile_names)
+        profiles = [tables[profile_names.index(season.profile)] for season in seasons]
+        return profiles, MeteorologicalData.seasonal_from_csv(meteorological_file_path, seasons, use_cache=use_cache)
+
+    @staticmethod
+    def solar_powers(meteorological_file_path, seasons=DEFAULT_SEASONS, pv_model=None, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY,
+                     use_cache=True):
+        """
+        Model the PV production of a typical day per season from the PVGIS irradiance and temperature columns.
+
+        Parameters:
+        - pv_model: One of PV_MODELS, or None to keep charging the battery from the irradiation of the seasonal data.
+
+        Returns:
+        - Array of PV production (kW) with shape (seasons, 24), to pass as solar_powers, or None without a model.
+        """
+        if pv_model is None:
+            return None
+        if pv_model not in PV_MODELS:
+            raise ValueError(f"Unknown PV model {pv_model!r}; expected one of {PV_MODELS}")
+        # Imported here because pv.py imports this module for the panel defaults
+        from .pv import PV
+        return PV.seasonal_from_csv(meteorological_file_path, seasons, panel_area, panel_efficiency, pv_model, use_cache=use_cache)
+
+    @staticmethod
+    def analyze_home(load_profile_file_path, winter_meteorological_df, summer_meteorological_df, threshold):
+        """
+        Run the winter and summer pipelines for one load profile file.
+
+        Parameters:
+        - load_profile_file_path: Path of the load profile Excel file.
+        - winter_meteorological_df: DataFrame with the winter hourly average irradiation.
+        - summer_meteorological_df: DataFrame with the summer hourly average irradiation.
+        - threshold: Maximum allowable load in any hour.
+
+        Returns:
+        - Tuple of the winter and summer result dictionaries from analyze_season.
+        """
+        peak_hours = list(range(PEAK_START, PEAK_END + 1))
+        with span(logger, "Load profile parsing"):
+            winter_profile_df, summer_profile_df = ElectricLoad.from_excel(load_profile_file_path)
+
+        winter, summer = Pipeline.analyze_seasons([winter_profile_df, summer_profile_df], [winter_meteorological_df, summer_meteorological_df],
+                                                  threshold, peak_hours, DEFAULT_SEASONS)
+        return winter, summer
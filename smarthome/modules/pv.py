@@ -0,0 +1,170 @@
+"""
+This module models the hourly output of PV panels over a full meteorological year, for many panel
+configurations at once.
+
+Classes:
+    PV: A class containing static methods for PV production.
+Methods:
+    production(hourly_df, panel_areas, panel_efficiencies, model, ...): Returns hourly production per configuration.
+    from_csv(meteorological_file_path, panel_areas, panel_efficiencies, model, ...): Reads a PVGIS file and returns its hourly rows and production, cached per file and configuration.
+    nominal_power(meteorological_file_path): Reads the kWp of the PVGIS reference system from the file header.
+    seasonal(hourly_df, production, seasons): Averages production into a typical day per season.
+    seasonal_from_csv(meteorological_file_path, seasons, panel_area, panel_efficiency, model): Returns the typical-day production of one configuration per season.
+
+Models:
+    - irradiance: Plane-of-array irradiance G(i) times panel area and efficiency, derated for cell temperature,
+      which is estimated from the air temperature T2m and the irradiance with the NOCT model.
+    - pvgis: The PVGIS power column P, scaled from the reference system to the kWp of each configuration
+      (panel area * efficiency * 1 kW/m^2), or used as is when no nominal power is known.
+
+Every configuration is one row of the result, so a whole grid of panel areas and efficiencies costs a few array
+operations over the year. The rows can be passed to Battery.simulate_series / simulate_scenarios / optimal_dispatch
+as solar power instead of irradiance, and the pipeline takes them as solar_power (Pipeline.analyze_year) or, averaged
+per season, as solar_powers (Pipeline.analyze_seasons).
+"""
+
+import hashlib
+
+import numpy as np
+
+from .cache import FileCache
+from .log import get_logger
+from .met_data import MeteorologicalData
+from .pipeline import PANEL_AREA, PANEL_EFFICIENCY, PV_MODELS
+from .seasons import DEFAULT_SEASONS
+
+logger = get_logger('pv')
+
+# Power temperature coefficient of crystalline silicon panels (1/C)
+TEMPERATURE_COEFFICIENT = -0.004
+# Nominal operating cell temperature, reached at 0.8 kW/m^2 and 20 C air temperature (C)
+NOCT = 45.0
+# Standard test conditions
+STC_TEMPERATURE = 25.0  # C
+STC_IRRADIANCE = 1.0  # kW/m^2
+# Header line of PVGIS files that holds the kWp of the reference system
+NOMINAL_POWER_LABEL = 'Nominal power of the PV system'
+
+
+class PV:
+
+    @staticmethod
+    def production(hourly_df, panel_areas=PANEL_AREA, panel_efficiencies=PANEL_EFFICIENCY, model='irradiance',
+                   temperature_coefficients=TEMPERATURE_COEFFICIENT, noct=NOCT, nominal_power=None):
+        """
+        Compute the hourly PV production of one or more panel configurations.
+
+        Args:
+            hourly_df (DataFrame): Hourly rows from MeteorologicalData.hourly_from_csv.
+            panel_areas, panel_efficiencies, temperature_coefficients, noct: Scalars or arrays broadcast against
+                each other and flattened into the configuration axis, e.g. areas[:, None] and efficiencies for a grid.
+            model (str): One of PV_MODELS.
+            nominal_power (float): kWp of the PVGIS reference system; only used by the 'pvgis' model.
+
+        Returns:
+            ndarray: Production (kW) with shape (configurations, hours).
+        """
+        if model not in PV_MODELS:
+            raise ValueError(f"Unknown PV model: {model!r}. Expected one of {PV_MODELS}")
+        panel_areas, panel_efficiencies, temperature_coefficients, noct = (value.ravel() for value in np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (panel_areas, panel_efficiencies, temperature_coefficients, noct))
+        ))
+        peak_power = (panel_areas * panel_efficiencies * STC_IRRADIANCE)[:, None]  # kWp per configuration
+
+        if model == 'pvgis':
+            power = PV._column(hourly_df, 'PV Power (kW)')[None, :]
+            if nominal_power is None:
+                return np.repeat(power, len(peak_power), axis=0)
+            return power * (peak_power / nominal_power)
+
+        irradiance = PV._column(hourly_df, 'Irradiance (kW/m^2)')[None, :]
+        temperature = PV._column(hourly_df, 'Temperature (C)')[None, :]
+        cell_temperature = temperature + (noct[:, None] - 20) / 0.8 * irradiance
+        derating = 1 + temperature_coefficients[:, None] * (cell_temperature - STC_TEMPERATURE)
+        return np.maximum(irradiance / STC_IRRADIANCE * peak_power * derating, 0)
+
+    @staticmethod
+    def from_csv(meteorological_file_path: str, panel_areas=PANEL_AREA, panel_efficiencies=PANEL_EFFICIENCY, model='irradiance',
+                 temperature_coefficients=TEMPERATURE_COEFFICIENT, noct=NOCT, use_cache: bool = True):
+        """
+        Read a PVGIS CSV file and compute the production of every configuration. Production is cached on disk
+        per file content and configuration (see cache.py), so repeated battery simulations skip the model.
+
+        Args:
+            meteorological_file_path (str): PVGIS hourly CSV file.
+            panel_areas, panel_efficiencies, model, temperature_coefficients, noct: As in production.
+            use_cache (bool): Whether the hourly rows and the production may be read from and written to the cache.
+
+        Returns:
+            tuple: The hourly DataFrame and the production (kW) with shape (configurations, hours).
+        """
+        hourly_df = MeteorologicalData.hourly_from_csv(meteorological_file_path, use_cache=use_cache)
+        config = [value.ravel() for value in np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (panel_areas, panel_efficiencies, temperature_coefficients, noct))
+        )]
+        product = f"pv-{model}-{hashlib.sha256(np.stack(config).tobytes()).hexdigest()[:16]}"
+        if use_cache:
+            key = FileCache.key(meteorological_file_path)
+            cached = FileCache.load(key, product)
+            if cached is not None:
+                return hourly_df, np.array(cached)
+
+        nominal_power = PV.nominal_power(meteorological_file_path) if model == 'pvgis' else None
+        production = PV.production(hourly_df, *config[:2], model, *config[2:], nominal_power=nominal_power)
+        logger.info("Computed %s PV production of %d configurations over %d hours", model, len(production), production.shape[1])
+
+        if use_cache:
+            FileCache.store(key, product, production)
+        return hourly_df, production
+
+    @staticmethod
+    def nominal_power(meteorological_file_path: str):
+        """ Returns the kWp of the reference system from the PVGIS header, or None if the file does not state it. """
+        with open(meteorological_file_path, 'r') as f:
+            for line in f:
+                if line.startswith('time'):
+                    break
+                if line.startswith(NOMINAL_POWER_LABEL):
+                    try:
+                        return float(line.rsplit(':', 1)[1])
+                    except (IndexError, ValueError):
+                        return None
+        return None
+
+    @staticmethod
+    def seasonal(hourly_df, production, seasons=DEFAULT_SEASONS):
+        """
+        Average the production into a typical day per season, like MeteorologicalData.seasonal_from_csv.
+
+        Returns:
+            tuple: Production (kW) of every season, each with shape (configurations, 24); winter and summer by default.
+        """
+        month = hourly_df['Month'].to_numpy()
+        weekday = hourly_df['time'].dt.dayofweek.to_numpy()
+        hour = hourly_df['Hour'].to_numpy(dtype=np.int64)
+        production = np.asarray(production, dtype=float)
+
+        def season_profile(season):
+            mask = np.isin(month, season.months) & np.isin(weekday, season.weekdays or range(7))
+            one_hot = hour[mask, None] == np.arange(24)[None, :]
+            return production[:, mask] @ one_hot / np.maximum(one_hot.sum(axis=0), 1)
+
+        return tuple(season_profile(season) for season in seasons)
+
+    @staticmethod
+    def seasonal_from_csv(meteorological_file_path: str, seasons=DEFAULT_SEASONS, panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY,
+                          model='irradiance', use_cache: bool = True):
+        """
+        Read a PVGIS file and average the production of one panel configuration into a typical day per season.
+
+        Returns:
+            ndarray: Production (kW) with shape (seasons, 24), as solar_powers of Pipeline.analyze_seasons.
+        """
+        hourly_df, production = PV.from_csv(meteorological_file_path, panel_area, panel_efficiency, model, use_cache=use_cache)
+        return np.concatenate(PV.seasonal(hourly_df, production, seasons))
+
+    @staticmethod
+    def _column(hourly_df, column):
+        if column not in hourly_df.columns:
+            raise ValueError(f"Meteorological data has no '{column}' column; the PV model needs a PVGIS file with G(i), T2m and P")
+        return hourly_df[column].to_numpy(dtype=float)
@@ -0,0 +1,285 @@
+"""
+This module persists analysis results in a local SQLite database, keyed by the content of the input files and
+every parameter of the run, so a repeated run returns the stored results instead of recomputing them.
+
+Classes:
+    ResultStore: A SQLite database of analysis runs.
+Methods:
+    inputs(load_profile_file_path, meteorological_file_path, threshold, peak_hours, ...): Returns the inputs of a run and their key.
+    load(key, seasons): Returns the stored results of a run, or None if it was never stored.
+    store(inputs, seasons, results): Writes the results of a run.
+    summary(load_profile_hash, season): Returns the costs of every stored run as a DataFrame, for queries across runs.
+    clear(): Removes every stored run.
+
+Tables:
+    - runs: One row per run, with the SHA-256 of both input files, the threshold, peak hours, methods, tariff,
+      battery and PV parameters, the PV model and the season definitions, unique on the key hashed from all of them.
+    - season_results: Battery size and the three costs per run and season.
+    - hourly_results: The original, battery and shifted load and the SoC per run, season and hour.
+
+Runs are indexed by input file hashes, threshold and creation time, and season results by season and cost, so
+comparing many runs (e.g. every threshold tried for one profile) never scans the hourly table. Results restored
+from the store carry every value the GUI and reports use, but not the battery and shifted ApplianceTables.
+
+The database is results.sqlite3 in the cache directory (see cache.py), or $SMARTHOME_RESULTS_DB when set.
+Every operation opens its own connection, so the GUI worker thread and fleet worker processes can share it.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from .log import get_logger
+from .cache import FileCache
+from .pipeline import CHARGE_RATE, DISCHARGE_RATE, PANEL_AREA, PANEL_EFFICIENCY
+from .seasons import DEFAULT_SEASONS, Season
+
+logger = get_logger('result_store')
+
+# Bump whenever the pipeline changes its results for the same inputs; older runs are then never returned
+STORE_VERSION = 5
+# Seconds a connection waits for another process to finish writing
+BUSY_TIMEOUT = 30.0
+PROFILES = ('original', 'battery', 'shifted')
+# Columns added to the runs table after its first release, added to older databases on first use
+ADDED_COLUMNS = {'pv_model': 'TEXT'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL,
+    created REAL NOT NULL,
+    load_profile TEXT NOT NULL,
+    load_profile_hash TEXT NOT NULL,
+    meteorological_data TEXT NOT NULL,
+    meteorological_hash TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    peak_hours TEXT NOT NULL,
+    shift_method TEXT NOT NULL,
+    dispatch TEXT NOT NULL,
+    tariff TEXT NOT NULL,
+    capacity REAL,
+    charge_rate REAL NOT NULL,
+    discharge_rate REAL NOT NULL,
+    panel_area REAL NOT NULL,
+    panel_efficiency REAL NOT NULL,
+    seasons TEXT NOT NULL,
+    pv_model TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_inputs ON runs (load_profile_hash, meteorological_hash, threshold);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+CREATE TABLE IF NOT EXISTS season_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    season_index INTEGER NOT NULL,
+    season TEXT NOT NULL,
+    max_load REAL NOT NULL,
+    capacity REAL NOT NULL,
+    original_cost REAL NOT NULL,
+    battery_cost REAL NOT NULL,
+    shifted_cost REAL NOT NULL,
+    PRIMARY KEY (run_id, season_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS season_results_costs ON season_results (season, shifted_cost);
+CREATE TABLE IF NOT EXISTS hourly_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    season_index INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    original REAL NOT NULL,
+    battery REAL NOT NULL,
+    shifted REAL NOT NULL,
+    soc REAL NOT NULL,
+    PRIMARY KEY (run_id, season_index, hour)
+) WITHOUT ROWID;
+"""
+
+
+def _tariff_digest(tariff):
+    """ Returns 'standard' for the default bands, or a hash of the prices of a Tariff. """
+    if tariff is None:
+        return 'standard'
+    digest = hashlib.sha256(str(tariff.name).encode())
+    if tariff.table is not None:
+        digest.update(np.ascontiguousarray(tariff.table, dtype=float).tobytes())
+    if tariff.series is not None:
+        digest.update(tariff.series.index.asi8.tobytes())
+        digest.update(tariff.series.to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class ResultStore:
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): SQLite database file; defaults to $SMARTHOME_RESULTS_DB or results.sqlite3 in the cache directory.
+        """
+        self.path = path or os.environ.get('SMARTHOME_RESULTS_DB') or os.path.join(FileCache.directory(), 'results.sqlite3')
+        self._initialized = False
+
+    def _connect(self):
+        """ Opens a connection, creating the database and its tables on first use. """
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        connection.execute("PRAGMA foreign_keys = ON")
+        if not self._initialized:
+            # Write-ahead logging lets readers run while a fleet worker writes
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(SCHEMA)
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(runs)")}
+            for column, definition in ADDED_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE runs ADD COLUMN {column} {definition}")
+            self._initialized = True
+        return connection
+
+    @staticmethod
+    def inputs(load_profile_file_path, meteorological_file_path, threshold, peak_hours, seasons=DEFAULT_SEASONS, tariff=None,
+               shift_method='greedy', dispatch='rules', capacity=None, charge_rate=CHARGE_RATE, discharge_rate=DISCHARGE_RATE,
+               panel_area=PANEL_AREA, panel_efficiency=PANEL_EFFICIENCY, pv_model=None):
+        """
+        Describe a run by the content of its input files and its parameters.
+
+        Args:
+            load_profile_file_path, meteorological_file_path (str): Input files; they are hashed by content, so
+                moving or renaming a file keeps its results and editing it does not.
+            threshold, peak_hours, seasons, tariff, shift_method, dispatch, capacity, charge_rate, discharge_rate,
+                panel_area, panel_efficiency: As in Pipeline.analyze_seasons.
+            pv_model (str): PV model of the solar production (see Pipeline.solar_powers), or None.
+
+        Returns:
+            dict: One entry per column of the runs table, including 'key', the hash of every input.
+        """
+        inputs = {
+            'load_profile': os.path.abspath(load_profile_file_path),
+            'load_profile_hash': FileCache.key(load_profile_file_path),
+            'meteorological_data': os.path.abspath(meteorological_file_path),
+            'meteorological_hash': FileCache.key(meteorological_file_path),
+            'threshold': float(threshold),
+            'peak_hours': json.dumps(sorted(int(hour) for hour in peak_hours)),
+            'shift_method': shift_method,
+            'dispatch': dispatch,
+            'tariff': _tariff_digest(tariff),
+            'capacity': None if capacity is None else float(capacity),
+            'charge_rate': float(charge_rate),
+            'discharge_rate': float(discharge_rate),
+            'panel_area': float(panel_area),
+            'panel_efficiency': float(panel_efficiency),
+            'seasons': Season.digest(seasons),
+            'pv_model': pv_model,
+        }
+        # File paths are left out of the key; only the file contents matter
+        keyed = {name: value for name, value in inputs.items() if name not in ('load_profile', 'meteorological_data')}
+        inputs['key'] = hashlib.sha256(json.dumps([STORE_VERSION, keyed], sort_keys=True).encode()).hexdigest()
+        return inputs
+
+    def load(self, key: str, seasons=DEFAULT_SEASONS):
+        """
+        Read the stored results of a run.
+
+        Args:
+            key (str): The 'key' of inputs().
+            seasons (tuple): Season definitions of the run, in the order the results are returned.
+
+        Returns:
+            list: One result dictionary per season in the format of Pipeline.analyze_season, without
+            'battery_profile' and 'shifted_profile', or None if the run is not stored.
+        """
+        try:
+            with closing(self._connect()) as connection:
+                run = connection.execute("SELECT id FROM runs WHERE key = ? AND version = ?", (key, STORE_VERSION)).fetchone()
+                if run is None:
+                    return None
+                summaries = connection.execute(
+                    "SELECT max_load, capacity, original_cost, battery_cost, shifted_cost FROM season_results "
+                    "WHERE run_id = ? ORDER BY season_index", run).fetchall()
+                hourly = np.array(connection.execute(
+                    "SELECT original, battery, shifted, soc FROM hourly_results WHERE run_id = ? ORDER BY season_index, hour", run).fetchall(),
+                    dtype=float)
+        except sqlite3.Error as e:
+            logger.warning("Could not read result store %s: %s", self.path, e)
+            return None
+        if len(summaries) != len(seasons) or hourly.shape != (len(seasons) * 24, 4):
+            return None
+
+        hourly = hourly.reshape(len(seasons), 24, 4)
+        results = []
+        for (max_load, capacity, *costs), values in zip(summaries, hourly):
+            result = {'max_load': max_load, 'capacity': capacity}
+            for index, profile in enumerate(PROFILES):
+                result[f'{profile}_hourly'] = pd.DataFrame({'Power (kW)': values[:, index]})
+                result[f'{profile}_cost'] = costs[index]
+            result['soc'] = pd.DataFrame({'Hour': np.arange(24), 'State of Charge (%)': values[:, 3]})
+            results.append(result)
+        logger.info("Loaded stored results of run %s", key[:12])
+        return results
+
+    def store(self, inputs: dict, seasons, results):
+        """
+        Write the results of a run, replacing any earlier run with the same key. Failures are logged and only
+        disable storing.
+
+        Args:
+            inputs (dict): The run, as returned by inputs().
+            seasons (tuple): Season definitions, in the order of results.
+            results (list): One result dictionary per season, as returned by Pipeline.analyze_seasons.
+        """
+        columns = list(inputs)
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute("DELETE FROM runs WHERE key = ?", (inputs['key'],))
+                run_id = connection.execute(
+                    f"INSERT INTO runs (version, created, {', '.join(columns)}) VALUES (?, ?, {', '.join('?' * len(columns))})",
+                    (STORE_VERSION, time.time(), *(inputs[column] for column in columns))).lastrowid
+                connection.executemany(
+                    "INSERT INTO season_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, index, season.name, float(result['max_load']), float(result['capacity']),
+                      *(float(result[f'{profile}_cost']) for profile in PROFILES))
+                     for index, (season, result) in enumerate(zip(seasons, results))])
+                connection.executemany(
+                    "INSERT INTO hourly_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, index, hour, *row)
+                     for index, result in enumerate(results)
+                     for hour, row in enumerate(zip(*(result[f'{profile}_hourly']['Power (kW)'].to_numpy(dtype=float)[:24].tolist() for profile in PROFILES),
+                                                    result['soc']['State of Charge (%)'].to_numpy(dtype=float)[:24].tolist()))])
+        except sqlite3.Error as e:
+            logger.warning("Could not write result store %s: %s", self.path, e)
+
+    def summary(self, load_profile_hash: str = None, season: str = None):
+        """
+        Return the battery size and costs of every stored run and season, newest run first.
+
+        Args:
+            load_profile_hash (str): Only runs of the load profile with this content hash (FileCache.key).
+            season (str): Only this season, e.g. 'winter'.
+
+        Returns:
+            DataFrame: One row per run and season, with the run's inputs and its results.
+        """
+        conditions, values = ["runs.version = ?"], [STORE_VERSION]
+        if load_profile_hash is not None:
+            conditions.append("runs.load_profile_hash = ?")
+            values.append(load_profile_hash)
+        if season is not None:
+            conditions.append("season_results.season = ?")
+            values.append(season)
+        query = (
+            "SELECT runs.key, runs.created, runs.load_profile, runs.meteorological_data, runs.threshold, runs.shift_method, "
+            "runs.dispatch, runs.tariff, runs.pv_model, season_results.season, season_results.max_load, season_results.capacity, "
+            "season_results.original_cost, season_results.battery_cost, season_results.shifted_cost "
+            "FROM runs JOIN season_results ON season_results.run_id = runs.id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY runs.created DESC, season_results.season_index"
+        )
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(query, connection, params=values)
+
+    def clear(self):
+        """ Removes every stored run. """
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM runs")
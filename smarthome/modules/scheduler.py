@@ -0,0 +1,121 @@
+"""
+This module provides a cost-optimal alternative to Calculations.shift_loads. Instead of moving appliances to the
+hour after the peak, it places every shiftable appliance at the start hour that minimizes the total energy cost
+while keeping the hourly load under the threshold.
+
+Classes:
+    Scheduler: A class containing static methods for cost-optimal load scheduling.
+Methods:
+    schedule(profile_df, threshold, peak_hours, tariff, time_budget, slots_per_hour): Reschedules the shiftable appliances.
+
+The solver is a local search over start times. It starts from the current schedule and repeatedly removes one
+appliance and re-inserts it at its best start, scoring all starts of the day at once. The score is the load
+above the threshold (weighted by OVERLOAD_PENALTY, so violations are resolved first) plus the energy cost of
+the appliance's run. It stops when a full pass finds no improvement or the time budget runs out; the result is
+never worse than the input schedule.
+
+Appliances keep their run duration. Priority Group 1, zero-power loads and appliances that run all day stay
+fixed, as in shift_loads; the battery discharge channel counts as fixed load. Starts move on the slot grid of the chosen resolution (whole hours by
+default). Each pass visits the lowest-priority appliances (highest Priority Group) first, and an appliance only
+moves if that strictly lowers the score, so higher-priority appliances keep their original hours whenever moving
+others is enough.
+"""
+
+import time
+
+import numpy as np
+
+from .aggregation import Aggregation
+from .calculations import Calculations, OVERLOAD_PENALTY
+from .log import get_logger
+
+logger = get_logger('scheduler')
+
+# Default time budget of the local search (s); interactive use. Batch runs can pass a larger budget.
+TIME_BUDGET = 1.0
+# Score improvements smaller than this are treated as ties, so appliances do not move for rounding noise
+SCORE_TOLERANCE = 1e-9
+
+
+class Scheduler:
+
+    @staticmethod
+    def schedule(profile_df, threshold, peak_hours, tariff=None, time_budget=TIME_BUDGET, slots_per_hour=1):
+        """
+        Reschedule the shiftable appliances of a profile to minimize cost under the threshold.
+
+        Parameters:
+        - profile_df: ApplianceTable containing the load profile of appliances and the battery discharge channel.
+        - threshold: Maximum allowable load in any slot.
+        - peak_hours: List of hours considered peak hours; used for the default tariff.
+        - tariff: Tariff schedule; defaults to the standard peak/mid-peak/off-peak bands.
+        - time_budget: Maximum time spent improving the schedule (s).
+        - slots_per_hour: Resolution of the start times, e.g. 4 for 15-minute slots.
+
+        Returns:
+        - The profile with adjusted load timings; its 'start' and 'end' arrays are edited in place, as in shift_loads.
+        """
+        logger.info("Scheduling loads...")
+        deadline = time.perf_counter() + time_budget
+        slots = 24 * slots_per_hour
+        prices = Calculations.hourly_tariffs(np.arange(slots) // slots_per_hour, peak_hours, tariff)
+
+        rated_power = profile_df.rated_power
+        start = Aggregation.to_slots(profile_df.start, slots_per_hour)
+        end = Aggregation.to_slots(profile_df.end, slots_per_hour)
+        # Windows with End <= Start run across midnight, as in Aggregation.slot_load
+        duration = np.where(start < end, end - start, end - start + slots)
+        # A run may start at 24:00 (e.g. Start = 24, End = 3), which is slot 0 of the day
+        start = start % slots
+
+        shiftable = (profile_df.priority != 1) & (rated_power != 0) & (duration < slots)
+        candidates = np.flatnonzero(shiftable)
+        # Lowest priority first, then the largest loads, which have the most effect on the score
+        order = np.lexsort((-rated_power[candidates] * duration[candidates], -profile_df.priority[candidates]))
+        candidates = candidates[order]
+
+        # Slots covered by a run of every duration and start: windows[d][s] = [s, s + d) modulo the day
+        windows = {d: (np.arange(slots)[:, None] + np.arange(d)[None, :]) % slots for d in np.unique(duration[candidates])}
+        window_prices = {d: prices[covered].sum(axis=1) for d, covered in windows.items()}
+
+        load = profile_df.load(slots_per_hour)
+        new_start = start.copy()
+
+        passes = moves = 0
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            passes += 1
+            for position in candidates:
+                power, d, current = rated_power[position], duration[position], new_start[position]
+                covered = windows[d]
+
+                # Take the appliance out and score every start slot for putting it back
+                load[covered[current]] -= power
+                window_load = load[covered]
+                overload = np.maximum(window_load + power - threshold, 0).sum(axis=1) - np.maximum(window_load - threshold, 0).sum(axis=1)
+                score = OVERLOAD_PENALTY * overload + window_prices[d] * power
+
+                best = int(np.argmin(score))
+                if score[best] < score[current] - SCORE_TOLERANCE:
+                    new_start[position] = best
+                    improved = True
+                    moves += 1
+                load[covered[new_start[position]]] += power
+
+                if time.perf_counter() >= deadline:
+                    break
+        # A pass cut short may have improved nothing yet, so the budget is checked rather than improved
+        timed_out = time.perf_counter() >= deadline
+
+        moved = np.flatnonzero(new_start != start)
+        if len(moved):
+            new_end = new_start[moved] + duration[moved]
+            # Keep End = 24 for runs ending at midnight and wrap the ones that cross it
+            new_end = np.where(new_end > slots, new_end - slots, new_end)
+            profile_df.start[moved] = new_start[moved] / slots_per_hour
+            profile_df.end[moved] = new_end / slots_per_hour
+
+        logger.info("Load scheduling completed: %d appliances moved in %d passes (%d moves)%s.", len(moved), passes, moves,
+                    ", time budget reached" if timed_out else "")
+        return profile_df
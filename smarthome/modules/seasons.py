@@ -0,0 +1,109 @@
+"""
+This module defines the seasons an analysis runs for. A season is a set of months, optionally restricted to some
+weekdays, whose meteorological data is averaged into one typical day, together with the load profile whose usage
+windows apply to it: the 'Winter' profile is read from the 'Winter Hours Start' and 'Winter Hours End' columns.
+
+Classes:
+    Season: One season definition.
+Methods:
+    monthly(profiles): Twelve seasons, one per month.
+    day_types(seasons): Splits every season into its weekdays and its weekend.
+    digest(seasons): Returns a short hash of season definitions, used to key cached results.
+
+Constants:
+    - WINTER_MONTHS, SUMMER_MONTHS: Months of the default winter and summer seasons.
+    - WEEKDAYS, WEEKEND: Day types of day_types (0 = Monday).
+    - MONTHLY_PROFILES: Load profile used for every month by monthly().
+    - DEFAULT_SEASONS: The winter and summer seasons of the standard analysis.
+    - SEASON_SETS: Named season sets offered on the command line.
+
+Only the standard library is imported, so the command line can list season sets without loading NumPy.
+"""
+
+import calendar
+import hashlib
+
+# Define winter and summer months
+WINTER_MONTHS = [12, 1, 2]
+SUMMER_MONTHS = [6, 7, 8]
+# Day types (0 = Monday)
+WEEKDAYS = [0, 1, 2, 3, 4]
+WEEKEND = [5, 6]
+# Load profiles have winter and summer hours only; monthly() uses the winter hours from October to March
+MONTHLY_PROFILES = {month: 'Winter' if month in (10, 11, 12, 1, 2, 3) else 'Summer' for month in range(1, 13)}
+
+
+class Season:
+    __slots__ = ('name', 'months', 'weekdays', 'profile')
+
+    def __init__(self, name: str, months, weekdays=None, profile: str = None):
+        self.name = name  # Name used for results, e.g. 'winter'
+        self.months = tuple(sorted({int(month) for month in months}))  # Months (1-12) averaged into the typical day
+        self.weekdays = None if weekdays is None else tuple(sorted({int(day) for day in weekdays}))  # Weekdays (0 = Monday), or None for all days
+        self.profile = profile or name.capitalize()  # Load profile column prefix, e.g. 'Winter'
+        if not self.months or not all(1 <= month <= 12 for month in self.months):
+            raise ValueError(f"Season {name!r} needs months between 1 and 12, got {list(months)}")
+        if self.weekdays is not None and (not self.weekdays or not all(0 <= day <= 6 for day in self.weekdays)):
+            raise ValueError(f"Season {name!r} needs weekdays between 0 (Monday) and 6, got {list(weekdays)}")
+
+    def __repr__(self):
+        weekdays = '' if self.weekdays is None else f", weekdays={list(self.weekdays)}"
+        return f"Season({self.name!r}, months={list(self.months)}{weekdays}, profile={self.profile!r})"
+
+    def key(self):
+        """ Returns the definition as a tuple; seasons with equal keys compare and hash equal. """
+        return (self.name, self.months, self.weekdays, self.profile)
+
+    def __eq__(self, other):
+        return isinstance(other, Season) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    @staticmethod
+    def monthly(profiles=None):
+        """
+        Build one season per month, named after the month ('january', ...).
+
+        Args:
+            profiles (dict): Load profile of every month (1-12); defaults to MONTHLY_PROFILES.
+
+        Returns:
+            tuple: Twelve seasons, January first.
+        """
+        profiles = profiles or MONTHLY_PROFILES
+        return tuple(Season(calendar.month_name[month].lower(), [month], profile=profiles[month]) for month in range(1, 13))
+
+    @staticmethod
+    def day_types(seasons=None):
+        """
+        Split every season into weekdays and weekend, e.g. 'winter' into 'winter weekday' and 'winter weekend'.
+        Both halves keep the season's months and load profile.
+
+        Args:
+            seasons (tuple): Seasons to split; defaults to DEFAULT_SEASONS.
+
+        Returns:
+            tuple: Two seasons per input season, weekdays first.
+        """
+        split = []
+        for season in seasons or DEFAULT_SEASONS:
+            for day_type, days in (('weekday', WEEKDAYS), ('weekend', WEEKEND)):
+                weekdays = days if season.weekdays is None else sorted(set(days) & set(season.weekdays))
+                if weekdays:
+                    split.append(Season(f"{season.name} {day_type}", season.months, weekdays, season.profile))
+        return tuple(split)
+
+    @staticmethod
+    def digest(seasons):
+        """ Returns a short hash of the season definitions, e.g. for naming cached products. """
+        return hashlib.sha256(repr([season.key() for season in seasons]).encode()).hexdigest()[:16]
+
+
+DEFAULT_SEASONS = (Season('winter', WINTER_MONTHS), Season('summer', SUMMER_MONTHS))
+# Season sets by name, as accepted by the --seasons option of the command line
+SEASON_SETS = {
+    'winter-summer': DEFAULT_SEASONS,
+    'monthly': Season.monthly(),
+    'day-types': Season.day_types(DEFAULT_SEASONS),
+}
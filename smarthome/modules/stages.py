@@ -0,0 +1,147 @@
+"""
+This module provides a small memoized dependency graph for pipeline stages. Each stage is cached under a key
+built from its parameters and the keys of the stages it depends on, so a run only recomputes the stages whose
+inputs changed, e.g. a new threshold re-runs the battery, shifting and cost stages but not the file parsing.
+
+Classes:
+    StageGraph: A graph of named stages with a per-stage cache.
+Methods:
+    add(name, function, inputs, params, files): Registers a stage.
+    plan(targets, **params): Returns the stages a run would compute, in order.
+    run(targets, progress, **params): Computes the targets, reusing cached stages.
+    clear(): Drops every cached result.
+
+Keys never hash stage outputs: a stage's key combines its own parameter values with its inputs' keys. Parameters
+listed in files are file paths and also contribute the file's size and modification time, so editing a file
+invalidates every stage downstream of it.
+"""
+
+import os
+from collections import OrderedDict
+
+from .log import get_logger, span
+
+logger = get_logger('stages')
+
+# Results kept per stage, so switching back to a recent parameter value is a cache hit
+CACHE_SIZE = 8
+
+
+def _freeze(value):
+    """ Returns a hashable stand-in for a parameter value. """
+    if isinstance(value, (list, tuple, range)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        # Unhashable objects (e.g. DataFrames) are keyed by identity
+        return ('id', id(value))
+
+
+def _file_fingerprint(file_path):
+    stat = os.stat(file_path)
+    return (file_path, stat.st_size, stat.st_mtime_ns)
+
+
+class StageGraph:
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.stages = OrderedDict()  # Stage name -> (function, inputs, params, files), in registration order
+        self.cache = {}  # Stage name -> OrderedDict of key -> result, least recently used first
+        self.cache_size = cache_size
+
+    def add(self, name: str, function, inputs=(), params=(), files=()):
+        """
+        Register a stage. Inputs must already be registered, which keeps the graph acyclic.
+
+        Args:
+            name (str): Name of the stage.
+            function (callable): Called as function(*input_results, **{param: value}).
+            inputs (list): Names of the stages whose results are passed positionally.
+            params (list): Names of the run parameters passed as keyword arguments.
+            files (list): Names of params that are file paths; their size and modification time join the key.
+        """
+        missing = [stage for stage in inputs if stage not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name!r} depends on unknown stages: {missing}")
+        self.stages[name] = (function, tuple(inputs), tuple(params) + tuple(files), tuple(files))
+        self.cache[name] = OrderedDict()
+
+    def _keys(self, params):
+        """ Returns the cache key of every stage for the given run parameters. """
+        keys = {}
+        for name, (_, inputs, stage_params, files) in self.stages.items():
+            try:
+                values = tuple(_file_fingerprint(params[param]) if param in files else _freeze(params[param]) for param in stage_params)
+            except KeyError as e:
+                raise ValueError(f"Stage {name!r} needs the parameter {e.args[0]!r}") from None
+            keys[name] = (name, values, tuple(keys[stage] for stage in inputs))
+        return keys
+
+    def _pending(self, targets, keys):
+        """ Returns the uncached stages needed for the targets, dependencies first. """
+        pending = []
+        visited = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            visited.add(name)
+            if keys[name] in self.cache[name]:
+                return
+            for stage in self.stages[name][1]:
+                visit(stage)
+            pending.append(name)
+
+        for target in targets:
+            if target not in self.stages:
+                raise ValueError(f"Unknown stage: {target!r}")
+            visit(target)
+        return pending
+
+    def plan(self, targets, **params):
+        """ Returns the names of the stages a run with these parameters would compute, in execution order. """
+        return self._pending(targets, self._keys(params))
+
+    def run(self, targets, progress=None, **params):
+        """
+        Compute the target stages, reusing every cached stage whose key did not change.
+
+        Args:
+            targets (list): Names of the stages whose results are wanted.
+            progress (callable): Optional; called with the name of every stage before it is computed. It may
+                raise (e.g. AnalysisCancelled) to stop the run; stages finished so far stay cached.
+            **params: Parameter values, by name.
+
+        Returns:
+            dict: Result of every target stage, by name.
+        """
+        keys = self._keys(params)
+        for name in self._pending(targets, keys):
+            if progress is not None:
+                progress(name)
+            function, inputs, stage_params, _ = self.stages[name]
+            arguments = [self.cache[stage][keys[stage]] for stage in inputs]
+            with span(logger, f"Stage {name}"):
+                result = function(*arguments, **{param: params[param] for param in stage_params})
+            self._store(name, keys[name], result)
+
+        results = {}
+        for target in targets:
+            self.cache[target].move_to_end(keys[target])
+            results[target] = self.cache[target][keys[target]]
+        return results
+
+    def _store(self, name, key, result):
+        cache = self.cache[name]
+        cache[key] = result
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def clear(self):
+        """ Drops every cached result. """
+        for cache in self.cache.values():
+            cache.clear()
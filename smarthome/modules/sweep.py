@@ -0,0 +1,94 @@
+"""
+This module evaluates a grid of thresholds, battery capacities and PV panel areas in one call and returns
+the resulting cost surface and its optimum.
+
+Classes:
+    Sweep: A class containing static methods for parameter sweeps.
+Methods:
+    run(profile_df, meteorological_df, thresholds, capacities, panel_areas, peak_hours): Evaluates every combination.
+
+NOTE: The battery simulation runs once for the whole grid as a NumPy scenario axis. Load shifting is
+sequential per scenario, so it is evaluated once per distinct (threshold, discharge) pair and skipped
+entirely with include_shifting=False.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .battery import Battery
+from .calculations import Calculations
+from .log import get_logger
+from .pipeline import CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_EFFICIENCY
+
+logger = get_logger('sweep')
+
+
+class Sweep:
+
+    @staticmethod
+    def run(profile_df, meteorological_df, thresholds, capacities, panel_areas, peak_hours,
+            charge_rate=CHARGE_RATE, discharge_rate=DISCHARGE_RATE, panel_efficiency=PANEL_EFFICIENCY, include_shifting=True,
+            tariff=None):
+        """
+        Evaluate every (threshold, capacity, panel area) combination for one seasonal profile.
+
+        Parameters:
+        - profile_df: ApplianceTable containing the seasonal load profile of appliances.
+        - meteorological_df: DataFrame with the seasonal hourly average irradiation.
+        - thresholds: Thresholds to evaluate (kW).
+        - capacities: Battery capacities to evaluate (kWh).
+        - panel_areas: PV panel areas to evaluate (m^2).
+        - peak_hours: List of hours considered as peak hours.
+        - charge_rate, discharge_rate, panel_efficiency: Battery and PV parameters shared by all scenarios.
+        - include_shifting: Whether to run load shifting and report the shifted cost.
+        - tariff: Tariff schedule used for the costs; defaults to the standard peak/mid-peak/off-peak bands.
+
+        Returns:
+        - Dictionary with 'scenarios' (one DataFrame row per combination), 'surface' (objective cost with
+          shape (thresholds, capacities, panel areas)) and 'optimum' (the cheapest scenario row).
+        """
+        grid = np.array(list(itertools.product(thresholds, capacities, panel_areas)), dtype=float)
+        scenario_thresholds, scenario_capacities, scenario_areas = grid.T
+
+        load = np.asarray(Battery.calculate_hourly_power(profile_df))
+        irradiance = np.zeros(24)
+        irradiance[meteorological_df['Hour'].to_numpy(dtype=np.int64)] = meteorological_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+
+        discharge, _ = Battery.simulate_scenarios(
+            load, irradiance, np.arange(24), scenario_thresholds, scenario_capacities, charge_rate, discharge_rate,
+            scenario_capacities * INITIAL_SOC_RATIO, scenario_areas, panel_efficiency, peak_hours,
+        )
+
+        scenarios = pd.DataFrame({
+            'Threshold': scenario_thresholds,
+            'Capacity (kWh)': scenario_capacities,
+            'Panel Area (m^2)': scenario_areas,
+            'Battery Cost': Calculations.calculate_energy_costs(load - discharge, peak_hours, tariff),
+        })
+        objective = 'Battery Cost'
+
+        if include_shifting:
+            shifted_costs = {}
+            for threshold, hourly_discharge in zip(scenario_thresholds, discharge):
+                key = (threshold, hourly_discharge.tobytes())
+                if key not in shifted_costs:
+                    shifted_costs[key] = Sweep._shifted_cost(profile_df, hourly_discharge, threshold, peak_hours, tariff)
+            scenarios['Shifted Cost'] = [shifted_costs[(threshold, hourly_discharge.tobytes())] for threshold, hourly_discharge in zip(scenario_thresholds, discharge)]
+            objective = 'Shifted Cost'
+
+        surface = scenarios[objective].to_numpy().reshape(len(thresholds), len(capacities), len(panel_areas))
+        optimum = scenarios.loc[scenarios[objective].idxmin()]
+
+        logger.info("Evaluated %d scenarios. Optimum %s: %.2f $ (Threshold %s, Capacity %s kWh, Panel Area %s m^2)",
+                    len(scenarios), objective.lower(), optimum[objective], optimum['Threshold'], optimum['Capacity (kWh)'], optimum['Panel Area (m^2)'])
+        return {'scenarios': scenarios, 'surface': surface, 'optimum': optimum}
+
+    @staticmethod
+    def _shifted_cost(profile_df, hourly_discharge, threshold, peak_hours, tariff=None):
+        """Shift loads on top of one scenario's battery discharge and price the result the same way Pipeline does."""
+        battery_profile_df = Battery.update_profile(profile_df.copy(), hourly_discharge)
+        shifted_profile_df = Calculations.shift_loads(battery_profile_df, threshold, peak_hours)
+        shifted_hourly = Calculations.generate_adjusted_profile(shifted_profile_df, battery_profile_df)
+        return Calculations.calculate_energy_cost(shifted_hourly, peak_hours, tariff)
@@ -0,0 +1,177 @@
+"""
+This module provides tariff schedules and prices many load profiles under many tariffs in one array operation.
+
+Classes:
+    Tariff: A tariff schedule, either a calendar of time-of-use bands or a dynamic hourly price series.
+Methods:
+    time_of_use(bands, default_price, name): Builds a schedule from time-of-use bands, optionally per month or weekday.
+    from_csv(price_file_path, time_column, price_column, name): Loads a dynamic hourly price series from a CSV file.
+    prices(index, months, weekdays): Returns the price of every hour of a 24-hour day or of a timestamp index.
+    calendar_prices(hour_of_day, month, weekday): Returns the price of every step of a series given by its calendar fields.
+    costs(loads, tariffs, index): Prices a (profiles, hours) load matrix under every tariff at once.
+
+A calendar schedule is stored as a (12 months, 7 weekdays, 24 hours) price table, so band lookup for any
+index is a single fancy-indexing step. Bands are applied in order and later bands override earlier ones.
+A band with start >= end runs across midnight.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .log import get_logger
+
+logger = get_logger('tariff')
+
+
+class Tariff:
+    def __init__(self, name: str, table=None, series=None):
+        self.name = name
+        self.table = table  # Price per (month - 1, weekday, hour) in $/kWh, for calendar schedules
+        self.series = series  # Price per timestamp in $/kWh, for dynamic schedules
+
+    def __repr__(self):
+        kind = 'dynamic' if self.series is not None else 'time-of-use'
+        return f"Tariff({self.name!r}, {kind})"
+
+    @staticmethod
+    def time_of_use(bands, default_price: float, name: str = 'Time of use'):
+        """
+        Build a calendar schedule from time-of-use bands.
+
+        Args:
+            bands (list): Bands as (start, end, price) tuples or dicts with 'start', 'end', 'price' and the
+                optional keys 'months' (1-12) and 'weekdays' (0 = Monday) restricting where the band applies.
+            default_price (float): Price of every hour no band covers ($/kWh).
+            name (str): Name used in reports.
+
+        Returns:
+            Tariff: The schedule.
+        """
+        table = np.full((12, 7, 24), float(default_price))
+        hours = np.arange(24)
+        for band in bands:
+            if not isinstance(band, dict):
+                band = dict(zip(('start', 'end', 'price'), band))
+            start, end = int(band['start']), int(band['end'])
+            in_band = (hours >= start) & (hours < end) if start < end else (hours >= start) | (hours < end)
+            months = np.asarray(band.get('months') or range(1, 13)) - 1
+            weekdays = np.asarray(band.get('weekdays') or range(7))
+            table[np.ix_(months, weekdays, hours[in_band])] = float(band['price'])
+        return Tariff(name, table=table)
+
+    @staticmethod
+    def from_csv(price_file_path: str, time_column: str = 'time', price_column: str = 'Price', name: str = None):
+        """
+        Load a dynamic hourly price series, e.g. day-ahead market prices, from a CSV file.
+
+        Args:
+            price_file_path (str): CSV file with a timestamp column and a price column ($/kWh).
+            time_column (str): Name of the timestamp column.
+            price_column (str): Name of the price column.
+            name (str): Name used in reports; defaults to the file name.
+
+        Returns:
+            Tariff: The schedule.
+        """
+        logger.info("Reading price file: %s", price_file_path)
+        df = pd.read_csv(price_file_path)
+        required_columns = {time_column, price_column}
+        if not required_columns.issubset(df.columns):
+            raise ValueError(f"Price file must contain the following columns: {required_columns}")
+
+        series = pd.Series(pd.to_numeric(df[price_column], errors='coerce').to_numpy(),
+                           index=pd.to_datetime(df[time_column]).dt.floor('h'))
+        series = series[series.notna()].sort_index()
+        series = series[~series.index.duplicated(keep='last')]
+        return Tariff(name or price_file_path, series=series)
+
+    def prices(self, index, months=None, weekdays=None):
+        """
+        Look up the price of every hour of a load vector.
+
+        Args:
+            index (array-like): Either hours of day (0-23), for typical-day profiles such as the seasonal
+                24-hour profiles, or timestamps, for full series such as an 8760-hour year.
+            months (list): For hours of day only; months (1-12) the typical day stands for. Defaults to all.
+            weekdays (list): For hours of day only; weekdays (0 = Monday) the typical day stands for. Defaults to all.
+
+        Returns:
+            ndarray: Price per hour ($/kWh), aligned with index.
+
+        For hours of day the price is the average over the selected months and weekdays (or, for dynamic
+        schedules, over the matching timestamps), so a schedule that does not vary over them returns its
+        band prices unchanged.
+        """
+        if isinstance(index, (pd.DatetimeIndex, pd.Series)) or np.issubdtype(np.asarray(index).dtype, np.datetime64):
+            time = pd.DatetimeIndex(index)
+            if self.series is None:
+                return self.table[time.month.to_numpy() - 1, time.dayofweek.to_numpy(), time.hour.to_numpy()]
+            prices = self.series.reindex(time.floor('h')).to_numpy()
+            if np.isnan(prices).any():
+                raise ValueError(f"Tariff {self.name!r} has no price for {int(np.isnan(prices).sum())} of the requested hours.")
+            return prices
+
+        hour_of_day = np.asarray(index, dtype=np.int64)
+        if self.series is None:
+            month_rows = np.asarray(months if months is not None else range(1, 13)) - 1
+            weekday_rows = np.asarray(weekdays if weekdays is not None else range(7))
+            day = self.table[np.ix_(month_rows, weekday_rows)]
+            if (day == day[0, 0]).all():
+                return day[0, 0][hour_of_day]
+            return day.mean(axis=(0, 1))[hour_of_day]
+
+        time = self.series.index
+        selected = np.ones(len(time), dtype=bool)
+        if months is not None:
+            selected &= time.month.isin(months)
+        if weekdays is not None:
+            selected &= time.dayofweek.isin(weekdays)
+        hourly_mean = self.series[selected].groupby(time[selected].hour).mean().reindex(range(24))
+        if hourly_mean.isna().any():
+            raise ValueError(f"Tariff {self.name!r} has no prices for some hours of the selected days.")
+        return hourly_mean.to_numpy()[hour_of_day]
+
+    def calendar_prices(self, hour_of_day, month, weekday):
+        """
+        Look up the price of every step of a series from its hour of day, month and weekday, e.g. the rows of a
+        PVGIS typical year, whose months come from different years and so have no usable timestamps.
+
+        Args:
+            hour_of_day (array-like): Hour of day (0-23) of every step.
+            month (array-like): Month (1-12) of every step.
+            weekday (array-like): Weekday (0 = Monday) of every step.
+
+        Returns:
+            ndarray: Price per step ($/kWh). Dynamic schedules return the average price of their timestamps
+            with the same month, weekday and hour.
+        """
+        hour_of_day = np.asarray(hour_of_day, dtype=np.int64)
+        month = np.asarray(month, dtype=np.int64)
+        weekday = np.asarray(weekday, dtype=np.int64)
+        table = self.table
+        if self.series is not None:
+            time = self.series.index
+            means = self.series.groupby([time.month, time.dayofweek, time.hour]).mean()
+            table = np.full((12, 7, 24), np.nan)
+            table[tuple(np.asarray(means.index.get_level_values(level)) - offset for level, offset in enumerate((1, 0, 0)))] = means.to_numpy()
+        prices = table[month - 1, weekday, hour_of_day]
+        if np.isnan(prices).any():
+            raise ValueError(f"Tariff {self.name!r} has no price for {int(np.isnan(prices).sum())} of the requested hours.")
+        return prices
+
+    @staticmethod
+    def costs(loads, tariffs, index, months=None, weekdays=None):
+        """
+        Price every load profile under every tariff with a single matrix product.
+
+        Args:
+            loads (array-like): Grid consumption with shape (profiles, hours) or (hours,) (kW per hour).
+            tariffs (list): Tariff schedules to evaluate.
+            index (array-like): Hours of day or timestamps aligned with the hours axis (see prices).
+            months, weekdays (list): Days a typical-day profile stands for (see prices).
+
+        Returns:
+            ndarray: Rounded costs with shape (profiles, tariffs), or (tariffs,) for a single profile.
+        """
+        price_matrix = np.stack([tariff.prices(index, months, weekdays) for tariff in tariffs], axis=1)
+        return np.round(np.asarray(loads, dtype=float) @ price_matrix, 2)
@@ -0,0 +1,59 @@
+"""
+Shared fixtures of the test suite. Run from the repository root or the smarthome directory:
+    python -m pytest smarthome/tests
+
+The modules are imported as the 'modules' package, as main.py does when started from the smarthome directory.
+Every test gets its own cache directory and result database, so nothing is read from or written to ~/.cache.
+"""
+
+import os
+import sys
+
+import pytest
+
+SMARTHOME_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIRECTORY = os.path.join(SMARTHOME_DIRECTORY, 'data')
+
+if SMARTHOME_DIRECTORY not in sys.path:
+    sys.path.insert(0, SMARTHOME_DIRECTORY)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """ Points the content-hashed cache and the result store at a temporary directory. """
+    monkeypatch.setenv('SMARTHOME_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('SMARTHOME_RESULTS_DB', str(tmp_path / 'results.sqlite3'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture(scope='session')
+def load_profile_path():
+    """ The sample load profile used in the README. """
+    return os.path.join(DATA_DIRECTORY, 'load_profile_data', 'load_profile_v3.xlsx')
+
+
+@pytest.fixture(scope='session')
+def meteorological_path():
+    """ The sample PVGIS TMY file (one typical year of hourly rows). """
+    return os.path.join(DATA_DIRECTORY, 'meteorological_data', 'meteorological_data.csv')
+
+
+@pytest.fixture(scope='session')
+def profiles(load_profile_path):
+    """ The winter and summer ApplianceTables of the sample load profile. Copy them before shifting loads. """
+    from modules.load_profile import ElectricLoad
+    return ElectricLoad.from_excel(load_profile_path, use_cache=False)
+
+
+@pytest.fixture(scope='session')
+def seasonal_meteorology(meteorological_path):
+    """ The winter and summer hourly average irradiation of the sample file. """
+    from modules.met_data import MeteorologicalData
+    return MeteorologicalData.from_csv(meteorological_path, use_cache=False)
+
+
+@pytest.fixture(scope='session')
+def hourly_meteorology(meteorological_path):
+    """ Every hourly row of the sample file. """
+    from modules.met_data import MeteorologicalData
+    return MeteorologicalData.hourly_from_csv(meteorological_path, use_cache=False)
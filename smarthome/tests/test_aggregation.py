@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from modules.aggregation import Aggregation
+
+
+def loop_load(start, end, power, slots=24):
+    """ The per-row loop slot_load replaced: Start <= slot < End, or across midnight when End <= Start. """
+    total = np.zeros(slots)
+    for s, e, p in zip(start, end, power):
+        for slot in range(slots):
+            if (s <= slot < e) if s < e else (slot >= s or slot < e):
+                total[slot] += p
+    return total
+
+
+@pytest.fixture
+def windows():
+    rng = np.random.default_rng(1)
+    start = rng.integers(0, 24, 500)
+    end = rng.integers(0, 25, 500)
+    power = rng.uniform(0, 3, 500).round(3)
+    return start, end, power
+
+
+def test_slot_load_matches_loop_bit_for_bit(windows):
+    start, end, power = windows
+    assert np.array_equal(Aggregation.slot_load(start, end, power), loop_load(start, end, power))
+
+
+def test_slot_load_chunks_match_one_pass(windows, monkeypatch):
+    start, end, power = windows
+    whole = Aggregation.slot_load(start, end, power)
+    monkeypatch.setattr(Aggregation, 'CHUNK_CELLS', 24 * 7)
+    assert np.array_equal(Aggregation.slot_load(start, end, power), whole)
+
+
+def test_wrapping_window_runs_across_midnight():
+    load = Aggregation.slot_load([22], [2], [1.5])
+    assert load.tolist() == [1.5, 1.5] + [0.0] * 20 + [1.5, 1.5]
+
+
+def test_prefix_load_matches_slot_load(windows):
+    start, end, power = windows
+    np.testing.assert_allclose(Aggregation.prefix_load(start, end, power, 24), Aggregation.slot_load(start, end, power), atol=1e-9)
+
+
+def test_group_load_matches_prefix_load_per_group(windows):
+    start, end, power = windows
+    group = np.arange(len(power)) % 7
+    grouped = Aggregation.group_load(group, start, end, power, 7)
+    for index in range(7):
+        rows = group == index
+        np.testing.assert_allclose(grouped[index], Aggregation.prefix_load(start[rows], end[rows], power[rows], 24), atol=1e-9)
+
+
+def test_to_slots_rounds_down_to_the_containing_slot():
+    assert Aggregation.to_slots([7.25, 7.3, 23.99], 4).tolist() == [29, 29, 95]
+    assert Aggregation.to_slots([7.9], 1).tolist() == [7]
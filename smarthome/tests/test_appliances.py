@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.appliances import ApplianceTable
+
+
+@pytest.fixture
+def table():
+    return ApplianceTable(['Fridge', 'Oven', 'Heater'], [0.2, 3.0, 2.0], [1, 3, 2], [0, 18, 22], [24, 20, 2])
+
+
+def test_frame_round_trip(table):
+    frame = table.to_frame()
+    assert list(frame.columns) == ['Name', 'Rated Power (kW)', 'Priority Group', 'Start', 'End']
+    again = ApplianceTable.from_frame(frame)
+    for field in ('name', 'rated_power', 'priority', 'start', 'end'):
+        np.testing.assert_array_equal(getattr(again, field), getattr(table, field))
+    assert again.discharge is None
+
+    with pytest.raises(ValueError):
+        ApplianceTable.from_frame(frame.drop(columns=['Priority Group']))
+
+
+def test_records_round_trip(table, tmp_path):
+    path = tmp_path / 'table.npy'
+    np.save(path, table.to_records())
+    again = ApplianceTable.from_records(np.load(path, mmap_mode='r'))
+    pd.testing.assert_frame_equal(again.to_frame(), table.to_frame())
+    assert not isinstance(again.start, np.memmap)
+
+
+def test_copies_shift_independently(table):
+    copy = table.with_discharge(np.ones(24)).copy()
+    copy.start[1], copy.end[1] = 23, 1
+    assert table.start[1] == 18 and table.end[1] == 20
+    assert copy.discharge is not None and table.discharge is None
+
+
+def test_discharge_channel_adds_up_and_is_subtracted_from_the_load(table):
+    first, second = np.zeros(24), np.zeros(24)
+    first[18], second[18], second[19] = 0.5, 0.25, 1.0
+    battery = table.with_discharge(first).with_discharge(second)
+    assert battery.discharge[18] == 0.75 and battery.discharge[19] == 1.0
+    np.testing.assert_allclose(battery.load(), table.load() - battery.discharge)
+    assert 'battery discharge' in repr(battery) and len(battery) == 3
+
+
+def test_load_at_slots_and_across_midnight(table):
+    hourly = table.load()
+    assert hourly[[0, 1, 2, 18, 19, 20, 22, 23]].tolist() == [2.2, 2.2, 0.2, 3.2, 3.2, 0.2, 2.2, 2.2]
+    np.testing.assert_allclose(table.load(4), np.repeat(hourly, 4))
+
+    # An hourly discharge channel applies to every slot of its hour
+    discharge = np.zeros(24)
+    discharge[18] = 1.0
+    np.testing.assert_allclose(table.with_discharge(discharge).load(4), np.repeat(hourly - discharge, 4))
+
+    quarter = ApplianceTable(['Kettle'], [2.0], [3], [7.25], [7.5])
+    assert np.flatnonzero(quarter.load(4)).tolist() == [29]
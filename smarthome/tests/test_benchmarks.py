@@ -0,0 +1,41 @@
+import numpy as np
+
+from benchmarks.generators import neighborhood_profiles, seasonal_profile, write_load_profile, write_meteorological_csv
+from benchmarks.run import compare
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+
+
+def test_generated_workbook_is_read_by_from_excel(tmp_path):
+    path = str(tmp_path / 'profile.xlsx')
+    write_load_profile(path, 200)
+    winter, summer = ElectricLoad.from_excel(path, use_cache=False)
+    # Unused rows (0 - 0) are dropped per season; everything else is kept
+    assert 150 < len(winter) < 200 and 150 < len(summer) < 200
+    assert ((winter.end < winter.start) & (winter.end > 0)).any()
+    assert ((winter.start == 0) & (winter.end == 24)).any()
+
+
+def test_generated_meteorological_file_covers_every_hour(tmp_path):
+    path = str(tmp_path / 'met.csv')
+    write_meteorological_csv(path, years=2)
+    hourly = MeteorologicalData.hourly_from_csv(path, use_cache=False)
+    assert len(hourly) in (2 * 8760, 2 * 8760 + 24)
+    winter, summer = MeteorologicalData.from_csv(path, use_cache=False)
+    assert len(winter) == len(summer) == 24
+
+
+def test_generators_are_deterministic():
+    first, second = seasonal_profile(100), seasonal_profile(100)
+    np.testing.assert_array_equal(first.load(), second.load())
+    assert first.discharge is not None and first.discharge[17:23].any()
+    assert len(neighborhood_profiles(5)) == 5
+
+
+def test_compare_scales_the_baseline_by_machine_speed():
+    baseline = {'a': 1.0, 'b': 1.0, 'only in baseline': 1.0}
+    results = {'a': 1.4, 'b': 2.0, 'new': 10.0}
+    assert [name for name, *_ in compare(results, baseline, 1.5)] == ['b']
+    # On a machine twice as slow both timings are within the tolerance
+    assert compare(results, baseline, 1.5, scale=2.0) == []
+    assert compare(results, baseline, 1.5, scale=0.5) == [('a', 0.5, 1.4), ('b', 0.5, 2.0)]
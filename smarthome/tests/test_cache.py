@@ -0,0 +1,84 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from modules.cache import FileCache
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+
+
+@pytest.fixture
+def meteorological_copy(meteorological_path, tmp_path):
+    """ A private copy of the sample file, so tests may edit it. """
+    path = tmp_path / 'meteorological_data.csv'
+    shutil.copy(meteorological_path, path)
+    return str(path)
+
+
+def test_cached_results_equal_parsed_results(meteorological_copy):
+    parsed = MeteorologicalData.from_csv(meteorological_copy, use_cache=False)
+    first = MeteorologicalData.from_csv(meteorological_copy)
+    second = MeteorologicalData.from_csv(meteorological_copy)
+    for expected, stored, cached in zip(parsed, first, second):
+        pd.testing.assert_frame_equal(stored, expected)
+        pd.testing.assert_frame_equal(cached, expected)
+
+    hourly = MeteorologicalData.hourly_from_csv(meteorological_copy, use_cache=False)
+    MeteorologicalData.hourly_from_csv(meteorological_copy)
+    pd.testing.assert_frame_equal(MeteorologicalData.hourly_from_csv(meteorological_copy), hourly)
+
+
+def test_cache_hit_skips_parsing(meteorological_copy, monkeypatch):
+    expected = MeteorologicalData.from_csv(meteorological_copy)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the CSV file was parsed")
+
+    monkeypatch.setattr(pd, 'read_csv', fail)
+    for cached, stored in zip(MeteorologicalData.from_csv(meteorological_copy), expected):
+        pd.testing.assert_frame_equal(cached, stored)
+
+
+def test_editing_the_file_invalidates_its_entry(meteorological_copy):
+    before = FileCache.key(meteorological_copy)
+    winter, _ = MeteorologicalData.from_csv(meteorological_copy)
+
+    # Double every sun height of 1 January
+    with open(meteorological_copy) as f:
+        lines = f.readlines()
+    for index, line in enumerate(lines):
+        if line.startswith('20230101:'):
+            fields = line.split(',')
+            fields[3] = str(float(fields[3]) * 2)
+            lines[index] = ','.join(fields)
+    with open(meteorological_copy, 'w') as f:
+        f.writelines(lines)
+
+    assert FileCache.key(meteorological_copy) != before
+    edited, _ = MeteorologicalData.from_csv(meteorological_copy)
+    pd.testing.assert_frame_equal(edited, MeteorologicalData.from_csv(meteorological_copy, use_cache=False)[0])
+    assert not edited.equals(winter)
+
+
+def test_store_and_clear(meteorological_copy, isolated_cache):
+    records = FileCache.to_records(pd.DataFrame({'Hour': [0.0, 1.0], 'Irradiation (kW/m^2)': [0.5, 0.25]}))
+    FileCache.store(FileCache.key(meteorological_copy), 'test', records)
+    pd.testing.assert_frame_equal(FileCache.from_records(FileCache.load(FileCache.key(meteorological_copy), 'test')),
+                                  FileCache.from_records(records))
+
+    FileCache.clear()
+    assert FileCache.load(FileCache.key(meteorological_copy), 'test') is None
+    assert not [name for name in os.listdir(isolated_cache) if name.endswith('.npy')]
+
+
+def test_each_read_hashes_the_file_once(meteorological_copy, load_profile_path, monkeypatch):
+    hashed = []
+    key = FileCache.key
+    monkeypatch.setattr(FileCache, 'key', staticmethod(lambda file_path: hashed.append(file_path) or key(file_path)))
+    for _ in range(2):
+        MeteorologicalData.from_csv(meteorological_copy)
+        MeteorologicalData.hourly_from_csv(meteorological_copy)
+        ElectricLoad.from_excel(load_profile_path)
+    assert hashed == [meteorological_copy, meteorological_copy, load_profile_path] * 2
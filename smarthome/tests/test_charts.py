@@ -0,0 +1,74 @@
+import tkinter as tk
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+matplotlib.use('Agg')
+
+from modules.charts import PROFILES, SeasonalCharts, Y_MARGIN, _Panel  # noqa: E402
+from modules.pipeline import Pipeline  # noqa: E402
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture
+def root():
+    """ A hidden Tk window; the chart tests need a display. """
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def axis():
+    return Figure().subplots()
+
+
+def test_ylim_is_kept_while_the_values_fit(axis):
+    panel = _Panel.__new__(_Panel)
+    assert panel.set_ylim(axis, 0, 4.0)
+    assert axis.get_ylim() == pytest.approx((0, 4.0 * Y_MARGIN))
+    # Values that still use at least half of the axis keep it, so the bars can be blitted
+    assert not panel.set_ylim(axis, 0, 3.0)
+    assert panel.set_ylim(axis, 0, 5.0)
+    assert panel.set_ylim(axis, 0, 1.0)
+    assert panel.set_ylim(axis, -0.5, 1.0)
+    assert axis.get_ylim() == pytest.approx((-0.5 * Y_MARGIN, 1.0 * Y_MARGIN))
+    # An all-zero panel still gets a usable axis
+    assert panel.set_ylim(axis, 0, 0)
+    assert axis.get_ylim() == pytest.approx((0, Y_MARGIN))
+
+
+def test_missing_hours_have_no_irradiation():
+    irradiation = SeasonalCharts._hourly(pd.DataFrame({'Hour': [10, 12], 'Irradiation (kW/m^2)': [0.5, 0.25]}))
+    assert irradiation.shape == (24,)
+    assert irradiation[[10, 12]].tolist() == [0.5, 0.25]
+    assert irradiation.sum() == 0.75
+
+
+def test_update_sets_every_artist_in_place(root, profiles, seasonal_meteorology):
+    charts = SeasonalCharts(root)
+    results = [Pipeline.analyze_season(profile.copy(), meteorology, 3.0, PEAK_HOURS) for profile, meteorology in zip(profiles, seasonal_meteorology)]
+    bars = charts.load_bars[0][0]
+
+    charts.update(*results, *seasonal_meteorology, 3.0, PEAK_HOURS)
+    for profile_bars, profile in zip(charts.load_bars[0], PROFILES):
+        np.testing.assert_allclose([bar.get_height() for bar in profile_bars], results[0][f'{profile.lower()}_hourly']['Power (kW)'])
+    assert [bar.get_height() for bar in charts.cost_bars[1]] == [results[1][f'{profile.lower()}_cost'] for profile in PROFILES]
+    assert list(charts.threshold_lines[0].get_ydata()) == [3.0, 3.0]
+    spans = charts.peak_spans
+
+    charts.update(*results, *seasonal_meteorology, 2.0, PEAK_HOURS)
+    assert charts.load_bars[0][0] is bars
+    assert charts.peak_spans is spans
+    assert list(charts.threshold_lines[1].get_ydata()) == [2.0, 2.0]
+
+    charts.update(*results, *seasonal_meteorology, 2.0, list(range(16, 20)))
+    assert charts.peak_spans is not spans and len(charts.peak_spans) == 2
@@ -0,0 +1,75 @@
+import csv
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from modules import pipeline
+from modules.cli import DISPATCH_METHODS, SHIFT_METHODS, SUMMARY_COLUMNS, main
+from modules.pipeline import Pipeline
+
+SMARTHOME_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PEAK_HOURS = list(range(17, 23))
+
+
+def test_methods_match_the_pipeline():
+    assert SHIFT_METHODS == pipeline.SHIFT_METHODS
+    assert DISPATCH_METHODS == pipeline.DISPATCH_METHODS
+
+
+@pytest.mark.parametrize('option', [['--shift-method', 'fastest'], ['--dispatch', 'greedy'], ['--peak-hours', '17-24'], ['--seasons', 'spring'],
+                                    ['--log-level', 'bogus']])
+def test_invalid_arguments_are_rejected(load_profile_path, meteorological_path, option, capsys):
+    with pytest.raises(SystemExit) as error:
+        main([load_profile_path, meteorological_path, *option])
+    assert error.value.code == 2
+    assert f'argument {option[0]}' in capsys.readouterr().err
+
+
+def test_json_report_equals_the_pipeline(load_profile_path, meteorological_path, profiles, seasonal_meteorology, tmp_path):
+    output = tmp_path / 'report.json'
+    assert main([load_profile_path, meteorological_path, '--threshold', '2.5', '--dispatch', 'optimal', '--output', str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert report['seasons'] == ['winter', 'summer'] and report['peak_hours'] == PEAK_HOURS
+    for season, profile, meteorology in zip(report['seasons'], profiles, seasonal_meteorology):
+        expected = Pipeline.analyze_season(profile.copy(), meteorology, 2.5, PEAK_HOURS, dispatch='optimal')
+        assert report[season]['shifted_cost'] == expected['shifted_cost']
+        assert report[season]['hourly']['battery'] == expected['battery_hourly']['Power (kW)'].tolist()
+        assert len(report[season]['soc']) == 24
+
+
+def test_csv_outputs(load_profile_path, meteorological_path, tmp_path):
+    output = tmp_path / 'summary.csv'
+    assert main([load_profile_path, meteorological_path, '--format', 'csv', '--seasons', 'day-types', '--output', str(output)]) == 0
+    rows = list(csv.reader(output.open()))
+    assert rows[0] == SUMMARY_COLUMNS and len(rows) == 5
+
+    output = tmp_path / 'year.csv'
+    assert main([load_profile_path, meteorological_path, '--year', '--format', 'csv', '--hourly', '--output', str(output)]) == 0
+    assert sum(1 for _ in output.open()) == 8760 + 1
+
+
+@pytest.mark.parametrize('tool', ['cli', 'controller', 'fleet', 'lifecycle', 'monte_carlo', 'neighborhood'])
+def test_every_tool_checks_the_log_level(tool, capsys):
+    tool_main = importlib.import_module(f'modules.{tool}').main
+    with pytest.raises(SystemExit) as error:
+        tool_main(['--log-level', 'bogus'])
+    assert error.value.code == 2 and 'argument --log-level' in capsys.readouterr().err
+
+    # Any case is accepted; --help stops before anything runs
+    with pytest.raises(SystemExit):
+        tool_main(['--log-level', 'error', '--help'])
+    assert 'invalid choice' not in capsys.readouterr().err
+
+
+def test_unreadable_inputs_return_an_error(meteorological_path, tmp_path):
+    assert main([str(tmp_path / 'missing.xlsx'), meteorological_path]) == 1
+
+
+def test_importing_the_cli_does_not_import_pandas():
+    code = "import sys, modules.cli; print('pandas' in sys.modules or 'numpy' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=SMARTHOME_DIRECTORY, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == 'False'
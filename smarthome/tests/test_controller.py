@@ -0,0 +1,80 @@
+import asyncio
+import csv
+
+import numpy as np
+import pytest
+
+from modules.battery import Battery
+from modules.controller import DECISION_COLUMNS, BatteryController, SimulatedMeter, main
+from modules.pipeline import CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY, Pipeline
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def fresh_battery(profile_df):
+    _, capacity = Pipeline.size_battery(profile_df)
+    return Battery(capacity, CHARGE_RATE, DISCHARGE_RATE, capacity * INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY)
+
+
+def replay(controller, meter, latency_budget=1.0):
+    async def decisions():
+        return [decision async for decision in controller.run(meter, latency_budget)]
+    return asyncio.run(decisions())
+
+
+@pytest.mark.parametrize('threshold', [1.0, 3.0, 5.0])
+def test_replaying_a_day_equals_the_battery_simulation(profiles, seasonal_meteorology, threshold):
+    for profile, meteorology in zip(profiles, seasonal_meteorology):
+        simulated = fresh_battery(profile)
+        battery_profile, soc_df = simulated.simulate_battery(profile, meteorology, threshold, PEAK_HOURS)
+
+        controller = BatteryController(fresh_battery(profile), threshold, PEAK_HOURS)
+        decisions = replay(controller, SimulatedMeter(profile, meteorology, PANEL_AREA, PANEL_EFFICIENCY))
+        np.testing.assert_allclose([decision['Discharge (kW)'] for decision in decisions], battery_profile.discharge)
+        np.testing.assert_allclose([decision['Grid (kW)'] for decision in decisions], profile.load() - battery_profile.discharge)
+        # The simulation logs the SoC at the start of every hour, the controller after its tick
+        soc = [decision['State of Charge (%)'] for decision in decisions]
+        np.testing.assert_allclose(soc[:-1], soc_df['State of Charge (%)'][1:])
+        assert controller.battery.soc == pytest.approx(simulated.soc)
+
+
+def test_one_step_follows_the_rules():
+    battery = Battery(10.0, 0.5, 0.5, 40.0, PANEL_AREA, PANEL_EFFICIENCY)
+    controller = BatteryController(battery, 3.0, PEAK_HOURS)
+    # Peak hour without sun: discharge the excess down to 30%
+    decision = controller.step(18, 5.0, 0.0)
+    assert decision['Discharge (kW)'] == pytest.approx(1.0) and decision['Grid (kW)'] == pytest.approx(4.0)
+    assert battery.soc == pytest.approx(30.0)
+    # Off-peak with sun: charge at most at the charge rate, up to 80%
+    decision = controller.step(10, 1.0, 20.0)
+    assert decision['Charge (kW)'] == pytest.approx(5.0) and decision['Discharge (kW)'] == 0
+    assert battery.soc == pytest.approx(80.0)
+    assert controller.step(11, 1.0, 20.0)['Charge (kW)'] == 0
+
+
+def test_short_ticks_keep_the_rates_and_the_energy_balance(profiles, seasonal_meteorology):
+    profile, meteorology = profiles[0], seasonal_meteorology[0]
+    battery = fresh_battery(profile)
+    start = battery.soc
+    controller = BatteryController(battery, 1.0, PEAK_HOURS, step_hours=1 / 4)
+    decisions = replay(controller, SimulatedMeter(profile, meteorology, PANEL_AREA, PANEL_EFFICIENCY, days=2, slots_per_hour=4))
+    assert len(decisions) == 2 * 24 * 4
+    charge = np.array([decision['Charge (kW)'] for decision in decisions])
+    discharge = np.array([decision['Discharge (kW)'] for decision in decisions])
+    assert charge.max() <= controller.max_charge + 1e-9 and discharge.max() <= controller.max_discharge + 1e-9
+    assert discharge.any()
+    # Every tick moves rate * step_hours kWh, so the SoC adds up over both days
+    assert battery.soc == pytest.approx(start + (charge - discharge).sum() / 4 * 100 / battery.capacity)
+
+
+def test_slow_decisions_are_counted(profiles, seasonal_meteorology):
+    controller = BatteryController(fresh_battery(profiles[1]), 3.0, PEAK_HOURS)
+    replay(controller, SimulatedMeter(profiles[1], seasonal_meteorology[1], PANEL_AREA, PANEL_EFFICIENCY), latency_budget=-1.0)
+    assert controller.overruns == 24
+
+
+def test_command_line_writes_one_row_per_tick(load_profile_path, meteorological_path, capsys):
+    assert main([load_profile_path, meteorological_path, '--season', 'summer', '--days', '2', '--slots-per-hour', '2']) == 0
+    rows = list(csv.reader(capsys.readouterr().out.splitlines()))
+    assert rows[0] == DECISION_COLUMNS and len(rows) == 2 * 24 * 2 + 1
+    assert [int(row[0]) for row in rows[1:5]] == [0, 0, 1, 1]
@@ -0,0 +1,75 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from modules.battery import Battery, MAX_CHARGE_SOC, MIN_DISCHARGE_SOC
+from modules.calculations import OVERLOAD_PENALTY
+from modules.pipeline import Pipeline
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def brute_force(load, solar, prices, capacity, charge_rate, discharge_rate, initial_soc, threshold, soc_step):
+    """ The lowest cost over every SoC path of the grid, checking the dispatch rules step by step. """
+    grid = np.arange(0, 100 + soc_step / 2, soc_step)
+    start = grid[np.abs(grid - initial_soc).argmin()]
+    best = np.inf
+    for path in itertools.product(grid, repeat=len(load)):
+        cost, soc = 0.0, start
+        for step, new_soc in enumerate(path):
+            change = (new_soc - soc) * capacity / 100
+            if change > 0 and (new_soc > MAX_CHARGE_SOC or change > min(solar[step], charge_rate * capacity) + 1e-9):
+                break
+            if change < 0 and (new_soc < MIN_DISCHARGE_SOC or -change > min(discharge_rate * capacity, load[step]) + 1e-9):
+                break
+            grid_load = load[step] - max(-change, 0)
+            cost += prices[step] * grid_load + OVERLOAD_PENALTY * max(grid_load - threshold, 0)
+            soc = new_soc
+        else:
+            best = min(best, cost)
+    return best
+
+
+def path_cost(load, discharge, prices, threshold):
+    grid_load = load - discharge
+    return float((prices * grid_load + OVERLOAD_PENALTY * np.maximum(grid_load - threshold, 0)).sum())
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_dynamic_programming_finds_the_brute_force_optimum(seed):
+    rng = np.random.default_rng(seed)
+    steps, soc_step, capacity = 5, 12.5, 4.0
+    load = np.round(rng.random(steps) * 3, 2)
+    solar = np.round(rng.random(steps) * 2, 2)
+    prices = rng.choice([0.1, 0.2, 0.3], steps)
+    threshold = float(rng.choice([1.0, 2.0, np.inf]))
+    initial_soc = float(rng.choice([25, 50, 75]))
+
+    discharge, soc = Battery.optimal_dispatch(load, solar, prices, capacity, 0.5, 0.5, initial_soc, 1.0, 1.0, threshold, soc_step)
+    expected = brute_force(load, solar, prices, capacity, 0.5, 0.5, initial_soc, threshold, soc_step)
+    assert path_cost(load, discharge[0], prices, threshold) == pytest.approx(expected)
+    assert soc.shape == (1, steps + 1) and soc[0, 0] == initial_soc
+
+
+def test_scenarios_are_solved_independently():
+    rng = np.random.default_rng(1)
+    load = np.round(rng.random((3, 24)) * 3, 2)
+    irradiance = rng.random(24)
+    prices = np.where(np.isin(np.arange(24), PEAK_HOURS), 0.3, 0.1)
+    capacities = np.array([2.0, 4.0, 8.0])
+    discharge, soc = Battery.optimal_dispatch(load, irradiance, prices, capacities, 0.2, 0.3, 60.0, 10, 0.7, 2.0, 5.0)
+    for index in range(3):
+        single, single_soc = Battery.optimal_dispatch(load[index], irradiance, prices, capacities[index], 0.2, 0.3, 60.0, 10, 0.7, 2.0, 5.0)
+        np.testing.assert_array_equal(discharge[index], single[0])
+        np.testing.assert_array_equal(soc[index], single_soc[0])
+
+
+@pytest.mark.parametrize('threshold', [1.0, 3.0, 5.0])
+def test_optimal_dispatch_costs_no_more_than_the_rules(profiles, seasonal_meteorology, threshold):
+    for profile, meteorology in zip(profiles, seasonal_meteorology):
+        rules = Pipeline.analyze_season(profile.copy(), meteorology, threshold, PEAK_HOURS)
+        optimal = Pipeline.analyze_season(profile.copy(), meteorology, threshold, PEAK_HOURS, dispatch='optimal')
+        assert optimal['battery_cost'] <= rules['battery_cost']
+        soc = optimal['soc']['State of Charge (%)']
+        assert soc.between(0, 100).all()
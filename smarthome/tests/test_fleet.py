@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+from modules.fleet import Fleet
+from modules.pipeline import Pipeline
+
+
+def test_fleet_rows_match_analyze_home(load_profile_path, meteorological_path, seasonal_meteorology, tmp_path):
+    homes = Fleet.from_directory(os.path.dirname(load_profile_path), meteorological_path)
+    output = tmp_path / 'fleet.csv'
+    assert Fleet.run(homes, 3.0, str(output), workers=2, use_store=False) == 0
+
+    results = pd.read_csv(output).set_index('Home')
+    assert sorted(results.index) == ['load_profile_v1', 'load_profile_v2', 'load_profile_v3']
+    winter, summer = Pipeline.analyze_home(load_profile_path, *seasonal_meteorology, 3.0)
+    row = results.loc['load_profile_v3']
+    for season, result in (('Winter', winter), ('Summer', summer)):
+        for profile in ('Original', 'Battery', 'Shifted'):
+            assert row[f'{season} Cost ({profile})'] == result[f'{profile.lower()}_cost']
+
+
+def test_manifest_thresholds_and_errors(load_profile_path, meteorological_path, tmp_path):
+    manifest = tmp_path / 'homes.csv'
+    pd.DataFrame({
+        'Home': ['low', 'high', 'missing'],
+        'Load Profile': [load_profile_path, load_profile_path, 'missing.xlsx'],
+        'Meteorological Data': [meteorological_path] * 3,
+        'Threshold': [2.0, None, 3.0],
+    }).to_csv(manifest, index=False)
+    homes = Fleet.from_manifest(str(manifest))
+    assert [home['Threshold'] for home in homes] == [2.0, None, 3.0]
+
+    output = tmp_path / 'fleet.csv'
+    assert Fleet.run(homes, 6.0, str(output), workers=1, use_store=False) == 1
+    results = pd.read_csv(output).set_index('Home')
+    assert results.loc['high', 'Threshold'] == 6.0
+    assert results.loc['missing', 'Error'].startswith('FileNotFoundError')
+    assert pd.isna(results.loc['low', 'Error'])
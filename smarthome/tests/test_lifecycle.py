@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from modules.battery import Battery
+from modules.lifecycle import CYCLE_LIFE, END_OF_LIFE_CAPACITY, Lifecycle
+from modules.pipeline import BATTERY_CAPACITY_RATIO, CHARGE_RATE, DISCHARGE_RATE, INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY, Pipeline
+
+PEAK_HOURS = list(range(17, 23))
+# The rainflow example of ASTM E1049-85 (Fig. 6): range -> cycles
+ASTM_SERIES = [-2, 1, -3, 5, -1, 3, -4, 4, -2]
+ASTM_CYCLES = {3: 0.5, 4: 1.5, 6: 0.5, 8: 1.0, 9: 0.5}
+
+
+def count(series, pieces=1):
+    """ Counts a series in pieces, as run does year by year, and adds the residue at the end. """
+    ranges, counts, residue = [], [], []
+    for piece in np.array_split(np.asarray(series, dtype=float), pieces):
+        piece_ranges, piece_counts, residue = Lifecycle.rainflow(Lifecycle.reversals(piece), residue)
+        ranges.extend(piece_ranges)
+        counts.extend(piece_counts)
+    residue_ranges, residue_counts = Lifecycle.residue_cycles(residue)
+    cycles = {}
+    for value, number in zip([*ranges, *residue_ranges], [*counts, *residue_counts]):
+        cycles[round(value, 9)] = cycles.get(round(value, 9), 0) + number
+    return cycles
+
+
+def test_reversals_keep_only_turning_points():
+    assert Lifecycle.reversals([1, 1, 2, 3, 3, 2, 5, 5]).tolist() == [1, 3, 2, 5]
+    assert Lifecycle.reversals([4, 4, 4]).tolist() == [4]
+    assert Lifecycle.reversals([1, 2]).tolist() == [1, 2]
+
+
+def test_astm_example():
+    assert count(ASTM_SERIES) == ASTM_CYCLES
+    ranges, counts, residue = Lifecycle.rainflow(ASTM_SERIES)
+    # Only the cycles closed inside the series are counted; the rest stays on the stack
+    assert sum(counts) + 0.5 * (len(residue) - 1) == sum(ASTM_CYCLES.values())
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_counting_in_pieces_equals_one_piece(seed):
+    rng = np.random.default_rng(seed)
+    series = np.round(rng.random(500) * 100, 1)
+    # Plateaus and monotonic runs across the cuts
+    series[100:110] = series[100]
+    series[200:220] = np.linspace(10, 90, 20)
+    whole = count(series)
+    for pieces in (2, 7, 50):
+        assert count(series, pieces) == pytest.approx(whole)
+
+
+def test_damage_and_payback():
+    assert Lifecycle.cycle_damage([100.0], [1.0]) == pytest.approx(1 / CYCLE_LIFE)
+    assert Lifecycle.cycle_damage([50.0, 50.0], [0.5, 0.5]) == pytest.approx(0.5 ** 1.5 / CYCLE_LIFE)
+
+    assert Lifecycle.payback(250.0, [100.0, 100.0, 100.0]) == pytest.approx(2.5)
+    assert Lifecycle.payback(400.0, [100.0, 100.0, 100.0]) is None
+    # No investment is repaid at once, even without savings
+    assert Lifecycle.payback(0.0, [0.0, 0.0]) == 0.0
+    assert Lifecycle.payback(0.0, [-10.0, 100.0]) == 0.0
+    # Discounting delays the payback
+    assert Lifecycle.payback(250.0, [100.0, 100.0, 100.0], 0.05) > 2.5
+
+
+def test_last_year_counts_the_residue(profiles, hourly_meteorology):
+    tables = {'Winter': profiles[0], 'Summer': profiles[1]}
+    result = Lifecycle.run(tables, hourly_meteorology, 3.0, PEAK_HOURS, years=1)['years']
+
+    # A single year counted in one piece, residue included
+    load = Pipeline.year_load(tables, hourly_meteorology)
+    capacity = load.max() * BATTERY_CAPACITY_RATIO
+    battery = Battery(capacity, CHARGE_RATE, DISCHARGE_RATE, capacity * INITIAL_SOC_RATIO, PANEL_AREA, PANEL_EFFICIENCY)
+    _, soc = battery.simulate_series(load, hourly_meteorology['Irradiation (kW/m^2)'].to_numpy(dtype=float),
+                                     hourly_meteorology['Hour'].to_numpy(dtype=np.int64), 3.0, PEAK_HOURS)
+    cycles = count(soc)
+    ranges, counts = np.array(list(cycles)), np.array(list(cycles.values()))
+    assert result['Equivalent Full Cycles'][0] == pytest.approx(np.dot(ranges, counts) / 100)
+    assert result['Cycle Fade (%)'][0] == pytest.approx(Lifecycle.cycle_damage(ranges, counts) * (1 - END_OF_LIFE_CAPACITY) * 100)
+
+    # Later years carry the SoC over, and the cycles add up over the years
+    years = Lifecycle.run(tables, hourly_meteorology, 3.0, PEAK_HOURS, years=3)['years']
+    assert len(years) == 3 and years['Capacity (kWh)'].is_monotonic_decreasing
+    assert years['Cycle Fade (%)'].is_monotonic_increasing
@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from modules import log
+from modules.log import LOGGER_NAME, configure, get_logger, span
+from modules.pipeline import Pipeline
+
+
+@pytest.fixture
+def smarthome_logger():
+    """ Restores the level and handlers of the smarthome logger after the test. """
+    root = logging.getLogger(LOGGER_NAME)
+    level, handlers = root.level, list(root.handlers)
+    yield root
+    root.setLevel(level)
+    root.handlers[:] = handlers
+
+
+def test_module_loggers_share_the_smarthome_logger():
+    root = logging.getLogger(LOGGER_NAME)
+    assert get_logger('battery').name == 'smarthome.battery'
+    assert get_logger('battery').parent is root
+
+
+def test_configure_sets_the_level_and_installs_one_handler(smarthome_logger, monkeypatch):
+    smarthome_logger.handlers[:] = []
+    configure('debug')
+    configure(logging.INFO)
+    assert smarthome_logger.level == logging.INFO
+    assert len(smarthome_logger.handlers) == 1
+
+    monkeypatch.setenv('SMARTHOME_LOG_LEVEL', 'ERROR')
+    configure()
+    assert smarthome_logger.level == logging.ERROR
+
+
+def test_disabled_span_does_not_read_the_clock(smarthome_logger, monkeypatch):
+    configure('WARNING')
+
+    def clock():
+        raise AssertionError("the clock was read")
+
+    monkeypatch.setattr(log.time, 'perf_counter', clock)
+    with span(get_logger('test'), "Stage"):
+        pass
+
+
+def test_enabled_span_logs_the_stage_time(smarthome_logger, caplog):
+    configure('INFO')
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME), span(get_logger('test'), "Battery simulation"):
+        pass
+    assert [record.getMessage().split(' took ')[0] for record in caplog.records] == ["Battery simulation"]
+    assert caplog.records[0].getMessage().endswith(' ms')
+
+
+def test_the_pipeline_prints_nothing(smarthome_logger, profiles, seasonal_meteorology, capsys, caplog):
+    configure('WARNING')
+    with caplog.at_level(logging.WARNING, logger=LOGGER_NAME):
+        Pipeline.analyze_season(profiles[0], seasonal_meteorology[0], 3.0, list(range(17, 23)))
+    assert capsys.readouterr().out == ''
+    assert not caplog.records
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.met_data import MeteorologicalData
+from modules.seasons import DEFAULT_SEASONS, Season
+
+
+def read_whole_file(meteorological_path):
+    """ The whole file in one DataFrame, as the readers did before streaming. """
+    df = pd.read_csv(meteorological_path, skiprows=10, low_memory=False)
+    df['time'] = pd.to_datetime(df['time'], format='%Y%m%d:%H%M', errors='coerce')
+    return df.dropna(subset=['time'])
+
+
+@pytest.fixture
+def longer_preamble(meteorological_path, tmp_path):
+    """ The sample file with three more preamble lines, as PVGIS writes for other databases. """
+    with open(meteorological_path) as f:
+        lines = f.readlines()
+    path = tmp_path / 'longer_preamble.csv'
+    path.write_text(''.join(['Extra line:\t1\n', 'Extra line:\t2\n', '\n'] + lines))
+    return str(path)
+
+
+@pytest.mark.parametrize('chunksize', [1000, 100_000])
+def test_streamed_seasonal_means_equal_a_whole_file_groupby(meteorological_path, chunksize):
+    df = read_whole_file(meteorological_path)
+    winter, summer = MeteorologicalData.seasonal_from_csv(meteorological_path, DEFAULT_SEASONS, use_cache=False, chunksize=chunksize)
+    for season, profile in zip(DEFAULT_SEASONS, (winter, summer)):
+        rows = df[df['time'].dt.month.isin(season.months)]
+        expected = pd.to_numeric(rows['H_sun']).groupby(rows['time'].dt.hour).mean()
+        np.testing.assert_array_equal(profile['Hour'], expected.index)
+        np.testing.assert_array_equal(profile['Irradiation (kW/m^2)'], expected.to_numpy())
+
+
+def test_overlapping_weekday_seasons(meteorological_path):
+    df = read_whole_file(meteorological_path)
+    seasons = (Season('january', [1]), Season('january weekend', [1], [5, 6]))
+    january, weekend = MeteorologicalData.seasonal_from_csv(meteorological_path, seasons, use_cache=False, chunksize=500)
+    rows = df[(df['time'].dt.month == 1) & (df['time'].dt.dayofweek >= 5)]
+    expected = pd.to_numeric(rows['H_sun']).groupby(rows['time'].dt.hour).mean()
+    np.testing.assert_array_equal(weekend['Irradiation (kW/m^2)'], expected.to_numpy())
+    assert len(january) == 24
+
+
+def test_hourly_rows_are_streamed_in_file_order(meteorological_path):
+    df = read_whole_file(meteorological_path)
+    hourly = MeteorologicalData.hourly_from_csv(meteorological_path, use_cache=False, chunksize=1000)
+    assert len(hourly) == len(df) == 8760
+    np.testing.assert_array_equal(hourly['time'], df['time'])
+    np.testing.assert_array_equal(hourly['Irradiation (kW/m^2)'], pd.to_numeric(df['H_sun']))
+    np.testing.assert_allclose(hourly['Irradiance (kW/m^2)'], pd.to_numeric(df['G(i)']) / 1000)
+    pd.testing.assert_frame_equal(hourly, MeteorologicalData.hourly_from_csv(meteorological_path, use_cache=False))
+
+
+def test_preambles_of_any_length(meteorological_path, longer_preamble):
+    pd.testing.assert_frame_equal(MeteorologicalData.hourly_from_csv(longer_preamble, use_cache=False),
+                                  MeteorologicalData.hourly_from_csv(meteorological_path, use_cache=False))
+    for moved, original in zip(MeteorologicalData.from_csv(longer_preamble, use_cache=False),
+                               MeteorologicalData.from_csv(meteorological_path, use_cache=False)):
+        pd.testing.assert_frame_equal(moved, original)
+
+
+def test_missing_columns_are_reported(tmp_path):
+    path = tmp_path / 'no_sun.csv'
+    path.write_text('time,P\n20230101:0010,0.0\n')
+    with pytest.raises(ValueError):
+        MeteorologicalData.hourly_from_csv(str(path), use_cache=False)
+    with pytest.raises(ValueError):
+        MeteorologicalData.from_csv(str(path), use_cache=False)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.appliances import ApplianceTable
+from modules.calculations import Calculations
+from modules.monte_carlo import MonteCarlo, SAMPLE_COLUMNS
+from modules.pipeline import Pipeline
+from modules.seasons import DEFAULT_SEASONS
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.mark.parametrize('profile, threshold, moved', [
+    # A window across midnight does not count as running in the peak, so nothing moves
+    (ApplianceTable(['Heater', 'Lamp'], [2.0, 0.5], [3, 2], [17, 17], [1, 23]), 2.0, False),
+    (ApplianceTable(['Lamp', 'Oven', 'Heater', 'Fridge'], [0.5, 3.0, 2.0, 0.2], [2, 3, 3, 1], [17, 18, 0, 0], [23, 20, 24, 24]), 4.0, True),
+])
+def test_shift_rule_matches_the_pipeline(profile, threshold, moved):
+    start, end, power = MonteCarlo.sample_windows(profile, 3, start_jitter=0, on_probability=1)
+    shifted_start, shifted_end = MonteCarlo.shift_loads(start, end, power, profile, np.zeros((3, 24)), threshold, PEAK_HOURS)
+    greedy = Calculations.shift_loads(profile.copy(), threshold, PEAK_HOURS)
+    for sample in range(3):
+        assert shifted_start[sample].tolist() == greedy.start.tolist() and shifted_end[sample].tolist() == greedy.end.tolist()
+    np.testing.assert_allclose(MonteCarlo.sample_load(shifted_start, shifted_end, power)[0], greedy.load())
+    assert (greedy.start != profile.start).any() == moved
+
+
+def test_shifted_day_is_priced_as_in_analyze_season(hourly_meteorology):
+    # Nothing can move, so the shifted day is the battery day adjusted by the discharge once more
+    profile = ApplianceTable(['Oven', 'Lamp'], [3.0, 0.5], [1, 1], [18, 17], [20, 23])
+    samples = MonteCarlo.run(profile, hourly_meteorology, 2.0, PEAK_HOURS, samples=20, season=DEFAULT_SEASONS[1],
+                             start_jitter=0, on_probability=1, seed=1)['samples']
+    assert (samples['Battery Peak (kW)'] < samples['Original Peak (kW)']).all()
+    assert (samples['Shifted Cost'] < samples['Battery Cost']).all()
+    assert (samples['Shifted Peak (kW)'] <= samples['Battery Peak (kW)']).all()
+
+
+@pytest.mark.parametrize('season_index, threshold', [(0, 3.0), (1, 2.0), (1, 5.0)])
+def test_fixed_samples_reproduce_analyze_season(profiles, hourly_meteorology, season_index, threshold):
+    season, profile = DEFAULT_SEASONS[season_index], profiles[season_index]
+    result = MonteCarlo.run(profile, hourly_meteorology, threshold, PEAK_HOURS, samples=8, season=season,
+                            start_jitter=0, on_probability=1, seed=season_index)
+    samples = result['samples']
+    assert list(samples.columns) == SAMPLE_COLUMNS
+    assert result['percentiles'].index.tolist() == [5, 25, 50, 75, 95]
+
+    for _, sample in samples.iterrows():
+        rows = hourly_meteorology[hourly_meteorology['time'].dt.normalize() == sample['Day']]
+        meteorological_df = pd.DataFrame({'Hour': rows['Hour'].to_numpy(), 'Irradiation (kW/m^2)': rows['Irradiation (kW/m^2)'].to_numpy()})
+        expected = Pipeline.analyze_season(profile.copy(), meteorological_df, threshold, PEAK_HOURS, season=season)
+        assert [sample[f'{name} Cost'] for name in ('Original', 'Battery', 'Shifted')] == \
+               [expected[f'{name}_cost'] for name in ('original', 'battery', 'shifted')]
+        for name in ('original', 'battery', 'shifted'):
+            assert sample[f'{name.capitalize()} Peak (kW)'] == pytest.approx(expected[f'{name}_hourly']['Power (kW)'].max())
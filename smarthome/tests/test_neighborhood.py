@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from modules.appliances import ApplianceTable
+from modules.neighborhood import Neighborhood
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture
+def homes():
+    """ Two homes whose dishwashers and dryers overlap in the evening peak. """
+    first = ApplianceTable(['Fridge', 'Heater', 'Stand-by', 'Dishwasher', 'Lighting'],
+                           [0.2, 0.5, 0.0, 2.0, 0.3], [2, 3, 4, 5, 1], [0, 0, 10, 18, 17], [24, 24, 11, 21, 23])
+    second = ApplianceTable(['Fridge', 'Dryer', 'Oven'], [0.2, 2.5, 2.0], [1, 4, 1], [0, 19, 18], [24, 22, 20])
+    return [first, second]
+
+
+def test_only_eligible_appliances_are_shiftable(homes):
+    fixed_loads, shiftable_loads = Neighborhood.load_matrix(homes)
+    # The all-day heater and fridge of the first home stay fixed whatever their priority group
+    assert fixed_loads[0].tolist() == [0.7] * 17 + [1.0] * 6 + [0.7]
+    np.testing.assert_allclose(shiftable_loads[0], np.where((np.arange(24) >= 18) & (np.arange(24) < 21), 2.0, 0))
+    np.testing.assert_allclose(shiftable_loads[1], np.where((np.arange(24) >= 19) & (np.arange(24) < 22), 2.5, 0))
+    np.testing.assert_allclose(fixed_loads + shiftable_loads, [home.load() for home in homes])
+
+
+def test_shifting_keeps_energy_and_the_limit(homes):
+    fixed_loads, shiftable_loads = Neighborhood.load_matrix(homes)
+    shifted = Neighborhood.shift(fixed_loads, shiftable_loads, 4.0, PEAK_HOURS)
+    np.testing.assert_allclose(shifted.sum(axis=1), shiftable_loads.sum(axis=1))
+    assert (shifted >= -1e-12).all()
+    feeder = (fixed_loads + shifted).sum(axis=0)
+    assert feeder.max() <= 4.0 + 1e-9
+    # Moved load only lands outside the peak hours
+    added = shifted - shiftable_loads
+    assert (added[:, PEAK_HOURS] <= 1e-12).all() and added.max() > 0
+    # Both homes give up the same share in an overloaded hour
+    assert shifted[0, 19] / shiftable_loads[0, 19] == pytest.approx(shifted[1, 19] / shiftable_loads[1, 19])
+
+
+def test_shifting_is_an_energy_relaxation(homes):
+    # A two-hour run may end up spread thinly over many off-peak hours
+    fixed_loads, shiftable_loads = Neighborhood.load_matrix(homes)
+    shifted = Neighborhood.shift(fixed_loads, shiftable_loads, 4.0, PEAK_HOURS)
+    off_peak = np.setdiff1d(np.arange(24), PEAK_HOURS)
+    assert np.count_nonzero(shifted[0, off_peak] > 1e-9) > 3
+    assert shifted[0, off_peak].max() < homes[0].rated_power[3]
+
+
+def test_no_headroom_leaves_loads_in_place(homes):
+    fixed_loads, shiftable_loads = Neighborhood.load_matrix(homes)
+    np.testing.assert_array_equal(Neighborhood.shift(fixed_loads, shiftable_loads, 0.5, PEAK_HOURS), shiftable_loads)
+    np.testing.assert_array_equal(Neighborhood.shift(fixed_loads, shiftable_loads, 100.0, PEAK_HOURS), shiftable_loads)
+
+
+def test_batteries_cover_what_shifting_cannot(homes):
+    fixed_loads, shiftable_loads = Neighborhood.load_matrix(homes)
+    solar = np.where((np.arange(24) >= 8) & (np.arange(24) < 16), 3.0, 0)
+    result = Neighborhood.coordinate(fixed_loads, shiftable_loads, 3.0, PEAK_HOURS, capacities=[10.0, 0.0], solar_powers=solar)
+    assert result['original_feeder'].max() > result['feeder'].max()
+    np.testing.assert_allclose(result['overload'], np.maximum(result['feeder'] - 3.0, 0))
+    np.testing.assert_allclose(result['loads'], fixed_loads + result['shifted'] - result['discharge'])
+    # Only the home with a battery discharges, and never below 30% SoC
+    assert result['discharge'][0].any() and not result['discharge'][1].any()
+    assert result['soc'][0, 12:].min() >= 30 - 1e-9
@@ -0,0 +1,108 @@
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+from modules import pipeline
+from modules.cli import PV_MODELS, main
+from modules.pipeline import PANEL_AREA, PANEL_EFFICIENCY, Pipeline
+from modules.pv import PV
+from modules.result_store import SCHEMA, ResultStore
+from modules.seasons import DEFAULT_SEASONS
+
+PEAK_HOURS = list(range(17, 23))
+COSTS = ('original_cost', 'battery_cost', 'shifted_cost')
+
+
+def irradiance_powers(seasonal_meteorology):
+    """ The production the battery charges from without a PV model. """
+    powers = np.zeros((len(seasonal_meteorology), 24))
+    for index, meteorology in enumerate(seasonal_meteorology):
+        powers[index, meteorology['Hour'].to_numpy(dtype=np.int64)] = meteorology['Irradiation (kW/m^2)'].to_numpy(dtype=float)
+    return powers * PANEL_AREA * PANEL_EFFICIENCY
+
+
+def test_models_match_the_cli():
+    assert PV_MODELS == pipeline.PV_MODELS
+
+
+@pytest.mark.parametrize('dispatch', ['rules', 'optimal'])
+def test_irradiance_as_solar_power_reproduces_the_default(profiles, seasonal_meteorology, dispatch):
+    powers = irradiance_powers(seasonal_meteorology)
+    default = Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS, dispatch=dispatch)
+    given = Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS, dispatch=dispatch, solar_powers=powers)
+    for index, profile in enumerate(profiles):
+        single = Pipeline.analyze_season(profile.copy(), seasonal_meteorology[index], 3.0, PEAK_HOURS, dispatch=dispatch,
+                                         solar_power=powers[index])
+        for result in (given[index], single):
+            assert [result[cost] for cost in COSTS] == pytest.approx([default[index][cost] for cost in COSTS])
+            np.testing.assert_allclose(result['soc']['State of Charge (%)'], default[index]['soc']['State of Charge (%)'])
+
+
+def test_modelled_production_changes_the_battery(profiles, seasonal_meteorology, meteorological_path):
+    powers = Pipeline.solar_powers(meteorological_path, pv_model='irradiance', use_cache=False)
+    assert powers.shape == (2, 24) and (powers >= 0).all() and powers[:, 12].min() > 0
+    assert Pipeline.solar_powers(meteorological_path) is None
+    with pytest.raises(ValueError):
+        Pipeline.solar_powers(meteorological_path, pv_model='sun')
+
+    default = Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS)
+    modelled = Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS, solar_powers=powers)
+    assert any(not np.allclose(result['soc']['State of Charge (%)'], base['soc']['State of Charge (%)'])
+               for result, base in zip(modelled, default))
+    for index, profile in enumerate(profiles):
+        single = Pipeline.analyze_season(profile.copy(), seasonal_meteorology[index], 3.0, PEAK_HOURS, solar_power=powers[index])
+        assert [single[cost] for cost in COSTS] == pytest.approx([modelled[index][cost] for cost in COSTS])
+
+
+def test_seasonal_production_averages_the_year(meteorological_path):
+    hourly_df, production = PV.from_csv(meteorological_path, [5.0, 10.0], [0.7, 0.7], use_cache=False)
+    assert production.shape == (2, len(hourly_df))
+    # Production scales with the panel area
+    np.testing.assert_allclose(production[1], 2 * production[0])
+    winter, summer = PV.seasonal(hourly_df, production)
+    assert winter.shape == summer.shape == (2, 24)
+    assert summer[1].sum() > winter[1].sum()
+    np.testing.assert_allclose(PV.seasonal_from_csv(meteorological_path, panel_area=10.0, panel_efficiency=0.7, use_cache=False),
+                               [winter[1], summer[1]])
+
+
+def test_analysis_graph_reruns_the_battery_for_a_new_model(load_profile_path, meteorological_path, profiles, seasonal_meteorology):
+    params = dict(load_profile_file_path=load_profile_path, meteorological_file_path=meteorological_path, threshold=3.0,
+                  peak_hours=PEAK_HOURS, tariff=None, shift_method='greedy', dispatch='rules')
+    graph = Pipeline.analysis_graph()
+    graph.run(['winter', 'summer'], pv_model=None, **params)
+    assert graph.plan(['winter'], pv_model='irradiance', **params)[:2] == ['solar', 'battery']
+    result = graph.run(['winter'], pv_model='irradiance', **params)['winter']
+    powers = Pipeline.solar_powers(meteorological_path, pv_model='irradiance')
+    expected = Pipeline.analyze_season(profiles[0].copy(), seasonal_meteorology[0], 3.0, PEAK_HOURS, solar_power=powers[0])
+    assert [result[cost] for cost in COSTS] == pytest.approx([expected[cost] for cost in COSTS])
+
+
+def test_cli_reports_the_model(load_profile_path, meteorological_path, tmp_path):
+    output = tmp_path / 'report.json'
+    assert main([load_profile_path, meteorological_path, '--pv-model', 'irradiance', '--output', str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert report['pv_model'] == 'irradiance'
+
+    output = tmp_path / 'year.json'
+    assert main([load_profile_path, meteorological_path, '--year', '--pv-model', 'pvgis', '--output', str(output)]) == 0
+    assert json.loads(output.read_text())['pv_model'] == 'pvgis'
+
+
+def test_result_store_keys_and_migrates_the_model(load_profile_path, meteorological_path, profiles, seasonal_meteorology, tmp_path):
+    default = ResultStore.inputs(load_profile_path, meteorological_path, 3.0, PEAK_HOURS)
+    modelled = ResultStore.inputs(load_profile_path, meteorological_path, 3.0, PEAK_HOURS, pv_model='irradiance')
+    assert default['key'] != modelled['key']
+
+    # A database created before the column existed gets it on first use
+    path = tmp_path / 'old.sqlite3'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(SCHEMA.replace(',\n    pv_model TEXT', ''))
+        assert 'pv_model' not in {row[1] for row in connection.execute("PRAGMA table_info(runs)")}
+    store = ResultStore(str(path))
+    results = Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS)
+    store.store(modelled, DEFAULT_SEASONS, results)
+    assert store.summary()['pv_model'].tolist() == ['irradiance', 'irradiance']
+    assert store.load(modelled['key'])[0]['shifted_cost'] == results[0]['shifted_cost']
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from modules.calculations import Calculations
+from modules.pipeline import Pipeline
+
+PEAK_HOURS = list(range(17, 23))
+COSTS = ('original_cost', 'battery_cost', 'shifted_cost')
+
+
+@pytest.mark.parametrize('threshold', [1.0, 3.0, 5.0])
+def test_one_slot_per_hour_equals_the_hourly_pipeline(profiles, seasonal_meteorology, threshold):
+    for profile, meteorology in zip(profiles, seasonal_meteorology):
+        hourly = Pipeline.analyze_season(profile.copy(), meteorology, threshold, PEAK_HOURS, shift_method='optimal')
+        slots = Pipeline.analyze_season_slots(profile.copy(), meteorology, threshold, PEAK_HOURS, 1)
+        assert [slots[cost] for cost in COSTS] == [hourly[cost] for cost in COSTS]
+        np.testing.assert_allclose(slots['battery_load'], hourly['battery_hourly']['Power (kW)'])
+        np.testing.assert_allclose(slots['shifted_load'], hourly['shifted_hourly']['Power (kW)'])
+
+
+def test_the_shifted_profile_is_adjusted_by_the_battery_profile(profiles, seasonal_meteorology):
+    result = Pipeline.analyze_season(profiles[0].copy(), seasonal_meteorology[0], 3.0, PEAK_HOURS)
+    battery_profile, shifted_profile = result['battery_profile'], result['shifted_profile']
+    assert battery_profile.discharge.any()
+    np.testing.assert_allclose(result['battery_hourly']['Power (kW)'], profiles[0].load() - battery_profile.discharge)
+    # The shifted profile keeps the discharge channel and the battery profile is subtracted once more
+    np.testing.assert_allclose(result['shifted_hourly']['Power (kW)'], shifted_profile.load() - battery_profile.discharge)
+    assert Calculations.generate_adjusted_profile(shifted_profile, battery_profile).equals(result['shifted_hourly'])
+
+
+def test_finer_slots_keep_whole_hour_costs(profiles, seasonal_meteorology):
+    hourly = Pipeline.analyze_season_slots(profiles[1].copy(), seasonal_meteorology[1], 3.0, PEAK_HOURS, 1)
+    quarter = Pipeline.analyze_season_slots(profiles[1].copy(), seasonal_meteorology[1], 3.0, PEAK_HOURS, 4)
+    assert quarter['original_cost'] == hourly['original_cost']
+    np.testing.assert_allclose(quarter['original_load'], np.repeat(hourly['original_load'], 4))
+    assert quarter['shifted_cost'] <= quarter['original_cost']
+
+    with pytest.raises(ValueError):
+        Pipeline.analyze_season_slots(profiles[1].copy(), seasonal_meteorology[1], 3.0, PEAK_HOURS, 3)
@@ -0,0 +1,90 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from modules.pipeline import Pipeline
+from modules.result_store import ResultStore
+from modules.seasons import DEFAULT_SEASONS, SEASON_SETS
+from modules.tariff import Tariff
+
+PEAK_HOURS = list(range(17, 23))
+COSTS = ('max_load', 'capacity', 'original_cost', 'battery_cost', 'shifted_cost')
+
+
+@pytest.fixture
+def results(profiles, seasonal_meteorology):
+    return Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS, DEFAULT_SEASONS)
+
+
+def test_stored_results_equal_fresh_ones(load_profile_path, meteorological_path, results):
+    store = ResultStore()
+    inputs = ResultStore.inputs(load_profile_path, meteorological_path, 3.0, PEAK_HOURS)
+    assert store.load(inputs['key']) is None
+    store.store(inputs, DEFAULT_SEASONS, results)
+
+    stored = store.load(inputs['key'])
+    assert len(stored) == 2
+    for restored, fresh in zip(stored, results):
+        assert [restored[name] for name in COSTS] == [pytest.approx(float(fresh[name])) for name in COSTS]
+        for profile in ('original_hourly', 'battery_hourly', 'shifted_hourly'):
+            np.testing.assert_allclose(restored[profile]['Power (kW)'], fresh[profile]['Power (kW)'][:24])
+        np.testing.assert_allclose(restored['soc']['State of Charge (%)'], fresh['soc']['State of Charge (%)'])
+    # A run read with other seasons is not returned
+    assert store.load(inputs['key'], SEASON_SETS['monthly']) is None
+
+
+def test_key_follows_file_content_and_parameters(load_profile_path, meteorological_path, tmp_path):
+    key = ResultStore.inputs(load_profile_path, meteorological_path, 3.0, PEAK_HOURS)['key']
+    # Moving a file keeps the key
+    moved = tmp_path / 'moved.xlsx'
+    shutil.copy(load_profile_path, moved)
+    assert ResultStore.inputs(str(moved), meteorological_path, 3.0, PEAK_HOURS)['key'] == key
+    # Editing it does not
+    edited = tmp_path / 'edited.csv'
+    edited.write_bytes(open(meteorological_path, 'rb').read() + b'\n')
+    assert ResultStore.inputs(load_profile_path, str(edited), 3.0, PEAK_HOURS)['key'] != key
+
+    changed = [
+        dict(threshold=2.5),
+        dict(peak_hours=list(range(18, 23))),
+        dict(seasons=SEASON_SETS['day-types']),
+        dict(tariff=Tariff.time_of_use([(22, 6, 0.05)], 0.25)),
+        dict(shift_method='optimal'),
+        dict(dispatch='optimal'),
+        dict(capacity=5.0),
+        dict(panel_area=12.0),
+    ]
+    arguments = dict(threshold=3.0, peak_hours=PEAK_HOURS)
+    keys = {ResultStore.inputs(load_profile_path, meteorological_path, **{**arguments, **change})['key'] for change in changed}
+    assert len(keys) == len(changed) and key not in keys
+    # Peak hours are keyed as a set
+    assert ResultStore.inputs(load_profile_path, meteorological_path, 3.0, PEAK_HOURS[::-1])['key'] == key
+
+
+def test_summary_and_clear(load_profile_path, meteorological_path, results, tmp_path):
+    store = ResultStore(str(tmp_path / 'runs' / 'results.sqlite3'))
+    for threshold in (3.0, 2.0):
+        store.store(ResultStore.inputs(load_profile_path, meteorological_path, threshold, PEAK_HOURS), DEFAULT_SEASONS, results)
+    # Storing a run again replaces it
+    inputs = ResultStore.inputs(load_profile_path, meteorological_path, 2.0, PEAK_HOURS)
+    store.store(inputs, DEFAULT_SEASONS, results)
+
+    summary = store.summary()
+    assert len(summary) == 4 and summary['threshold'].tolist() == [2.0, 2.0, 3.0, 3.0]
+    assert summary['season'].tolist() == ['winter', 'summer'] * 2
+    winter = store.summary(inputs['load_profile_hash'], season='winter')
+    assert winter['shifted_cost'].tolist() == pytest.approx([results[0]['shifted_cost']] * 2)
+    assert store.summary('0' * 64).empty
+
+    store.clear()
+    assert store.summary().empty and store.load(inputs['key']) is None
+
+
+def test_unwritable_store_only_disables_storing(load_profile_path, meteorological_path, results, tmp_path):
+    path = tmp_path / 'not-a-database.sqlite3'
+    path.write_text('plain text')
+    store = ResultStore(str(path))
+    inputs = ResultStore.inputs(load_profile_path, meteorological_path, 3.0, PEAK_HOURS)
+    store.store(inputs, DEFAULT_SEASONS, results)
+    assert store.load(inputs['key']) is None
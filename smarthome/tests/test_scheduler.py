@@ -0,0 +1,79 @@
+import logging
+
+import numpy as np
+import pytest
+
+from modules.appliances import ApplianceTable
+from modules import scheduler
+from modules.calculations import Calculations
+from modules.log import LOGGER_NAME
+from modules.scheduler import Scheduler
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def cost_and_overload(profile, threshold, slots_per_hour=1):
+    load = profile.load(slots_per_hour)
+    cost = Calculations.calculate_slot_costs(load, PEAK_HOURS, slots_per_hour)
+    return cost, np.maximum(load - threshold, 0).sum()
+
+
+def durations(profile):
+    return np.where(profile.start < profile.end, profile.end - profile.start, profile.end - profile.start + 24)
+
+
+def test_a_single_load_moves_to_the_cheapest_hours_under_the_threshold():
+    profile = ApplianceTable(['Base', 'Dryer'], [2.0, 2.0], [1, 3], [22, 18], [3, 21])
+    shifted = Scheduler.schedule(profile, 3.0, PEAK_HOURS)
+    # The fixed base load fills 22:00 to 03:00 up to the threshold, so the dryer takes the next off-peak hours
+    assert shifted.start.tolist() == [22, 3]
+    assert shifted.end.tolist() == [3, 6]
+
+
+def test_the_log_tells_when_the_time_budget_ends_the_search(caplog, monkeypatch):
+    # The dryer already sits in the cheapest hours, so a pass moves nothing
+    profile = ApplianceTable(['Base', 'Dryer'], [2.0, 2.0], [1, 3], [22, 3], [3, 6])
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        Scheduler.schedule(profile.copy(), 3.0, PEAK_HOURS)
+        # The clock runs out during the first pass, before anything improved
+        clock = iter([0.0, 0.0])
+        monkeypatch.setattr(scheduler.time, 'perf_counter', lambda: next(clock, 10.0))
+        Scheduler.schedule(profile.copy(), 3.0, PEAK_HOURS, time_budget=1.0)
+    messages = [record.getMessage() for record in caplog.records if record.getMessage().startswith('Load scheduling completed')]
+    assert [message.endswith(', time budget reached.') for message in messages] == [False, True]
+
+
+def test_fixed_appliances_keep_their_hours():
+    profile = ApplianceTable(['Fridge', 'Lights', 'Pump', 'Idle'], [1.0, 0.5, 0.8, 0.0], [1, 2, 3, 3], [18, 0, 0, 18], [22, 24, 24, 21])
+    shifted = Scheduler.schedule(profile.copy(), 1.0, PEAK_HOURS)
+    np.testing.assert_array_equal(shifted.start, profile.start)
+    np.testing.assert_array_equal(shifted.end, profile.end)
+
+
+def test_a_run_starting_at_midnight_of_the_next_day():
+    # Start = 24 used to index past the last slot
+    profile = ApplianceTable(['Heater', 'Oven'], [2.0, 3.0], [3, 3], [24, 18], [3, 20])
+    before = profile.load()
+    shifted = Scheduler.schedule(profile.copy(), 3.0, PEAK_HOURS)
+    assert before[:3].tolist() == [2.0] * 3
+    assert shifted.start[0] in (0, 24) and shifted.end[0] == 3
+    assert cost_and_overload(shifted, 3.0) <= cost_and_overload(profile, 3.0)
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('slots_per_hour', [1, 4])
+def test_schedule_is_never_worse_and_keeps_durations(seed, slots_per_hour):
+    rng = np.random.default_rng(seed)
+    count = 30
+    start = rng.integers(0, 25, count).astype(float)
+    end = rng.integers(0, 25, count).astype(float)
+    profile = ApplianceTable([f"App{i}" for i in range(count)], np.round(rng.random(count) * 2, 3), rng.integers(1, 6, count), start, end)
+    threshold = float(rng.choice([2.0, 4.0, 8.0]))
+
+    cost, overload = cost_and_overload(profile, threshold, slots_per_hour)
+    shifted = Scheduler.schedule(profile.copy(), threshold, PEAK_HOURS, time_budget=10.0, slots_per_hour=slots_per_hour)
+    new_cost, new_overload = cost_and_overload(shifted, threshold, slots_per_hour)
+    assert new_overload <= overload + 1e-9
+    if new_overload == pytest.approx(overload):
+        assert new_cost <= cost
+    np.testing.assert_array_equal(durations(shifted) % 24, durations(profile) % 24)
@@ -0,0 +1,47 @@
+import pytest
+
+from modules.met_data import MeteorologicalData
+from modules.pipeline import Pipeline
+from modules.seasons import DEFAULT_SEASONS, MONTHLY_PROFILES, SEASON_SETS, WEEKEND, Season
+
+PEAK_HOURS = list(range(17, 23))
+COSTS = ('original_cost', 'battery_cost', 'shifted_cost')
+
+
+def test_definitions_are_validated_and_normalized():
+    season = Season('autumn', [11, 9, 10, 9], weekdays=[4, 0])
+    assert season.months == (9, 10, 11) and season.weekdays == (0, 4) and season.profile == 'Autumn'
+    assert season == Season('autumn', [9, 10, 11], [0, 4]) and len({season, Season('autumn', [9, 10, 11], [4, 0])}) == 1
+    for months, weekdays in (([], None), ([13], None), ([1], []), ([1], [7])):
+        with pytest.raises(ValueError):
+            Season('bad', months, weekdays)
+
+
+def test_season_sets():
+    monthly = SEASON_SETS['monthly']
+    assert [season.name for season in monthly[:2]] == ['january', 'february']
+    assert [season.profile for season in monthly] == [MONTHLY_PROFILES[month] for month in range(1, 13)]
+
+    day_types = Season.day_types([DEFAULT_SEASONS[0], Season('weekend only', [7], WEEKEND, 'Summer')])
+    assert [season.name for season in day_types] == ['winter weekday', 'winter weekend', 'weekend only weekend']
+    assert day_types[0].months == DEFAULT_SEASONS[0].months and day_types[2].profile == 'Summer'
+
+    assert Season.digest(DEFAULT_SEASONS) == Season.digest(tuple(DEFAULT_SEASONS))
+    assert Season.digest(DEFAULT_SEASONS) != Season.digest(SEASON_SETS['day-types'])
+
+
+def test_any_season_set_runs_as_one_batch(load_profile_path, meteorological_path):
+    seasons = SEASON_SETS['day-types']
+    profiles, meteorology = Pipeline.load_seasons(load_profile_path, meteorological_path, seasons, use_cache=False)
+    assert [profile is profiles[0] for profile in profiles] == [True, True, False, False]
+    batch = Pipeline.analyze_seasons(profiles, meteorology, 3.0, PEAK_HOURS, seasons, shift_method='optimal')
+    for profile, meteorological_df, season, expected in zip(profiles, meteorology, seasons, batch):
+        result = Pipeline.analyze_season(profile.copy(), meteorological_df, 3.0, PEAK_HOURS, shift_method='optimal', season=season)
+        assert [result[cost] for cost in COSTS] == [expected[cost] for cost in COSTS]
+
+
+def test_seasonal_meteorology_follows_the_definitions(meteorological_path):
+    winter, summer = MeteorologicalData.seasonal_from_csv(meteorological_path, DEFAULT_SEASONS, use_cache=False)
+    july, = MeteorologicalData.seasonal_from_csv(meteorological_path, [Season('july', [7], profile='Summer')], use_cache=False)
+    assert summer['Irradiation (kW/m^2)'].sum() > winter['Irradiation (kW/m^2)'].sum()
+    assert july['Irradiation (kW/m^2)'].max() > 0
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from modules.appliances import ApplianceTable
+from modules.calculations import Calculations, PEAK_END
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def reference_shift(profile, threshold, peak_hours):
+    """ The original rule: the summed load of a peak hour is recomputed from the whole profile after every shift. """
+    start, end, power = profile.start.copy(), profile.end.copy(), profile.rated_power
+    discharge = np.zeros(24) if profile.discharge is None else profile.discharge
+    by_priority = np.argsort(-profile.priority, kind='stable')
+
+    def total_load(hour):
+        return round(sum(p for s, e, p in zip(start, end, power) if s <= hour < e) - discharge[hour], 3)
+
+    shifted = set()
+    for hour in peak_hours:
+        if total_load(hour) <= threshold:
+            continue
+        running = [i for i in by_priority
+                   if profile.priority[i] != 1 and power[i] != 0 and not (start[i] == 0 and end[i] == 24) and start[i] <= hour < end[i]]
+        for i in sorted(running, key=lambda i: -power[i]):
+            if profile.name[i] in shifted:
+                continue
+            shift_start = (PEAK_END + 1) % 24
+            start[i], end[i] = shift_start, (shift_start + (int(end[i]) - int(start[i]))) % 24
+            shifted.add(profile.name[i])
+            if total_load(hour) <= threshold:
+                break
+    return start, end
+
+
+def random_profile(rng, count, battery):
+    start = rng.integers(0, 25, count).astype(float)
+    end = rng.integers(0, 25, count).astype(float)
+    all_day = rng.random(count) < 0.1
+    start[all_day], end[all_day] = 0, 24
+    power = np.round(rng.random(count) * rng.choice([0.5, 2, 3], count), 3)
+    power[rng.random(count) < 0.05] = 0
+    names = [f"App{index}" for index in rng.integers(0, max(2, count // 2), count)]
+    profile = ApplianceTable(names, power, rng.integers(1, 6, count), start, end)
+    if battery:
+        discharge = np.zeros(24)
+        discharge[rng.choice(PEAK_HOURS, 3, replace=False)] = np.round(rng.random(3), 3)
+        profile = profile.with_discharge(discharge)
+    return profile
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_incremental_shift_matches_full_recomputation(seed):
+    rng = np.random.default_rng(seed)
+    profile = random_profile(rng, int(rng.integers(1, 80)), battery=seed % 2 == 1)
+    threshold = float(rng.choice([0.5, 1, 2, 3, 5, 8]))
+
+    expected_start, expected_end = reference_shift(profile, threshold, PEAK_HOURS)
+    shifted = Calculations.shift_loads(profile.copy(), threshold, PEAK_HOURS)
+    np.testing.assert_array_equal(shifted.start, expected_start)
+    np.testing.assert_array_equal(shifted.end, expected_end)
+
+
+def test_shift_moves_the_largest_running_load_after_the_peak():
+    profile = ApplianceTable(['Lamp', 'Oven', 'Heater', 'Fridge'], [0.5, 3.0, 2.0, 1.0], [1, 3, 3, 2], [17, 18, 17, 0], [23, 20, 21, 24])
+    shifted = Calculations.shift_loads(profile.copy(), 4.0, PEAK_HOURS)
+    # Hour 18 has 6.5 kW; moving the oven (the largest candidate) brings it down to 3.5 kW
+    assert shifted.start.tolist() == [17, 23, 17, 0]
+    assert shifted.end.tolist() == [23, 1, 21, 24]
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from modules.pipeline import AnalysisCancelled, Pipeline
+from modules.stages import StageGraph
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def graph(calls, tmp_path):
+    """ parse(file) -> size -> battery(threshold) -> cost(threshold, tariff), as in the analysis graph. """
+
+    def stage(name, result):
+        def function(*args, **kwargs):
+            calls.append(name)
+            return result(*args, **kwargs)
+        return function
+
+    graph = StageGraph(cache_size=2)
+    graph.add('parse', stage('parse', lambda path: open(path).read()), files=['path'])
+    graph.add('size', stage('size', lambda text: len(text)), inputs=['parse'])
+    graph.add('battery', stage('battery', lambda size, threshold: size - threshold), inputs=['size'], params=['threshold'])
+    graph.add('cost', stage('cost', lambda battery, tariff: battery * tariff), inputs=['battery'], params=['tariff'])
+    return graph
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'profile.txt'
+    path.write_text('0123456789')
+    return str(path)
+
+
+def test_a_new_threshold_recomputes_only_its_dependents(graph, calls, path):
+    assert graph.run(['cost'], path=path, threshold=2, tariff=3) == {'cost': 24}
+    assert calls == ['parse', 'size', 'battery', 'cost']
+
+    calls.clear()
+    assert graph.plan(['cost'], path=path, threshold=4, tariff=3) == ['battery', 'cost']
+    assert graph.run(['cost'], path=path, threshold=4, tariff=3) == {'cost': 18}
+    assert calls == ['battery', 'cost']
+
+    calls.clear()
+    assert graph.run(['cost', 'size'], path=path, threshold=4, tariff=3) == {'cost': 18, 'size': 10}
+    assert calls == []
+
+
+def test_editing_a_file_invalidates_everything_downstream(graph, calls, path):
+    graph.run(['cost'], path=path, threshold=2, tariff=1)
+    calls.clear()
+    with open(path, 'a') as f:
+        f.write('ab')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert graph.run(['cost'], path=path, threshold=2, tariff=1) == {'cost': 10}
+    assert calls == ['parse', 'size', 'battery', 'cost']
+
+
+def test_recent_values_stay_cached(graph, calls, path):
+    for threshold in (1, 2, 1):
+        graph.run(['battery'], path=path, threshold=threshold, tariff=1)
+    assert calls.count('battery') == 2
+    # The cache keeps two results per stage; a third value evicts the least recently used one
+    graph.run(['battery'], path=path, threshold=3, tariff=1)
+    graph.run(['battery'], path=path, threshold=1, tariff=1)
+    graph.run(['battery'], path=path, threshold=2, tariff=1)
+    assert calls.count('battery') == 4
+
+
+def test_list_parameters_are_keyed_by_value(graph, calls, path):
+    graph.add('peak', lambda battery, peak_hours: battery + len(peak_hours), inputs=['battery'], params=['peak_hours'])
+    graph.run(['peak'], path=path, threshold=1, tariff=1, peak_hours=[17, 18])
+    assert graph.plan(['peak'], path=path, threshold=1, tariff=1, peak_hours=[17, 18]) == []
+    assert graph.plan(['peak'], path=path, threshold=1, tariff=1, peak_hours=[17, 19]) == ['peak']
+
+
+def test_a_cancelled_run_keeps_the_finished_stages(graph, calls, path):
+    def cancel_at_battery(stage):
+        if stage == 'battery':
+            raise AnalysisCancelled()
+
+    with pytest.raises(AnalysisCancelled):
+        graph.run(['cost'], progress=cancel_at_battery, path=path, threshold=2, tariff=1)
+    assert graph.plan(['cost'], path=path, threshold=2, tariff=1) == ['battery', 'cost']
+
+    graph.clear()
+    assert graph.plan(['cost'], path=path, threshold=2, tariff=1) == ['parse', 'size', 'battery', 'cost']
+
+
+def test_errors(graph, path):
+    with pytest.raises(ValueError):
+        graph.add('report', lambda result: result, inputs=['missing'])
+    with pytest.raises(ValueError):
+        graph.run(['missing'], path=path, threshold=1, tariff=1)
+    with pytest.raises(ValueError):
+        graph.run(['cost'], path=path, tariff=1)
+
+
+def test_analysis_graph_reuses_parsing_across_thresholds(load_profile_path, meteorological_path):
+    params = dict(load_profile_file_path=load_profile_path, meteorological_file_path=meteorological_path,
+                  peak_hours=list(range(17, 23)), tariff=None, shift_method='greedy', dispatch='rules', pv_model=None)
+    graph = Pipeline.analysis_graph()
+    graph.run(['winter', 'summer'], threshold=3.0, **params)
+    assert graph.plan(['winter', 'summer'], threshold=2.0, **params) == \
+           ['battery', 'shifting', 'hourly profiles', 'costs', 'results', 'winter', 'summer']
+
+    memoized = graph.run(['winter'], threshold=2.0, **params)['winter']
+    fresh = Pipeline.analysis_graph().run(['winter'], threshold=2.0, **params)['winter']
+    assert [memoized[f'{name}_cost'] for name in ('original', 'battery', 'shifted')] == \
+           [fresh[f'{name}_cost'] for name in ('original', 'battery', 'shifted')]
@@ -0,0 +1,33 @@
+import numpy as np
+
+from modules.pipeline import Pipeline
+from modules.sweep import Sweep
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def test_every_scenario_matches_analyze_season(profiles, seasonal_meteorology):
+    winter, _ = profiles
+    winter_met, _ = seasonal_meteorology
+    thresholds, capacities, panel_areas = [2.0, 4.0], [1.0, 4.2], [0.0, 10.0]
+    result = Sweep.run(winter, winter_met, thresholds, capacities, panel_areas, PEAK_HOURS)
+
+    scenarios = result['scenarios']
+    assert len(scenarios) == 8
+    for row in scenarios.itertuples(index=False):
+        threshold, capacity, panel_area, battery_cost, shifted_cost = row
+        expected = Pipeline.analyze_season(winter, winter_met, threshold, PEAK_HOURS, capacity=capacity, panel_area=panel_area)
+        assert battery_cost == expected['battery_cost']
+        assert shifted_cost == expected['shifted_cost']
+
+    assert result['surface'].shape == (2, 2, 2)
+    assert result['optimum']['Shifted Cost'] == scenarios['Shifted Cost'].min()
+
+
+def test_sweep_without_shifting_optimizes_the_battery_cost(profiles, seasonal_meteorology):
+    winter, _ = profiles
+    winter_met, _ = seasonal_meteorology
+    result = Sweep.run(winter, winter_met, [3.0], [1.0, 2.0, 4.0], [10.0], PEAK_HOURS, include_shifting=False)
+    assert 'Shifted Cost' not in result['scenarios']
+    # A larger battery never costs more under the same rules
+    assert np.all(np.diff(result['surface'][0, :, 0]) <= 0)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.calculations import Calculations
+from modules.pipeline import Pipeline
+from modules.seasons import DEFAULT_SEASONS, WINTER_MONTHS
+from modules.tariff import Tariff
+
+PEAK_HOURS = list(range(17, 23))
+COSTS = ('original_cost', 'battery_cost', 'shifted_cost')
+
+
+def original_cost(load, peak_hours):
+    """ The hour-by-hour loop calculate_energy_cost replaced. """
+    total_cost = 0
+    for hour in range(24):
+        if hour in peak_hours:
+            total_cost += load[hour] * 0.3
+        elif 6 <= hour < 17:
+            total_cost += load[hour] * 0.2
+        else:
+            total_cost += load[hour] * 0.1
+    return round(total_cost, 2)
+
+
+@pytest.fixture
+def price_file(tmp_path):
+    """ Two weeks of hourly prices: the hour of day in cents, plus 1 $/kWh on weekends. """
+    time = pd.date_range('2024-01-01', periods=14 * 24, freq='h')
+    price = time.hour / 100 + (time.dayofweek >= 5)
+    path = tmp_path / 'prices.csv'
+    pd.DataFrame({'time': time.strftime('%Y-%m-%d %H:%M'), 'Price': price}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_bands_override_in_order_and_wrap_across_midnight():
+    tariff = Tariff.time_of_use([(22, 6, 0.05), (0, 24, 0.2), (23, 2, 0.01)], 0.3)
+    prices = tariff.prices(np.arange(24))
+    assert prices[[23, 0, 1]].tolist() == [0.01] * 3
+    assert prices[2:23].tolist() == [0.2] * 21
+
+
+def test_month_and_weekday_bands():
+    tariff = Tariff.time_of_use([{'start': 17, 'end': 22, 'price': 0.5, 'months': [12, 1, 2], 'weekdays': [0, 1, 2, 3, 4]}], 0.1)
+    assert tariff.prices([18], months=[1], weekdays=[0])[0] == 0.5
+    assert tariff.prices([18], months=[1], weekdays=[6])[0] == 0.1
+    assert tariff.prices([18], months=[7])[0] == 0.1
+    # A typical winter day stands for five weekdays at 0.5 and two weekend days at 0.1
+    assert tariff.prices([18], months=[1])[0] == pytest.approx((5 * 0.5 + 2 * 0.1) / 7)
+
+    time = pd.DatetimeIndex(['2024-01-01 18:00', '2024-01-06 18:00', '2024-07-01 18:00'])
+    assert tariff.prices(time).tolist() == [0.5, 0.1, 0.1]
+    assert tariff.calendar_prices([18, 18, 18], time.month, time.dayofweek).tolist() == [0.5, 0.1, 0.1]
+
+
+def test_default_tariff_costs_equal_the_original_loop():
+    rng = np.random.default_rng(0)
+    for load in np.round(rng.random((20, 24)) * 5, 3):
+        cost = Calculations.calculate_energy_cost(pd.DataFrame({'Power (kW)': load}), PEAK_HOURS)
+        assert cost == original_cost(load, PEAK_HOURS)
+
+
+def test_dynamic_prices_from_csv(price_file):
+    tariff = Tariff.from_csv(price_file, name='Day ahead')
+    assert len(tariff.series) == 14 * 24
+    np.testing.assert_allclose(tariff.prices(np.arange(24), weekdays=[0, 1, 2, 3, 4]), np.arange(24) / 100)
+    np.testing.assert_allclose(tariff.prices(np.arange(24)), np.arange(24) / 100 + 2 / 7)
+    time = pd.DatetimeIndex(['2024-01-06 12:30'])
+    np.testing.assert_allclose(tariff.prices(time), [1.12])
+    np.testing.assert_allclose(tariff.calendar_prices([12], [1], [5]), [1.12])
+
+    with pytest.raises(ValueError):
+        tariff.prices(pd.DatetimeIndex(['2025-01-01 00:00']))
+    with pytest.raises(ValueError):
+        tariff.calendar_prices([12], [7], [5])
+    with pytest.raises(ValueError):
+        Tariff.from_csv(price_file, price_column='Cost')
+
+
+def test_costs_matrix_equals_one_profile_at_a_time(price_file):
+    tariffs = [Calculations.default_tariff(PEAK_HOURS), Tariff.time_of_use([(22, 6, 0.05)], 0.25), Tariff.from_csv(price_file)]
+    loads = np.round(np.random.default_rng(1).random((30, 24)) * 4, 3)
+    costs = Tariff.costs(loads, tariffs, np.arange(24))
+    assert costs.shape == (30, 3)
+    for row, load in zip(costs, loads):
+        np.testing.assert_allclose(row, [round(float(load @ tariff.prices(np.arange(24))), 2) for tariff in tariffs])
+    np.testing.assert_array_equal(Tariff.costs(loads[0], tariffs, np.arange(24)), costs[0])
+
+
+@pytest.mark.parametrize('dispatch', ['rules', 'optimal'])
+def test_one_season_is_priced_like_the_batch(profiles, seasonal_meteorology, dispatch):
+    # Peak prices in winter only, so the typical day must be priced at its own months
+    tariff = Tariff.time_of_use([{'start': 17, 'end': 23, 'price': 0.6, 'months': WINTER_MONTHS}, (6, 17, 0.2)], 0.1)
+    batch = Pipeline.analyze_seasons(profiles, seasonal_meteorology, 3.0, PEAK_HOURS, DEFAULT_SEASONS, tariff=tariff, dispatch=dispatch)
+    for profile, meteorology, season, expected in zip(profiles, seasonal_meteorology, DEFAULT_SEASONS, batch):
+        result = Pipeline.analyze_season(profile.copy(), meteorology, 3.0, PEAK_HOURS, tariff=tariff, dispatch=dispatch, season=season)
+        assert [result[cost] for cost in COSTS] == [expected[cost] for cost in COSTS]
+        np.testing.assert_allclose(result['soc']['State of Charge (%)'], expected['soc']['State of Charge (%)'])
+    # Without its season a summer day is priced at the average of the year
+    summer = Pipeline.analyze_season(profiles[1].copy(), seasonal_meteorology[1], 3.0, PEAK_HOURS, tariff=tariff, dispatch=dispatch)
+    assert summer['original_cost'] > batch[1]['original_cost']
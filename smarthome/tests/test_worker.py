@@ -0,0 +1,87 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from main import EnergyAnalyzerApp
+from modules.pipeline import AnalysisCancelled, Pipeline, SEASON_STAGES
+from modules.result_store import ResultStore
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture
+def app():
+    """ The worker side of the window: its stage graph, result store and message queue, without Tk. """
+    app = EnergyAnalyzerApp.__new__(EnergyAnalyzerApp)
+    app.graph = Pipeline.analysis_graph()
+    app.results = ResultStore()
+    app.messages = queue.Queue()
+    return app
+
+
+def drain(messages):
+    items = []
+    while not messages.empty():
+        items.append(messages.get_nowait())
+    return items
+
+
+def test_progress_reports_every_stage_in_order(profiles, seasonal_meteorology):
+    stages = []
+    Pipeline.analyze_season(profiles[0], seasonal_meteorology[0], 3.0, PEAK_HOURS, progress=stages.append)
+    assert stages == SEASON_STAGES
+
+
+def test_a_progress_callback_can_cancel_the_run(profiles, seasonal_meteorology):
+    stages = []
+
+    def cancel_at_shifting(stage):
+        stages.append(stage)
+        if stage == "Load shifting":
+            raise AnalysisCancelled()
+
+    with pytest.raises(AnalysisCancelled):
+        Pipeline.analyze_season(profiles[0], seasonal_meteorology[0], 3.0, PEAK_HOURS, progress=cancel_at_shifting)
+    assert stages == SEASON_STAGES[:2]
+
+
+def test_worker_reports_its_plan_and_returns_the_season_results(app, load_profile_path, meteorological_path, profiles, seasonal_meteorology):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(app.analyze, load_profile_path, meteorological_path, 3.0, PEAK_HOURS, 'greedy', 'rules', None, threading.Event())
+        winter, summer, winter_meteorology, _, threshold, peak_hours = future.result()
+
+    messages = drain(app.messages)
+    assert messages[0] == ('plan', len(app.graph.stages))
+    assert sorted(value for kind, value in messages[1:]) == sorted(app.graph.stages)
+    assert (threshold, peak_hours) == (3.0, PEAK_HOURS)
+    assert len(winter_meteorology) == len(seasonal_meteorology[0])
+    for result, profile, meteorology in zip((winter, summer), profiles, seasonal_meteorology):
+        expected = Pipeline.analyze_season(profile.copy(), meteorology, 3.0, PEAK_HOURS)
+        assert (result['original_cost'], result['battery_cost'], result['shifted_cost']) == \
+               (expected['original_cost'], expected['battery_cost'], expected['shifted_cost'])
+
+
+def test_a_repeated_run_is_read_from_the_caches(app, load_profile_path, meteorological_path):
+    first = app.analyze(load_profile_path, meteorological_path, 3.0, PEAK_HOURS, 'greedy', 'rules', None, threading.Event())
+    drain(app.messages)
+
+    # Only the threshold changed: parsing and sizing are reused
+    app.analyze(load_profile_path, meteorological_path, 2.5, PEAK_HOURS, 'greedy', 'rules', None, threading.Event())
+    stages = [value for kind, value in drain(app.messages) if kind == 'stage']
+    assert 'load_profile' not in stages and 'sizing' not in stages and 'battery' in stages
+
+    # A fresh window finds the first run in the result store and computes nothing but the irradiation
+    app.graph = Pipeline.analysis_graph()
+    again = app.analyze(load_profile_path, meteorological_path, 3.0, PEAK_HOURS, 'greedy', 'rules', None, threading.Event())
+    assert [value for kind, value in drain(app.messages) if kind == 'stage'] == ['meteorology']
+    assert again[0]['shifted_cost'] == first[0]['shifted_cost']
+
+
+def test_cancelling_stops_the_worker_before_the_next_stage(app, load_profile_path, meteorological_path):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(AnalysisCancelled):
+        app.analyze(load_profile_path, meteorological_path, 3.0, PEAK_HOURS, 'greedy', 'rules', None, cancel_event)
+    assert [kind for kind, value in drain(app.messages)] == ['plan']
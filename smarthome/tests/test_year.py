@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.battery import Battery
+from modules.calculations import Calculations
+from modules.cli import main
+from modules.pipeline import Pipeline
+from modules.tariff import Tariff
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def battery(capacity=3.0):
+    return Battery(capacity, 0.2, 0.3, capacity * 0.1, 10, 0.7)
+
+
+def test_one_day_of_simulate_year_matches_simulate_battery(profiles, seasonal_meteorology):
+    winter, _ = profiles
+    winter_met, _ = seasonal_meteorology
+    irradiance = np.zeros(24)
+    irradiance[winter_met['Hour'].to_numpy(dtype=int)] = winter_met['Irradiation (kW/m^2)'].to_numpy()
+    day = pd.DataFrame({'Month': 1, 'Hour': np.arange(24), 'Irradiation (kW/m^2)': irradiance})
+
+    discharge, soc = battery().simulate_year(winter, day, 3.0, PEAK_HOURS)
+    battery_profile, soc_df = battery().simulate_battery(winter, winter_met, 3.0, PEAK_HOURS)
+
+    np.testing.assert_allclose(discharge, battery_profile.discharge)
+    np.testing.assert_allclose(soc, soc_df['State of Charge (%)'])
+
+
+def test_soc_carries_across_days(profiles):
+    winter, _ = profiles
+    day = pd.DataFrame({'Month': 1, 'Hour': np.arange(24), 'Irradiation (kW/m^2)': 0.0})
+    two_days = pd.concat([day, day], ignore_index=True)
+    _, soc = Battery(3.0, 0.2, 0.3, 60.0, 10, 0.7).simulate_year(winter, two_days, 0.0, PEAK_HOURS)
+    # Without sun the battery discharges on the first day and starts the second day where it stopped
+    assert soc[24] == soc[23] < soc[0]
+
+
+def test_annual_cost_prices_every_hour_at_its_month_and_weekday():
+    tariff = Tariff.time_of_use([{'start': 0, 'end': 24, 'price': 1.0, 'months': [1]},
+                                 {'start': 0, 'end': 24, 'price': 5.0, 'months': [1], 'weekdays': [6]}], 0.5)
+    hour_of_day = np.array([0, 1, 2, 3])
+    month = np.array([1, 1, 7, 7])
+    weekday = np.array([0, 6, 0, 6])
+    load = np.ones(4)
+    assert Calculations.calculate_annual_cost(load, hour_of_day, PEAK_HOURS, tariff, month, weekday) == 1.0 + 5.0 + 0.5 + 0.5
+    # Without the calendar the hours are priced at the average over the year
+    averaged = tariff.prices(hour_of_day).sum()
+    assert Calculations.calculate_annual_cost(load, hour_of_day, PEAK_HOURS, tariff) == round(averaged, 2)
+
+
+def test_calendar_prices_of_a_dynamic_tariff_average_matching_timestamps():
+    time = pd.date_range('2024-01-01', periods=24 * 14, freq='h')
+    tariff = Tariff('market', series=pd.Series(np.arange(len(time), dtype=float), index=time))
+    # Mondays 1 and 8 January at 05:00
+    expected = (5 + (24 * 7 + 5)) / 2
+    assert tariff.calendar_prices([5], [1], [0])[0] == expected
+    with pytest.raises(ValueError):
+        tariff.calendar_prices([5], [2], [0])
+
+
+def test_analyze_year_matches_simulate_series(profiles, hourly_meteorology):
+    tables = {'Winter': profiles[0], 'Summer': profiles[1]}
+    result = Pipeline.analyze_year(tables, hourly_meteorology, 3.0, PEAK_HOURS)
+    winter = hourly_meteorology['Month'].isin([10, 11, 12, 1, 2, 3]).to_numpy()
+    hour = hourly_meteorology['Hour'].to_numpy()
+    np.testing.assert_array_equal(result['original_load'][winter], profiles[0].load()[hour[winter]])
+    np.testing.assert_array_equal(result['original_load'][~winter], profiles[1].load()[hour[~winter]])
+
+    capacity = result['capacity']
+    discharge, soc = Battery(capacity, 0.2, 0.3, capacity * 0.1, 10, 0.7).simulate_series(
+        result['original_load'], hourly_meteorology['Irradiation (kW/m^2)'].to_numpy(), hour, 3.0, PEAK_HOURS)
+    np.testing.assert_array_equal(result['discharge'], discharge)
+    assert result['battery_cost'] < result['original_cost']
+
+
+def test_scenarios_charge_only_with_their_own_sun():
+    # The first scenario has sun in the morning, the second a negative reading and no sun at all
+    hour = np.arange(24)
+    irradiance = np.zeros((2, 24))
+    irradiance[0, 6:12] = 0.5
+    irradiance[1, 6:12] = -0.5
+    load = np.where((hour >= 17) & (hour < 23), 4.0, 1.0)
+    discharge, soc = Battery.simulate_scenarios(load, irradiance, hour, 3.0, [10.0, 10.0], 0.2, 0.3, 4.0, 10, 0.7, PEAK_HOURS)
+    for row in range(2):
+        expected = Battery(10.0, 0.2, 0.3, 4.0, 10, 0.7).simulate_series(load, irradiance[row], hour, 3.0, PEAK_HOURS)
+        np.testing.assert_allclose(discharge[row], expected[0])
+        np.testing.assert_allclose(soc[row], expected[1])
+    assert soc[0].max() > 4 and soc[1, :18].tolist() == [4.0] * 18
+
+
+def test_year_mode_on_the_command_line(load_profile_path, meteorological_path, tmp_path, capsys):
+    assert main([load_profile_path, meteorological_path, '--year']) == 0
+    report = json.loads(capsys.readouterr().out)['year']
+    assert len(report['soc']) == len(report['hourly']['original']) == 8760
+    assert report['battery_cost'] < report['original_cost']
+
+    output = tmp_path / 'year.csv'
+    assert main([load_profile_path, meteorological_path, '--year', '--format', 'csv', '--output', str(output)]) == 0
+    summary = pd.read_csv(output)
+    assert summary['Cost (Battery)'][0] == report['battery_cost']